@@ -1,8 +1,7 @@
 import logging
-import json
 from todoist_api_python.api import TodoistAPI
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Annotated
 
@@ -24,45 +23,22 @@ from livekit.agents import (
 from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from wellness_log import WellnessLog
+
 logger = logging.getLogger("agent")
 
 load_dotenv(".env")
 
-# Path to wellness log
-WELLNESS_LOG_PATH = Path(__file__).parent / "wellness_log.json"
-
-
-def load_wellness_log() -> dict:
-    """Load the wellness log from JSON file."""
-    if not WELLNESS_LOG_PATH.exists():
-        return {"entries": []}
-    
-    try:
-        with open(WELLNESS_LOG_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading wellness log: {e}")
-        return {"entries": []}
-
-
-def save_wellness_log(data: dict) -> bool:
-    """Save the wellness log to JSON file."""
-    try:
-        with open(WELLNESS_LOG_PATH, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        logger.error(f"Error saving wellness log: {e}")
-        return False
+# Wellness log: one check-in per line, appended; see wellness_log.py
+WELLNESS_LOG_PATH = Path(__file__).parent / "wellness_log.jsonl"
+LEGACY_WELLNESS_LOG_PATH = Path(__file__).parent / "wellness_log.json"
+WELLNESS_LOG = WellnessLog(WELLNESS_LOG_PATH)
 
 
 def get_recent_entries(days: int = 2) -> list:
     """Get the most recent N entries from wellness log."""
-    data = load_wellness_log()
-    entries = data.get("entries", [])
-    
-    # Return last N entries
-    return entries[-days:] if len(entries) > 0 else []
+    # Reads only the last N lines of the log
+    return WELLNESS_LOG.tail(days)
 
 
 def get_todoist_api():
@@ -293,14 +269,13 @@ WEEKLY REFLECTIONS:
         """
         logger.info(f"Analyzing {days} days of wellness data")
         
-        data = load_wellness_log()
-        entries = data.get("entries", [])
-        
         # Check if we have enough data
-        if len(entries) < 3:
-            return f"I only have {len(entries)} check-in(s) on record so far. I need at least 3 check-ins to provide meaningful insights. Keep checking in daily, and soon I'll be able to show you patterns and trends!"
+        on_record = len(WELLNESS_LOG.tail(3))
+        if on_record < 3:
+            return f"I only have {on_record} check-in(s) on record so far. I need at least 3 check-ins to provide meaningful insights. Keep checking in daily, and soon I'll be able to show you patterns and trends!"
         
-        # Analyze the data
+        # Analyze the data; only the period's check-ins are read from the log
+        entries = WELLNESS_LOG.since(datetime.now() - timedelta(days=days))
         analysis = analyze_weekly_data(entries, days=days)
         
         # Build supportive summary
@@ -429,12 +404,13 @@ WEEKLY REFLECTIONS:
             "agent_summary": agent_summary or f"User reported {mood} mood with {energy_level} energy. Goals: {', '.join(daily_objectives)}"
         }
         
-        # Load existing data and append
-        data = load_wellness_log()
-        data["entries"].append(entry)
-        
-        # Save to file
-        success = save_wellness_log(data)
+        # Append to the log; earlier check-ins are not rewritten
+        try:
+            WELLNESS_LOG.append(entry)
+            success = True
+        except OSError as e:
+            logger.error(f"Error saving wellness log: {e}")
+            success = False
         
         if success:
             return f"✓ Check-in saved successfully! Entry recorded for {entry['date']}. I'll remember this for our next conversation."
@@ -444,6 +420,8 @@ WEEKLY REFLECTIONS:
 
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
+    # One-time import of check-ins saved in the old single-file format
+    WELLNESS_LOG.migrate_from_json(LEGACY_WELLNESS_LOG_PATH)
 
 
 async def entrypoint(ctx: JobContext):
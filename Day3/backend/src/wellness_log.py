@@ -0,0 +1,148 @@
+"""
+Append-only wellness check-in log.
+
+Check-ins are stored one JSON object per line (JSONL), so saving a check-in
+is a single O_APPEND write however many years of history the file holds.
+Recent check-ins are read backwards from the end of the file a block at a
+time, so fetching the last N entries only reads those N lines.
+
+Check-ins from the old wellness_log.json ({"entries": [...]}) are imported
+once, while the new log is still empty.
+"""
+
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not locked against other processes
+    fcntl = None
+
+logger = logging.getLogger("agent")
+
+BLOCK_SIZE = 8192
+
+
+def _encode(entry: Dict[str, Any]) -> bytes:
+    return (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _append_lines(fd: int, data: bytes):
+    """Write data at the end of a locked O_APPEND descriptor.
+
+    A crash mid-write can leave a torn last line, so data starts on a fresh one.
+    """
+    size = os.fstat(fd).st_size
+    prefix = b"\n" if size and os.pread(fd, 1, size - 1) != b"\n" else b""
+    os.write(fd, prefix + data)
+
+
+class WellnessLog:
+    """JSONL check-in log with a reverse tail reader."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    @contextmanager
+    def _locked_file(self) -> Iterator[int]:
+        """An O_APPEND descriptor, exclusively locked against other processes."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield fd
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def append(self, entry: Dict[str, Any]):
+        """Add a check-in at the end of the log."""
+        with self._locked_file() as fd:
+            _append_lines(fd, _encode(entry))
+
+    def _reverse_lines(self) -> Iterator[bytes]:
+        """Complete lines from the end of the file backwards, read BLOCK_SIZE bytes at a time."""
+        try:
+            with open(self.path, "rb") as f:
+                position = f.seek(0, os.SEEK_END)
+                remainder = b""
+                # Bytes after the last newline are an unfinished write and are skipped
+                in_unfinished = True
+                while position > 0:
+                    step = min(BLOCK_SIZE, position)
+                    position -= step
+                    f.seek(position)
+                    lines = (f.read(step) + remainder).split(b"\n")
+                    # The first piece may continue in the block before this one
+                    remainder = lines.pop(0)
+                    if in_unfinished:
+                        if not lines:
+                            remainder = b""
+                            continue
+                        lines.pop()
+                        in_unfinished = False
+                    for line in reversed(lines):
+                        if line.strip():
+                            yield line
+                if not in_unfinished and remainder.strip():
+                    yield remainder
+        except FileNotFoundError:
+            return
+
+    def iter_reverse(self) -> Iterator[Dict[str, Any]]:
+        """Check-ins newest first, skipping any corrupt lines."""
+        for line in self._reverse_lines():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("Skipping corrupt wellness log line")
+
+    def tail(self, n: int) -> List[Dict[str, Any]]:
+        """The last n check-ins, oldest first."""
+        entries: List[Dict[str, Any]] = []
+        if n > 0:
+            for entry in self.iter_reverse():
+                entries.append(entry)
+                if len(entries) == n:
+                    break
+        return entries[::-1]
+
+    def since(self, cutoff: datetime) -> List[Dict[str, Any]]:
+        """Check-ins from cutoff onwards, oldest first; reading stops at the first older one."""
+        entries: List[Dict[str, Any]] = []
+        for entry in self.iter_reverse():
+            try:
+                if datetime.fromisoformat(entry.get("timestamp", "")) < cutoff:
+                    break
+            except ValueError:
+                pass  # keep entries without a usable timestamp, as before
+            entries.append(entry)
+        return entries[::-1]
+
+    def migrate_from_json(self, legacy_path: Path) -> int:
+        """Import check-ins from the old wellness_log.json, if this log is empty.
+
+        Runs under the file lock, so it imports once even if called again.
+        """
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("entries", [])
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            return 0
+        if not entries:
+            return 0
+        with self._locked_file() as fd:
+            if os.fstat(fd).st_size > 0:
+                return 0
+            _append_lines(fd, b"".join(_encode(entry) for entry in entries))
+        logger.info(
+            f"Migrated {len(entries)} check-ins from {legacy_path} to {self.path}"
+        )
+        return len(entries)
@@ -0,0 +1,71 @@
+import json
+from datetime import datetime, timedelta
+
+import wellness_log
+from wellness_log import WellnessLog
+
+
+def _entry(day: int, mood: str = "7/10") -> dict:
+    timestamp = datetime(2025, 1, 1) + timedelta(days=day)
+    return {
+        "timestamp": timestamp.isoformat(),
+        "date": timestamp.strftime("%Y-%m-%d %H:%M"),
+        "mood": mood,
+    }
+
+
+def test_tail_reads_newest_entries_across_blocks(tmp_path, monkeypatch) -> None:
+    # Small blocks so entries span block boundaries
+    monkeypatch.setattr(wellness_log, "BLOCK_SIZE", 37)
+    log = WellnessLog(tmp_path / "wellness_log.jsonl")
+    assert log.tail(2) == []
+
+    for day in range(500):
+        log.append(_entry(day, mood=f"day {day} ünïcode"))
+
+    assert [e["mood"] for e in log.tail(2)] == ["day 498 ünïcode", "day 499 ünïcode"]
+    assert len(log.tail(1000)) == 500
+    assert log.tail(0) == []
+    assert [e["mood"] for e in log.iter_reverse()][:3] == [
+        "day 499 ünïcode",
+        "day 498 ünïcode",
+        "day 497 ünïcode",
+    ]
+
+    recent = log.since(datetime(2025, 1, 1) + timedelta(days=495))
+    assert [e["mood"] for e in recent] == [
+        f"day {day} ünïcode" for day in range(495, 500)
+    ]
+
+
+def test_torn_and_corrupt_lines_are_skipped(tmp_path) -> None:
+    log = WellnessLog(tmp_path / "wellness_log.jsonl")
+    log.append(_entry(1))
+    with open(log.path, "ab") as f:
+        f.write(b"not json\n")
+        f.write(b'{"timestamp": "2025-01-0')
+    assert [e["timestamp"][:10] for e in log.tail(5)] == ["2025-01-02"]
+
+    log.append(_entry(3))
+    assert [e["timestamp"][:10] for e in log.tail(5)] == ["2025-01-02", "2025-01-04"]
+
+
+def test_migrates_legacy_json_once(tmp_path) -> None:
+    legacy = tmp_path / "wellness_log.json"
+    legacy.write_text(json.dumps({"entries": [_entry(1), _entry(2)]}), encoding="utf-8")
+    log = WellnessLog(tmp_path / "wellness_log.jsonl")
+
+    assert log.migrate_from_json(legacy) == 2
+    assert log.migrate_from_json(legacy) == 0
+    log.append(_entry(3))
+    assert [e["timestamp"][:10] for e in log.tail(5)] == [
+        "2025-01-02",
+        "2025-01-03",
+        "2025-01-04",
+    ]
+    assert (
+        WellnessLog(tmp_path / "empty.jsonl").migrate_from_json(
+            tmp_path / "missing.json"
+        )
+        == 0
+    )
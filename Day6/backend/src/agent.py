@@ -1,7 +1,8 @@
+import asyncio
 import logging
 import os
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Any, Dict, Optional
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -22,6 +23,9 @@ from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
 # Import our custom modules
 import database
+from call_metadata import first_customer_id
+from rate_limit import AttemptLimiter
+from verification import answers_match
 
 logger = logging.getLogger("fraud_agent")
 
@@ -46,10 +50,11 @@ CONVERSATION FLOW:
 2. **Lookup & Verification**:
    - Use the `load_case_tool` with the provided username.
    - If found, say you have a transaction to verify, but first need to ask a security question.
-   - Ask the `security_question` returned by the tool.
-   - Verify the user's answer against the `security_answer`.
-   - If the answer is WRONG: Politely apologize, say you cannot proceed, and use `update_case_tool` to mark as "verification_failed" and end the call.
-   - If the answer is RIGHT: Thank them and proceed.
+   - Ask the security question returned by the tool.
+   - Pass the user's answer, exactly as they said it, to `verify_security_answer_tool`. You are never told the expected answer.
+   - If the tool says the answer is WRONG: Politely apologize, say you cannot proceed, and use `update_case_tool` to mark as "verification_failed" and end the call.
+   - If the tool says there are TOO MANY ATTEMPTS: the case is already marked as failed. Apologize, say you cannot proceed, and end the call without calling any other tool.
+   - If the tool says the answer is RIGHT: Thank them and proceed with the transaction details it returns.
 
 3. **Transaction Review**:
    - Read out the transaction details: Merchant, Amount, Time, and Card Ending (e.g., "card ending in 1234").
@@ -73,6 +78,61 @@ IMPORTANT:
 - If the user asks for the username, say "For this demo, you can say 'John' or 'Alice'."
 """
 
+def describe_case(case: Dict[str, Any]) -> str:
+    """Redacted case summary handed to the LLM once a case is loaded.
+
+    Only what is needed to ask the security question; the expected answer and
+    transaction details stay local until the caller is verified.
+    """
+    return (f"Case found for {case['username']}. "
+            f"Security Question: '{case['security_question']}'. "
+            "Ask the security question now.")
+
+
+def describe_transaction(case: Dict[str, Any]) -> str:
+    """Transaction details released to the LLM after a successful verification."""
+    return (f"Merchant: {case['transaction_name']} ({case['transaction_source']}), "
+            f"Amount: {case['transaction_amount']}, "
+            f"Time: {case['transaction_time']}, "
+            f"Card ending: {case['card_ending']}.")
+
+
+def preloaded_case_instructions(case: Dict[str, Any]) -> str:
+    """Extra instructions used when the case was loaded before the call started."""
+    return f"""
+
+PRELOADED CASE:
+The customer's file is already loaded, so do NOT ask for their username and do NOT call `load_case_tool`.
+After introducing yourself, go straight to the security question.
+{describe_case(case)}
+"""
+
+
+async def resolve_case(ctx: JobContext) -> Optional[Dict[str, Any]]:
+    """Look up the fraud case for an outbound call before the agent starts.
+
+    Checks dispatch (job) metadata, then room metadata, then the metadata of
+    participants already in the room; the room must be connected. It never
+    waits for a participant to join: without a customer in the metadata,
+    the agent asks for a username.
+    """
+    customer_id = first_customer_id([
+        ctx.job.metadata,
+        ctx.room.metadata,
+        *(participant.metadata for participant in ctx.room.remote_participants.values()),
+    ])
+    if not customer_id:
+        logger.info("No customer ID in metadata; the agent will ask for a username")
+        return None
+
+    case = await asyncio.to_thread(database.get_case, customer_id)
+    if case:
+        logger.info(f"Prefetched case for: {customer_id}")
+    else:
+        logger.info(f"No case found for metadata customer: {customer_id}")
+    return case
+
+
 def prewarm(proc: JobProcess):
     """Prewarm function to initialize database and load models."""
     logger.info("🔥 Prewarming Fraud Agent...")
@@ -85,6 +145,12 @@ def prewarm(proc: JobProcess):
     except Exception as e:
         logger.error(f"❌ Failed to initialize database: {e}")
 
+    # Security-answer attempt limiter (shared across workers when enabled)
+    shared_limits = os.getenv("FRAUD_SHARED_RATE_LIMIT", "").lower() in ("1", "true", "yes")
+    proc.userdata["attempt_limiter"] = AttemptLimiter(
+        db_path=database.DB_PATH if shared_limits else None
+    )
+
     # Load VAD model
     proc.userdata["vad"] = silero.VAD.load()
     logger.info("✅ VAD loaded")
@@ -98,9 +164,15 @@ async def entrypoint(ctx: JobContext):
     class FraudAgent(Agent):
         """Fraud Agent with database tools"""
         
-        def __init__(self):
-            super().__init__(instructions=FRAUD_AGENT_INSTRUCTIONS)
-            self.current_case = None
+        def __init__(self, case: Optional[Dict[str, Any]] = None):
+            # A case resolved from call metadata is loaded from the first turn
+            instructions = FRAUD_AGENT_INSTRUCTIONS
+            if case:
+                instructions += preloaded_case_instructions(case)
+            super().__init__(instructions=instructions)
+            self.current_case = case
+            self.verified = False
+            self.attempt_limiter: AttemptLimiter = ctx.proc.userdata["attempt_limiter"]
         
         @function_tool
         async def load_case_tool(
@@ -112,14 +184,37 @@ async def entrypoint(ctx: JobContext):
             case = database.get_case(username)
             if case:
                 self.current_case = case
-                # Return details to the LLM so it can speak them and verify the security answer
-                return (f"Case found. Details: {case}. "
-                        f"Security Question: '{case['security_question']}'. "
-                        f"Expected Answer: '{case['security_answer']}'. "
-                        "Ask the security question now.")
+                self.verified = False
+                # Only a redacted summary goes to the LLM; the answer is checked locally
+                return describe_case(case)
             else:
                 return "Case not found. Please ask the user to repeat their username (valid demo users: John, Alice)."
 
+        @function_tool
+        async def verify_security_answer_tool(
+            self,
+            answer: Annotated[str, "The customer's answer to the security question, as spoken"]
+        ) -> str:
+            """Check the customer's answer to the security question."""
+            if not self.current_case:
+                return "No case currently loaded."
+
+            username = self.current_case['username']
+            if not self.attempt_limiter.allow(f"user:{username}", f"room:{ctx.room.name}"):
+                # Fail the case here so the LLM needs no extra update_case_tool round
+                logger.warning(f"Verification attempts exhausted for {username}")
+                database.update_case(username, "verification_failed", "Too many security answer attempts.")
+                return "TOO MANY ATTEMPTS. The case has been marked verification_failed."
+
+            if answers_match(answer, self.current_case['security_answer']):
+                self.verified = True
+                logger.info(f"Security answer verified for {username}")
+                return ("Answer CORRECT. The customer is verified. "
+                        f"Transaction to review: {describe_transaction(self.current_case)}")
+
+            logger.info(f"Security answer mismatch for {username}")
+            return "Answer WRONG. Do not reveal any transaction details."
+
         @function_tool
         async def update_case_tool(
             self,
@@ -130,12 +225,24 @@ async def entrypoint(ctx: JobContext):
             if not self.current_case:
                 return "No case currently loaded."
             
+            if status in ("confirmed_safe", "confirmed_fraud") and not self.verified:
+                return "The customer has not been verified yet. Use verify_security_answer_tool first."
+
             username = self.current_case['username']
             database.update_case(username, status, outcome_note)
             return f"Case for {username} updated to {status}. You may now end the call."
 
+    # Connect first so room and participant metadata can be read, and resolve
+    # the case before the agent exists; it starts with current_case set
+    await ctx.connect()
+    try:
+        case = await resolve_case(ctx)
+    except Exception as e:
+        logger.error(f"❌ Failed to prefetch case: {e}")
+        case = None
+
     # Create agent instance
-    fraud_agent = FraudAgent()
+    fraud_agent = FraudAgent(case)
     
     # Set up voice AI pipeline
     session = AgentSession(
@@ -175,8 +282,6 @@ async def entrypoint(ctx: JobContext):
         ),
     )
     
-    await ctx.connect()
-    
     logger.info("🎙️ Fraud Alert Agent is live!")
 
 
@@ -0,0 +1,41 @@
+"""
+Customer lookup from LiveKit call metadata.
+
+Outbound fraud calls carry the customer's username in the dispatch (job),
+room or participant metadata, either as a JSON object such as
+{"username": "John"} or as a bare username string.
+"""
+
+import json
+from typing import Iterable, Optional
+
+# Metadata keys that may carry the customer's username on outbound calls
+CUSTOMER_METADATA_KEYS = ("username", "customer_id", "customer")
+
+
+def customer_id_from_metadata(metadata: Optional[str]) -> Optional[str]:
+    """Extract the customer username from one metadata string, if it has one."""
+    if not metadata or not metadata.strip():
+        return None
+    try:
+        data = json.loads(metadata)
+    except json.JSONDecodeError:
+        return metadata.strip()
+    if isinstance(data, dict):
+        for key in CUSTOMER_METADATA_KEYS:
+            value = data.get(key)
+            if value:
+                return str(value).strip()
+        return None
+    if isinstance(data, str):
+        return data.strip() or None
+    return None
+
+
+def first_customer_id(metadata_values: Iterable[Optional[str]]) -> Optional[str]:
+    """The username from the first metadata string that has one (job, then room, then participants)."""
+    for metadata in metadata_values:
+        customer_id = customer_id_from_metadata(metadata)
+        if customer_id:
+            return customer_id
+    return None
@@ -7,10 +7,27 @@ logger = logging.getLogger("fraud_agent_db")
 
 DB_PATH = Path(__file__).parent.parent / "data" / "fraud_cases.db"
 
-def init_db():
+# Column order used by every bulk insert into fraud_cases
+CASE_COLUMNS = (
+    "username",
+    "security_identifier",
+    "card_ending",
+    "transaction_name",
+    "transaction_amount",
+    "transaction_time",
+    "transaction_category",
+    "transaction_source",
+    "security_question",
+    "security_answer",
+    "status",
+    "outcome_note",
+)
+
+def init_db(db_path: Optional[Path] = None):
     """Initialize the database with the fraud_cases table."""
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    db_path = db_path or DB_PATH
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -0,0 +1,171 @@
+"""
+Token-bucket limiter for security-answer attempts.
+
+Each key (a username or a room) owns a bucket of attempts that refills over
+time. Checks are O(1) against an in-process dict; when a database path is
+given, bucket state lives in SQLite instead so every worker process shares
+the same limits. In memory, a bucket is forgotten once it has refilled
+completely (the same as an unseen key): a heap ordered by the time each
+bucket will be full finds those without scanning every key.
+"""
+
+import heapq
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("fraud_agent_rate_limit")
+
+# Three attempts, then one more every ten minutes
+DEFAULT_CAPACITY = 3
+DEFAULT_REFILL_PER_SECOND = 1 / 600
+
+
+@dataclass
+class TokenBucket:
+    tokens: float
+    updated: float
+
+
+class AttemptLimiter:
+    """Per-key token buckets; a call is allowed only if every key has a token."""
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        refill_per_second: float = DEFAULT_REFILL_PER_SECOND,
+        db_path: Optional[Path] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.db_path = db_path
+        self.clock = clock
+        self._buckets: Dict[str, TokenBucket] = {}
+        # (time the bucket will be full, key), pushed when a bucket is created or used
+        self._full_at: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        if db_path:
+            self._init_table()
+
+    def allow(self, *keys: str) -> bool:
+        """Consume one attempt from each key's bucket, or none if any is empty."""
+        if self.db_path:
+            return self._allow_shared(keys)
+        with self._lock:
+            now = self.clock()
+            buckets = [self._refill(self._buckets.get(key), now) for key in keys]
+            allowed = all(bucket.tokens >= 1 for bucket in buckets)
+            for key, bucket in zip(keys, buckets):
+                if allowed:
+                    bucket.tokens -= 1
+                # A denied call leaves the time the bucket will be full unchanged
+                if allowed or key not in self._buckets:
+                    self._schedule(key, bucket)
+                self._buckets[key] = bucket
+            self._prune(now)
+            return allowed
+
+    def _refill(self, bucket: Optional[TokenBucket], now: float) -> TokenBucket:
+        if bucket is None:
+            return TokenBucket(tokens=float(self.capacity), updated=now)
+        elapsed = max(0.0, now - bucket.updated)
+        tokens = min(
+            float(self.capacity), bucket.tokens + elapsed * self.refill_per_second
+        )
+        return TokenBucket(tokens=tokens, updated=now)
+
+    def _time_full(self, bucket: TokenBucket) -> float:
+        if self.refill_per_second <= 0:
+            return float("inf")
+        return bucket.updated + (self.capacity - bucket.tokens) / self.refill_per_second
+
+    def _schedule(self, key: str, bucket: TokenBucket):
+        full_at = self._time_full(bucket)
+        if full_at != float("inf"):
+            heapq.heappush(self._full_at, (full_at, key))
+
+    def _prune(self, now: float):
+        """Forget buckets that have refilled completely (same as an unseen key).
+
+        Only heap entries that are due are looked at. An entry can be older
+        than its bucket, which is then checked again and re-queued if it is
+        not full yet.
+        """
+        while self._full_at and self._full_at[0][0] <= now:
+            _, key = heapq.heappop(self._full_at)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            if self._time_full(bucket) <= now:
+                del self._buckets[key]
+            else:
+                self._schedule(key, bucket)
+
+    # ------------------------------------------------------------------
+    # SQLite-backed mode (shared across worker processes)
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode so BEGIN IMMEDIATE controls the transaction explicitly
+        return sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+
+    def _init_table(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS verification_attempts (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        conn.close()
+
+    def _allow_shared(self, keys: Tuple[str, ...]) -> bool:
+        conn = self._connect()
+        try:
+            # Take the write lock up front so concurrent workers serialize here
+            conn.execute("BEGIN IMMEDIATE")
+            now = self.clock()
+            stored = self._load_buckets(conn, keys)
+            buckets = [self._refill(stored.get(key), now) for key in keys]
+            allowed = all(bucket.tokens >= 1 for bucket in buckets)
+            for key, bucket in zip(keys, buckets):
+                if allowed:
+                    bucket.tokens -= 1
+                conn.execute(
+                    """
+                    INSERT INTO verification_attempts (key, tokens, updated)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated
+                """,
+                    (key, bucket.tokens, bucket.updated),
+                )
+            conn.execute("COMMIT")
+            return allowed
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.error(f"Shared rate limit check failed, denying attempt: {e}")
+            return False
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _load_buckets(
+        conn: sqlite3.Connection, keys: Iterable[str]
+    ) -> Dict[str, TokenBucket]:
+        keys = list(keys)
+        placeholders = ", ".join("?" for _ in keys)
+        rows = conn.execute(
+            f"SELECT key, tokens, updated FROM verification_attempts WHERE key IN ({placeholders})",
+            keys,
+        ).fetchall()
+        return {
+            key: TokenBucket(tokens=tokens, updated=updated)
+            for key, tokens, updated in rows
+        }
@@ -0,0 +1,234 @@
+"""
+Local security-answer verification for the Fraud Alert Agent.
+
+The expected answer never leaves the process: the spoken answer is compared
+here, with normalization, phonetic keys and a bounded edit distance so that
+small speech-to-text errors ("Smyth" for "Smith") still verify.
+"""
+
+import re
+import unicodedata
+from typing import List
+
+# Words callers often wrap around the actual answer ("it's Smith", "um, Fluffy").
+# Negations ("not", "no") are deliberately absent: "not Smith" is not Smith.
+FILLER_WORDS = {
+    "a",
+    "an",
+    "answer",
+    "be",
+    "believe",
+    "called",
+    "er",
+    "guess",
+    "his",
+    "her",
+    "i",
+    "is",
+    "it",
+    "its",
+    "maiden",
+    "mother",
+    "mothers",
+    "my",
+    "name",
+    "okay",
+    "ok",
+    "pet",
+    "pets",
+    "so",
+    "sure",
+    "that",
+    "the",
+    "think",
+    "uh",
+    "um",
+    "was",
+    "well",
+    "would",
+    "yeah",
+    "yes",
+}
+
+NUMBER_WORDS = {
+    "zero": "0",
+    "oh": "0",
+    "one": "1",
+    "two": "2",
+    "three": "3",
+    "four": "4",
+    "five": "5",
+    "six": "6",
+    "seven": "7",
+    "eight": "8",
+    "nine": "9",
+}
+
+_VOWELS = set("AEIOU")
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Lower-case, strip accents and punctuation, and map spoken digits."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = text.replace("'", "")
+    tokens = re.findall(r"[a-z0-9]+", text)
+    return [NUMBER_WORDS.get(token, token) for token in tokens]
+
+
+def _strip_fillers(tokens: List[str]) -> List[str]:
+    stripped = [t for t in tokens if t not in FILLER_WORDS]
+    # Never strip an answer down to nothing ("The Who" is a valid answer)
+    return stripped or tokens
+
+
+def phonetic_key(word: str) -> str:
+    """Simplified Metaphone key for a single word."""
+    word = "".join(c for c in word.upper() if c.isalpha())
+    if not word:
+        return ""
+    if word[:2] in ("KN", "GN", "PN", "AE", "WR"):
+        word = word[1:]
+    if word[0] == "X":
+        word = "S" + word[1:]
+    if word[:2] == "WH":
+        word = "W" + word[2:]
+
+    key = []
+    n = len(word)
+    for i, c in enumerate(word):
+        prev = word[i - 1] if i > 0 else ""
+        nxt = word[i + 1] if i + 1 < n else ""
+        nxt2 = word[i + 2] if i + 2 < n else ""
+
+        if c == prev and c != "C":
+            continue
+        if c in _VOWELS:
+            if i == 0:
+                key.append(c)
+        elif c == "B":
+            if not (prev == "M" and i == n - 1):
+                key.append("B")
+        elif c == "C":
+            if nxt == "H":
+                key.append("K" if prev == "S" else "X")
+            elif nxt == "I" and nxt2 == "A":
+                key.append("X")
+            elif nxt in ("I", "E", "Y"):
+                if prev != "S":
+                    key.append("S")
+            else:
+                key.append("K")
+        elif c == "D":
+            key.append("J" if nxt == "G" and nxt2 in ("E", "I", "Y") else "T")
+        elif c == "G":
+            if nxt == "H" and (i + 2 >= n or nxt2 not in _VOWELS):
+                continue
+            if nxt == "N" and i + 2 >= n:
+                continue
+            if prev == "D" and nxt in ("E", "I", "Y"):
+                continue
+            key.append("J" if nxt in ("E", "I", "Y") else "K")
+        elif c == "H":
+            if nxt in _VOWELS and prev not in ("C", "G", "P", "S", "T"):
+                key.append("H")
+        elif c == "K":
+            if prev != "C":
+                key.append("K")
+        elif c == "P":
+            key.append("F" if nxt == "H" else "P")
+        elif c == "Q":
+            key.append("K")
+        elif c == "S":
+            if nxt == "H" or (nxt == "I" and nxt2 in ("O", "A")):
+                key.append("X")
+            else:
+                key.append("S")
+        elif c == "T":
+            if nxt == "I" and nxt2 in ("O", "A"):
+                key.append("X")
+            elif nxt == "H":
+                key.append("0")
+            elif not (nxt == "C" and nxt2 == "H"):
+                key.append("T")
+        elif c == "V":
+            key.append("F")
+        elif c in ("W", "Y"):
+            if nxt in _VOWELS:
+                key.append(c)
+        elif c == "X":
+            key.append("KS")
+        elif c == "Z":
+            key.append("S")
+        else:
+            key.append(c)
+    return "".join(key)
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance, giving up early once it exceeds max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ca != cb),
+                )
+            )
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def _allowed_typos(length: int) -> int:
+    """Edits tolerated for an answer of the given length (short answers must be exact)."""
+    if length <= 3:
+        return 0
+    return max(1, length // 5)
+
+
+def _tokens_match(given: List[str], expected: List[str]) -> bool:
+    given_text = "".join(given)
+    expected_text = "".join(expected)
+    if given_text == expected_text:
+        return True
+
+    max_typos = _allowed_typos(len(expected_text))
+    if max_typos and edit_distance(given_text, expected_text, max_typos) <= max_typos:
+        return True
+
+    if len(expected_text) >= 3:
+        given_key = " ".join(phonetic_key(t) for t in given)
+        expected_key = " ".join(phonetic_key(t) for t in expected)
+        if expected_key and given_key == expected_key:
+            return True
+    return False
+
+
+def answers_match(given: str, expected: str) -> bool:
+    """Check a spoken security answer against the stored one.
+
+    Filler words are stripped ("I think it's Smith" -> "smith") and what is
+    left of the utterance is compared as a whole, so a list of guesses
+    ("Jones, Brown, Smith") or a negation ("not Smith") does not verify.
+    """
+    expected_tokens = _strip_fillers(normalize_tokens(expected))
+    given_tokens = _strip_fillers(normalize_tokens(given))
+    if not expected_tokens or not given_tokens:
+        return False
+
+    expected_text = "".join(expected_tokens)
+    if expected_text.isdigit():
+        # Spoken numbers arrive as separate digits ("one two three")
+        return (
+            all(t.isdigit() for t in given_tokens)
+            and "".join(given_tokens) == expected_text
+        )
+
+    return _tokens_match(given_tokens, expected_tokens)
@@ -0,0 +1,21 @@
+from call_metadata import customer_id_from_metadata, first_customer_id
+
+
+def test_customer_id_from_json_and_bare_metadata() -> None:
+    assert customer_id_from_metadata('{"username": "John"}') == "John"
+    assert customer_id_from_metadata('{"customer_id": " alice "}') == "alice"
+    assert customer_id_from_metadata('{"customer": 42}') == "42"
+    # The first key that has a value wins
+    assert customer_id_from_metadata('{"username": "", "customer_id": "alice"}') == "alice"
+    assert customer_id_from_metadata('"John"') == "John"
+    assert customer_id_from_metadata("  John ") == "John"
+
+
+def test_metadata_without_a_customer() -> None:
+    for metadata in (None, "", "   ", "{}", '{"campaign": "q4"}', '""', "[1, 2]", "5", "null"):
+        assert customer_id_from_metadata(metadata) is None
+
+
+def test_first_customer_id_prefers_earlier_sources() -> None:
+    assert first_customer_id([None, '{"campaign": "q4"}', '{"username": "Alice"}', "John"]) == "Alice"
+    assert first_customer_id([]) is None
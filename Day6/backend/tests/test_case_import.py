@@ -0,0 +1,91 @@
+import csv
+import json
+import sqlite3
+
+import case_import
+import database
+
+
+def _case(username: str, **overrides) -> dict:
+    case = {
+        "username": username,
+        "security_identifier": "11111",
+        "card_ending": "4242",
+        "transaction_name": "Test Merchant",
+        "transaction_amount": "$10.00",
+        "transaction_time": "Today, 9:00 AM",
+        "transaction_category": "retail",
+        "transaction_source": "example.com",
+        "security_question": "What is your favourite colour?",
+        "security_answer": "Blue",
+        "status": "pending_review",
+        "outcome_note": "",
+    }
+    case.update(overrides)
+    return case
+
+
+def test_import_ndjson_upserts_and_rejects(tmp_path) -> None:
+    db_path = tmp_path / "cases.db"
+    feed = tmp_path / "feed.ndjson"
+    rows = [
+        _case("Bob"),
+        _case("Carol", card_ending="12"),
+        "not json",
+        "5",
+        "[1]",
+        '"x"',
+        _case("Bob", transaction_amount="$99.00"),
+    ]
+    feed.write_text(
+        "\n".join(r if isinstance(r, str) else json.dumps(r) for r in rows),
+        encoding="utf-8",
+    )
+    database.init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE INDEX idx_by_card ON fraud_cases (card_ending)")
+    conn.close()
+
+    stats = case_import.import_cases(feed, chunk_size=1, db_path=db_path)
+
+    assert stats.rows_read == 7
+    assert stats.rows_rejected == 5
+    assert any("expected a JSON object, got list" in error for error in stats.errors)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT count(*) FROM fraud_cases").fetchone()[0] == 1
+    amount = conn.execute(
+        "SELECT transaction_amount FROM fraud_cases WHERE username = 'Bob'"
+    ).fetchone()[0]
+    assert amount == "$99.00"
+    indexes = {
+        name
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )
+    }
+    # Secondary indexes are dropped for the load and rebuilt afterwards
+    assert "idx_by_card" in indexes
+    conn.close()
+
+
+def _write_csv(path, cases) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=database.CASE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(cases)
+
+
+def test_import_csv_skip_keeps_existing(tmp_path) -> None:
+    db_path = tmp_path / "cases.db"
+    feed = tmp_path / "feed.csv"
+    _write_csv(feed, [_case("Dave")])
+    case_import.import_cases(feed, db_path=db_path)
+
+    _write_csv(feed, [_case("Dave", security_answer="Red")])
+    stats = case_import.import_cases(feed, on_conflict="skip", db_path=db_path)
+
+    assert stats.rows_written == 0
+    conn = sqlite3.connect(db_path)
+    answer = conn.execute("SELECT security_answer FROM fraud_cases").fetchone()[0]
+    assert answer == "Blue"
+    conn.close()
@@ -0,0 +1,65 @@
+from rate_limit import AttemptLimiter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_empties_and_refills() -> None:
+    clock = FakeClock()
+    limiter = AttemptLimiter(capacity=2, refill_per_second=0.1, clock=clock)
+
+    assert limiter.allow("user:John", "room:a")
+    assert limiter.allow("user:John", "room:b")
+    assert not limiter.allow("user:John", "room:c")
+
+    clock.now += 10
+    assert limiter.allow("user:John", "room:c")
+
+
+def test_denied_call_consumes_nothing() -> None:
+    limiter = AttemptLimiter(capacity=1, refill_per_second=0.0, clock=FakeClock())
+
+    assert limiter.allow("room:a")
+    assert not limiter.allow("user:Alice", "room:a")
+    # Alice's bucket was untouched by the denied call
+    assert limiter.allow("user:Alice", "room:b")
+
+
+def test_full_buckets_are_forgotten_without_a_scan() -> None:
+    clock = FakeClock()
+    limiter = AttemptLimiter(capacity=2, refill_per_second=0.1, clock=clock)
+    for n in range(1000):
+        assert limiter.allow(f"user:{n}")
+    assert limiter.allow("user:John") and limiter.allow("user:John")
+    # Hammering an empty bucket queues nothing more
+    for _ in range(1000):
+        assert not limiter.allow("user:John")
+    assert len(limiter._full_at) <= 1002
+
+    # One used attempt refills in 10s, two take 20s
+    clock.now += 10
+    assert limiter.allow("room:a")
+    assert set(limiter._buckets) == {"user:John", "room:a"}
+    clock.now += 20
+    assert limiter.allow("room:b")
+    assert set(limiter._buckets) == {"room:b"}
+
+
+def test_shared_store_limits_across_instances(tmp_path) -> None:
+    db_path = tmp_path / "limits.db"
+    clock = FakeClock()
+    first = AttemptLimiter(
+        capacity=2, refill_per_second=0.0, db_path=db_path, clock=clock
+    )
+    second = AttemptLimiter(
+        capacity=2, refill_per_second=0.0, db_path=db_path, clock=clock
+    )
+
+    assert first.allow("user:John")
+    assert second.allow("user:John")
+    assert not first.allow("user:John")
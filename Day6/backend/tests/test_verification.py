@@ -0,0 +1,31 @@
+from verification import answers_match, phonetic_key
+
+
+def test_exact_and_embedded_answers() -> None:
+    assert answers_match("Smith", "Smith")
+    assert answers_match("I think it's smith.", "Smith")
+    assert answers_match("um, my mother's maiden name is Smith", "Smith")
+    assert not answers_match("Jones", "Smith")
+
+
+def test_guess_lists_and_negations_do_not_verify() -> None:
+    assert not answers_match("jones brown smith taylor wilson", "Smith")
+    assert not answers_match("fluffy rex max bella", "Fluffy")
+    assert not answers_match("Smith or Jones", "Smith")
+    assert not answers_match("not smith", "Smith")
+    assert not answers_match("no, Fluffy", "Fluffy")
+    assert not answers_match("12345 or 54321", "12345")
+
+
+def test_tolerates_stt_errors() -> None:
+    assert answers_match("Smyth", "Smith")
+    assert answers_match("Fluffie", "Fluffy")
+    assert answers_match("phluffy", "Fluffy")
+    assert phonetic_key("Smyth") == phonetic_key("Smith")
+
+
+def test_short_and_numeric_answers_must_be_exact() -> None:
+    assert answers_match("cat", "Cat")
+    assert not answers_match("bat", "Cat")
+    assert answers_match("one two three four five", "12345")
+    assert not answers_match("12346", "12345")
@@ -0,0 +1,217 @@
+"""
+Benchmark for STT-robust item matching.
+
+Measures top-1 hit rate and lookup latency for misrecognized item names,
+comparing exact name lookup, ranked search, and ranked search fused with
+phonetic / BK-tree correction.
+
+The bundled catalog is tested against a hand-written corpus of real-world
+STT mistakes; synthetic catalogs get names corrupted with common STT
+confusions (sound-alike spellings, dropped letters, split words).
+
+Usage:
+    python bench_fuzzy.py
+    python bench_fuzzy.py --sizes 1000,100000 --queries 500
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from bench_index import synthesize_catalog
+from catalog_index import CatalogIndex
+from catalog_search import CatalogSearch
+from fuzzy_match import FuzzyMatcher, match_items
+
+CATALOG_PATH = Path(__file__).parent / "data" / "catalog.json"
+
+# (what the STT heard, item that was meant)
+MISHEARD_CORPUS = [
+    ("peanut budder", "grocery_005"),
+    ("hole wheat bred", "grocery_001"),
+    ("whole weet bread", "grocery_001"),
+    ("margarita pizza", "prepared_001"),
+    ("orang juice", "beverage_001"),
+    ("chocolet bar", "snack_002"),
+    ("kofee", "beverage_002"),
+    ("coffe", "beverage_002"),
+    ("biriyani", "prepared_004"),
+    ("chiken biryani", "prepared_004"),
+    ("paneer burgar", "prepared_003"),
+    ("pop corn", "snack_005"),
+    ("namkin mix", "snack_004"),
+    ("cookees", "snack_003"),
+    ("cooking oyl", "grocery_010"),
+    ("potato chip", "snack_001"),
+    ("pasta sos", "grocery_008"),
+    ("paster", "grocery_007"),
+    ("eggz", "grocery_004"),
+    ("buttar", "grocery_006"),
+    ("rize", "grocery_009"),
+    ("veggie sandwitch", "prepared_002"),
+    ("veg pulav", "prepared_005"),
+    ("white bred", "grocery_002"),
+]
+
+# Common STT confusions applied to synthetic names
+CONFUSIONS = [
+    ("tt", "dd"),
+    ("ph", "f"),
+    ("c", "k"),
+    ("ee", "i"),
+    ("ie", "y"),
+    ("s", "z"),
+    ("oo", "u"),
+    ("ck", "k"),
+    ("ey", "y"),
+    ("er", "ar"),
+    ("i", "ee"),
+]
+
+
+def corrupt(name: str, rng: random.Random) -> str:
+    """Misspell one word of the name the way an STT engine might."""
+    words = name.split()
+    candidates = [i for i, w in enumerate(words) if len(w) > 3 and not w.isdigit()]
+    if not candidates:
+        return name
+    i = rng.choice(candidates)
+    word = words[i].lower()
+    options = [(a, b) for a, b in CONFUSIONS if a in word]
+    if options and rng.random() < 0.7:
+        a, b = rng.choice(options)
+        word = word.replace(a, b, 1)
+    elif rng.random() < 0.5:
+        # Drop a letter
+        j = rng.randrange(1, len(word))
+        word = word[:j] + word[j + 1 :]
+    else:
+        # Split the word in two
+        j = rng.randrange(2, len(word) - 1)
+        word = f"{word[:j]} {word[j:]}"
+    words[i] = word
+    return " ".join(words)
+
+
+def item_id(item: Dict[str, Any]) -> str:
+    return item["id"]
+
+
+def base_name(item: Dict[str, Any]) -> str:
+    """Synthetic item name without its numeric suffix."""
+    return item["name"].rsplit(" ", 1)[0].lower()
+
+
+ItemKey = Callable[[Dict[str, Any]], str]
+
+
+def measure(
+    lookup: Callable[[str], Optional[Dict[str, Any]]],
+    corpus: List[Tuple[str, str]],
+    key: ItemKey,
+) -> Dict[str, float]:
+    hits = 0
+    latencies = []
+    for query, expected in corpus:
+        started = time.perf_counter()
+        item = lookup(query)
+        latencies.append((time.perf_counter() - started) * 1e6)
+        if item and key(item) == expected:
+            hits += 1
+    latencies.sort()
+    return {
+        "hit_rate": hits / len(corpus),
+        "mean_us": statistics.mean(latencies),
+        "p95_us": latencies[int(len(latencies) * 0.95) - 1]
+        if len(latencies) > 1
+        else latencies[0],
+    }
+
+
+def run(
+    catalog: Dict[str, Any], corpus: List[Tuple[str, str]], key: ItemKey = item_id
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    index = CatalogIndex(catalog)
+    search = CatalogSearch(catalog)
+    matcher = FuzzyMatcher(catalog)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    def top(results):
+        return results[0][1] if results else None
+
+    return {
+        "items": len(index),
+        "build_ms": round(build_ms, 1),
+        "exact": measure(
+            lambda q: index.get_by_exact_name(q) or index.find_name_containing(q),
+            corpus,
+            key,
+        ),
+        "ranked": measure(lambda q: top(search.search(q, 5)), corpus, key),
+        "fused": measure(
+            lambda q: top(match_items(search, matcher, q, 5)), corpus, key
+        ),
+    }
+
+
+def print_result(label: str, result: Dict[str, Any]):
+    print(
+        f"\n{label}: {result['items']} items, indexes built in {result['build_ms']}ms"
+    )
+    for method in ("exact", "ranked", "fused"):
+        r = result[method]
+        print(
+            f"  {method:<7} hit rate {r['hit_rate']:>6.1%}   mean {r['mean_us']:>9.1f}µs   p95 {r['p95_us']:>9.1f}µs"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes",
+        default="1000,10000,100000",
+        help="Comma-separated synthetic catalog sizes",
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=300,
+        help="Corrupted queries per synthetic catalog",
+    )
+    args = parser.parse_args()
+
+    with open(CATALOG_PATH, "r", encoding="utf-8") as f:
+        bundled = json.load(f)
+    print_result(
+        f"Bundled catalog, {len(MISHEARD_CORPUS)} misheard names",
+        run(bundled, MISHEARD_CORPUS),
+    )
+
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        catalog = synthesize_catalog(size)
+        items = [item for items in catalog["categories"].values() for item in items]
+        rng = random.Random(size)
+        # Queries leave out the numeric suffix, so any item with the same base name is a hit
+        corpus = [
+            (corrupt(base_name(item), rng), base_name(item))
+            for item in rng.sample(items, min(args.queries, len(items)))
+        ]
+        print_result(
+            f"Synthetic catalog, {len(corpus)} corrupted names",
+            run(catalog, corpus, base_name),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Microbenchmark for the catalog indexes.
+
+Compares the original linear catalog scans with CatalogIndex lookups and
+ranked CatalogSearch queries on synthetic catalogs from 100 to 1M items.
+
+Usage:
+    python bench_index.py
+    python bench_index.py --sizes 100,10000 --queries 500
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from catalog_index import CatalogIndex
+from catalog_search import CatalogSearch
+
+CATEGORIES = ["Groceries", "Snacks", "Beverages", "Prepared Food", "Household"]
+ADJECTIVES = [
+    "Organic",
+    "Fresh",
+    "Classic",
+    "Spicy",
+    "Sweet",
+    "Crunchy",
+    "Low Fat",
+    "Premium",
+]
+NOUNS = [
+    "Bread",
+    "Milk",
+    "Butter",
+    "Cheese",
+    "Chips",
+    "Cookies",
+    "Juice",
+    "Pasta",
+    "Rice",
+    "Noodles",
+    "Yogurt",
+    "Tea",
+    "Coffee",
+    "Soap",
+    "Sauce",
+    "Jam",
+    "Honey",
+    "Oats",
+]
+BRANDS = ["Amul", "Britannia", "Nestle", "Tata", "Haldiram", "Parle", "Dabur", "Maggi"]
+TAGS = [
+    "vegan",
+    "vegetarian",
+    "dairy",
+    "fresh",
+    "protein",
+    "spread",
+    "snack",
+    "sugar-free",
+    "gluten-free",
+    "organic",
+    "spicy",
+    "breakfast",
+]
+
+
+def synthesize_catalog(
+    num_items: int, num_recipes: int = 0, seed: int = 0
+) -> Dict[str, Any]:
+    """Build a catalog.json-shaped dict with unique, realistic-looking item names."""
+    rng = random.Random(seed)
+    categories: Dict[str, List[Dict[str, Any]]] = {name: [] for name in CATEGORIES}
+    ids = []
+    for i in range(num_items):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        item_id = f"item_{i:07d}"
+        ids.append(item_id)
+        categories[category].append(
+            {
+                "id": item_id,
+                "name": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}",
+                "category": category,
+                "price": rng.randint(10, 999),
+                "brand": rng.choice(BRANDS),
+                "size": f"{rng.choice([100, 200, 500, 1000])}g",
+                "tags": rng.sample(TAGS, 2),
+            }
+        )
+    recipes = {
+        f"recipe {r}": {
+            "name": f"Recipe {r}",
+            "items": rng.sample(ids, min(5, len(ids))),
+        }
+        for r in range(num_recipes)
+    }
+    return {"categories": categories, "recipes": recipes}
+
+
+# Original linear implementations, kept here as the baseline
+
+
+def linear_get_item_by_id(catalog: Dict[str, Any], item_id: str):
+    for items in catalog.get("categories", {}).values():
+        for item in items:
+            if item.get("id") == item_id:
+                return item
+    return None
+
+
+def linear_get_item_by_name(catalog: Dict[str, Any], item_name: str):
+    item_name_lower = item_name.lower()
+    for items in catalog.get("categories", {}).values():
+        for item in items:
+            if item.get("name", "").lower() == item_name_lower:
+                return item
+            if item_name_lower in item.get("name", "").lower():
+                return item
+    return None
+
+
+def linear_search_items(catalog: Dict[str, Any], query: str):
+    results = []
+    query_lower = query.lower()
+    for items in catalog.get("categories", {}).values():
+        for item in items:
+            if query_lower in item.get("name", "").lower():
+                results.append(item)
+            elif any(query_lower in tag.lower() for tag in item.get("tags", [])):
+                results.append(item)
+            elif query_lower in item.get("category", "").lower():
+                results.append(item)
+    return results
+
+
+def time_per_call(fn: Callable[[str], Any], queries: List[str]) -> float:
+    """Average microseconds per call."""
+    started = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - started) / len(queries) * 1e6
+
+
+def run(size: int, num_queries: int) -> Dict[str, float]:
+    catalog = synthesize_catalog(size)
+    items = [item for items in catalog["categories"].values() for item in items]
+    rng = random.Random(size)
+    sample = [rng.choice(items) for _ in range(num_queries)]
+    ids = [item["id"] for item in sample]
+    names = [item["name"] for item in sample]
+
+    started = time.perf_counter()
+    index = CatalogIndex(catalog)
+    search = CatalogSearch(catalog)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    # Linear scans get far fewer queries on big catalogs so the run stays short
+    linear_queries = max(1, min(num_queries, 2_000_000 // size))
+    search_queries = [
+        "organic",
+        "milk",
+        "vegan",
+        "cheese 42",
+        "choc",
+        "britannia cookies",
+    ]
+
+    return {
+        "items": size,
+        "index_build_ms": round(build_ms, 2),
+        "by_id_linear_us": time_per_call(
+            lambda q: linear_get_item_by_id(catalog, q), ids[:linear_queries]
+        ),
+        "by_id_index_us": time_per_call(index.get_by_id, ids),
+        "by_name_linear_us": time_per_call(
+            lambda q: linear_get_item_by_name(catalog, q), names[:linear_queries]
+        ),
+        "by_name_index_us": time_per_call(index.get_by_exact_name, names),
+        "search_linear_us": time_per_call(
+            lambda q: linear_search_items(catalog, q),
+            search_queries[: max(1, linear_queries)],
+        ),
+        "search_index_us": time_per_call(lambda q: search.search(q, 5), search_queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes",
+        default="100,1000,10000,100000,1000000",
+        help="Comma-separated catalog sizes",
+    )
+    parser.add_argument(
+        "--queries", type=int, default=1000, help="Lookups per measurement"
+    )
+    args = parser.parse_args()
+
+    header = f"{'items':>9} {'build ms':>9} | {'id lin':>9} {'id idx':>7} | {'name lin':>9} {'name idx':>8} | {'srch lin':>9} {'srch idx':>9}  (µs/call)"
+    print(header)
+    print("-" * len(header))
+    for size in (int(s) for s in args.sizes.split(",")):
+        r = run(size, args.queries)
+        print(
+            f"{r['items']:>9} {r['index_build_ms']:>9.1f} | "
+            f"{r['by_id_linear_us']:>9.1f} {r['by_id_index_us']:>7.2f} | "
+            f"{r['by_name_linear_us']:>9.1f} {r['by_name_index_us']:>8.2f} | "
+            f"{r['search_linear_us']:>9.1f} {r['search_index_us']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import logging
 import os
 from pathlib import Path
-from typing import Annotated, List, Dict, Any
+from typing import Annotated, Dict, List, Optional, TypedDict
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -22,6 +22,8 @@ from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
 # Import our custom modules
 import database
+from cart import Cart, format_rupees
+from order_ids import idempotency_key
 
 logger = logging.getLogger("food_ordering_agent")
 
@@ -50,6 +52,10 @@ CONVERSATION FLOW:
      - Once identified, use `add_to_cart_tool` with item_id and quantity.
      - Confirm: "I've added [quantity] [item name] to your cart."
    
+   - When the customer lists several items at once (e.g., "two milks, a dozen eggs and some bread"):
+     - Use `add_items_tool` once with every item and quantity, instead of searching and adding one by one.
+     - Items it adds are confirmed in its summary; ask only about the ambiguous or missing ones it lists.
+   
    - For recipe/meal requests (e.g., "ingredients for a peanut butter sandwich", "pasta for two"):
      - Use `get_recipe_items_tool` with the recipe name.
      - If found, add all recipe items to cart and confirm:
@@ -79,15 +85,25 @@ IMPORTANT RULES:
 - For recipe requests, be intelligent - use the get_recipe_items_tool first.
 """
 
+class ItemRequest(TypedDict):
+    """One entry of a spoken shopping list, for add_items_tool."""
+    item: str
+    quantity: int
+
+
 def prewarm(proc: JobProcess):
     """Prewarm function to load models."""
     logger.info("🔥 Prewarming Food Ordering Agent...")
     
-    # Load catalog to verify it exists
+    # Map the prebuilt snapshot if there is one, otherwise parse catalog.json
     try:
-        catalog = database.load_catalog()
-        num_items = sum(len(items) for items in catalog.get("categories", {}).values())
-        logger.info(f"✅ Catalog loaded with {num_items} items")
+        if database.get_catalog_snapshot() is not None:
+            logger.info(f"✅ Catalog snapshot mapped with {len(database.get_catalog_index())} items")
+        else:
+            database.load_catalog()
+            num_items = len(database.get_catalog_index())
+            logger.info(f"✅ Catalog loaded and indexed with {num_items} items "
+                        f"in {database.catalog_cache_stats()['last_reload_ms']}ms")
     except Exception as e:
         logger.error(f"❌ Failed to load catalog: {e}")
 
@@ -106,8 +122,10 @@ async def entrypoint(ctx: JobContext):
         
         def __init__(self):
             super().__init__(instructions=FOOD_ORDERING_INSTRUCTIONS)
-            self.cart: List[Dict[str, Any]] = []
+            self.cart = Cart()
             self.customer_info: Dict[str, str] = {}
+            self.session_id = f"{ctx.room.name}:{ctx.job.id}"
+            self.last_order_id: Optional[str] = None
         
         @function_tool
         async def search_items_tool(
@@ -117,23 +135,18 @@ async def entrypoint(ctx: JobContext):
             """Search for items in the catalog."""
             logger.info(f"Searching for: {query}")
             
-            # First try exact name match
-            item = database.get_item_by_name(query)
-            if item:
-                return f"Found: {item['name']} ({item['brand']}, {item['size']}) - ₹{item['price']}. Item ID: {item['id']}"
-            
-            # Then try broader search
-            items = database.search_items(query)
-            if not items:
+            results = database.match_items(query, limit=5)
+            if not results:
                 return f"Sorry, I couldn't find any items matching '{query}'. Could you try a different search term?"
             
-            if len(items) == 1:
-                item = items[0]
+            # A single hit, or one that clearly outscores the rest, needs no clarification
+            top_score, item = results[0]
+            if len(results) == 1 or top_score >= database.CLEAR_WINNER_RATIO * results[1][0]:
                 return f"Found: {item['name']} ({item['brand']}, {item['size']}) - ₹{item['price']}. Item ID: {item['id']}"
             
-            # Multiple items found
-            result = f"I found {len(items)} items matching '{query}':\n"
-            for item in items[:5]:  # Limit to 5 items
+            # Multiple items found, best match first
+            result = f"Best matches for '{query}':\n"
+            for _, item in results:
                 result += f"- {item['name']} ({item['brand']}, {item['size']}) - ₹{item['price']} (ID: {item['id']})\n"
             result += "Which one would you like?"
             return result
@@ -155,19 +168,11 @@ async def entrypoint(ctx: JobContext):
                 return "Recipe found but no items available."
             
             # Add all items to cart
+            before = self.cart.snapshot()
             for item in items:
-                # Check if item already in cart
-                existing = next((ci for ci in self.cart if ci["item"]["id"] == item["id"]), None)
-                if existing:
-                    existing["quantity"] += 1
-                else:
-                    self.cart.append({
-                        "item": item,
-                        "quantity": 1
-                    })
+                self.cart.add(item, 1)
             
-            item_names = [f"{item['name']}" for item in items]
-            return f"I've added the following items to your cart for '{recipe_data['recipe_name']}': {', '.join(item_names)}."
+            return f"For '{recipe_data['recipe_name']}': {self.cart.diff(before).describe()}"
         
         @function_tool
         async def add_to_cart_tool(
@@ -182,17 +187,46 @@ async def entrypoint(ctx: JobContext):
             if not item:
                 return f"Item with ID {item_id} not found. Please search for the item first."
             
-            # Check if item already in cart
-            existing = next((ci for ci in self.cart if ci["item"]["id"] == item_id), None)
-            if existing:
-                existing["quantity"] += quantity
-                return f"Updated {item['name']} quantity to {existing['quantity']} in your cart."
-            else:
-                self.cart.append({
-                    "item": item,
-                    "quantity": quantity
-                })
-                return f"Added {quantity} {item['name']} to your cart."
+            if quantity <= 0:
+                return "Quantity must be at least 1."
+            
+            already_in_cart = item_id in self.cart
+            line = self.cart.add(item, quantity)
+            total = format_rupees(self.cart.total_paise)
+            if already_in_cart:
+                return f"Updated {item['name']} quantity to {line.quantity} in your cart. Cart total: {total}."
+            return f"Added {quantity} {item['name']} to your cart. Cart total: {total}."
+        
+        @function_tool
+        async def add_items_tool(
+            self,
+            items: Annotated[
+                List[ItemRequest],
+                "Every item the customer asked for: 'item' is the spoken name or an item ID, 'quantity' how many",
+            ]
+        ) -> str:
+            """Add several items to the cart in one call, resolving each name against the catalog."""
+            logger.info(f"Adding {len(items)} items to cart")
+            
+            before = self.cart.snapshot()
+            resolved = database.resolve_items([request["item"] for request in items])
+            ambiguous, missing = [], []
+            for request, (item, candidates) in zip(items, resolved):
+                quantity = max(1, request.get("quantity") or 1)
+                if item:
+                    self.cart.add(item, quantity)
+                elif candidates:
+                    options = " / ".join(f"{c['name']} ({c['brand']}, ₹{c['price']}, ID: {c['id']})" for c in candidates)
+                    ambiguous.append(f"'{request['item']}' x {quantity}: {options}")
+                else:
+                    missing.append(request["item"])
+            
+            result = self.cart.diff(before).describe()
+            if ambiguous:
+                result += "\nWhich one did they mean? " + "; ".join(ambiguous)
+            if missing:
+                result += f"\nNot found: {', '.join(missing)}."
+            return result
         
         @function_tool
         async def remove_from_cart_tool(
@@ -202,11 +236,9 @@ async def entrypoint(ctx: JobContext):
             """Remove an item from the cart."""
             logger.info(f"Removing from cart: {item_id}")
             
-            initial_len = len(self.cart)
-            self.cart = [ci for ci in self.cart if ci["item"]["id"] != item_id]
-            
-            if len(self.cart) < initial_len:
-                return "Item removed from cart."
+            line = self.cart.remove(item_id)
+            if line:
+                return f"Removed {line.item['name']} from cart. Cart total: {format_rupees(self.cart.total_paise)}."
             else:
                 return "Item not found in cart."
         
@@ -219,13 +251,14 @@ async def entrypoint(ctx: JobContext):
             """Update the quantity of an item in the cart."""
             logger.info(f"Updating cart quantity: {item_id} to {quantity}")
             
+            if quantity < 0:
+                return "Quantity cannot be negative."
             if quantity == 0:
                 return await self.remove_from_cart_tool(item_id)
             
-            cart_item = next((ci for ci in self.cart if ci["item"]["id"] == item_id), None)
-            if cart_item:
-                cart_item["quantity"] = quantity
-                return f"Updated {cart_item['item']['name']} quantity to {quantity}."
+            line = self.cart.set_quantity(item_id, quantity)
+            if line:
+                return f"Updated {line.item['name']} quantity to {quantity}. Cart total: {format_rupees(self.cart.total_paise)}."
             else:
                 return "Item not found in cart."
         
@@ -237,16 +270,11 @@ async def entrypoint(ctx: JobContext):
             if not self.cart:
                 return "Your cart is empty."
             
-            result = "Your cart:\n"
-            for cart_item in self.cart:
-                item = cart_item["item"]
-                qty = cart_item["quantity"]
-                subtotal = item["price"] * qty
-                result += f"- {item['name']} x {qty} = ₹{subtotal}\n"
-            
-            total = database.calculate_cart_total(self.cart)
-            result += f"\nTotal: ₹{total:.2f}"
-            return result
+            lines = [
+                f"- {line.item['name']} x {line.quantity} = {format_rupees(line.subtotal_paise)}"
+                for line in self.cart
+            ]
+            return "Your cart:\n" + "\n".join(lines) + f"\n\nTotal: {format_rupees(self.cart.total_paise)}"
         
         @function_tool
         async def place_order_tool(
@@ -258,22 +286,13 @@ async def entrypoint(ctx: JobContext):
             logger.info(f"Placing order for: {customer_name}")
             
             if not self.cart:
+                if self.last_order_id:
+                    return f"Order already placed. Order ID: {self.last_order_id}."
                 return "Cannot place order - cart is empty."
             
             # Prepare order data
-            order_items = []
-            for cart_item in self.cart:
-                item = cart_item["item"]
-                order_items.append({
-                    "item_id": item["id"],
-                    "name": item["name"],
-                    "brand": item.get("brand"),
-                    "quantity": cart_item["quantity"],
-                    "unit_price": item["price"],
-                    "subtotal": item["price"] * cart_item["quantity"]
-                })
-            
-            total = database.calculate_cart_total(self.cart)
+            order_items = self.cart.to_order_items()
+            total = self.cart.total
             
             order = {
                 "customer_name": customer_name,
@@ -283,11 +302,13 @@ async def entrypoint(ctx: JobContext):
                 "status": "placed"
             }
             
-            # Save order
-            order_id = database.save_order(order)
+            # Save order; a retried call for the same cart returns the original order
+            key = idempotency_key(self.session_id, order_items)
+            order_id = database.save_order(order, idempotency_key=key)
             
             # Clear cart
-            self.cart = []
+            self.cart.clear()
+            self.last_order_id = order_id
             
             return f"Order placed successfully! Order ID: {order_id}. Total: ₹{total:.2f}. Thank you, {customer_name}!"
 
@@ -0,0 +1,198 @@
+"""
+Shopping cart for FreshCart sessions.
+
+Lines are keyed by item ID, so adding, updating and removing an item is
+constant-time however large the cart gets. Prices are kept in integer paise
+and the cart total is maintained incrementally, so totals are exact (no
+float drift) and never need a full recompute.
+"""
+
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+
+def to_paise(price: Any) -> int:
+    """Convert a catalog price in rupees (int, float or str) to integer paise."""
+    return int(
+        (Decimal(str(price)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+    )
+
+
+def format_rupees(paise: int) -> str:
+    sign = "-" if paise < 0 else ""
+    rupees, rest = divmod(abs(paise), 100)
+    return f"{sign}₹{rupees}.{rest:02d}"
+
+
+@dataclass
+class CartLine:
+    item: Dict[str, Any]
+    quantity: int
+    unit_paise: int
+
+    @property
+    def subtotal_paise(self) -> int:
+        return self.unit_paise * self.quantity
+
+
+@dataclass(frozen=True)
+class CartSnapshot:
+    """Immutable view of the cart at one point in time."""
+
+    quantities: Mapping[str, int]
+    names: Mapping[str, str]
+    total_paise: int
+
+
+@dataclass(frozen=True)
+class CartDiff:
+    """What changed between two snapshots, for compact tool responses."""
+
+    added: Tuple[Tuple[str, int], ...]  # (name, quantity)
+    removed: Tuple[Tuple[str, int], ...]  # (name, previous quantity)
+    changed: Tuple[Tuple[str, int, int], ...]  # (name, old quantity, new quantity)
+    total_paise: int
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def describe(self) -> str:
+        parts = []
+        if self.added:
+            parts.append(
+                "added " + ", ".join(f"{qty} {name}" for name, qty in self.added)
+            )
+        if self.changed:
+            parts.append(
+                "updated "
+                + ", ".join(f"{name} to {new}" for name, _, new in self.changed)
+            )
+        if self.removed:
+            parts.append("removed " + ", ".join(name for name, _ in self.removed))
+        if not parts:
+            return f"No changes. Cart total: {format_rupees(self.total_paise)}."
+        summary = "; ".join(parts)
+        return f"{summary[0].upper()}{summary[1:]}. Cart total: {format_rupees(self.total_paise)}."
+
+
+class Cart:
+    """Cart lines keyed by item ID with a running total in paise."""
+
+    def __init__(self):
+        self._lines: Dict[str, CartLine] = {}
+        self._total_paise = 0
+        self._units = 0
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __bool__(self) -> bool:
+        return bool(self._lines)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._lines
+
+    def __iter__(self) -> Iterator[CartLine]:
+        """Lines in the order items were first added."""
+        return iter(self._lines.values())
+
+    def get(self, item_id: str) -> Optional[CartLine]:
+        return self._lines.get(item_id)
+
+    @property
+    def total_paise(self) -> int:
+        return self._total_paise
+
+    @property
+    def total(self) -> float:
+        """Total in rupees, for display and order records."""
+        return self._total_paise / 100
+
+    @property
+    def units(self) -> int:
+        """Number of individual units across all lines."""
+        return self._units
+
+    def add(self, item: Dict[str, Any], quantity: int = 1) -> CartLine:
+        """Add quantity of an item, merging with an existing line."""
+        if quantity <= 0:
+            raise ValueError("quantity must be positive")
+        line = self._lines.get(item["id"])
+        if line is None:
+            line = CartLine(
+                item=item, quantity=0, unit_paise=to_paise(item.get("price", 0))
+            )
+            self._lines[item["id"]] = line
+        line.quantity += quantity
+        self._units += quantity
+        self._total_paise += line.unit_paise * quantity
+        return line
+
+    def set_quantity(self, item_id: str, quantity: int) -> Optional[CartLine]:
+        """Set a line's quantity; 0 removes it. Returns None if the item is not in the cart."""
+        if quantity < 0:
+            raise ValueError("quantity cannot be negative")
+        line = self._lines.get(item_id)
+        if line is None:
+            return None
+        if quantity == 0:
+            return self.remove(item_id)
+        delta = quantity - line.quantity
+        line.quantity = quantity
+        self._units += delta
+        self._total_paise += line.unit_paise * delta
+        return line
+
+    def remove(self, item_id: str) -> Optional[CartLine]:
+        line = self._lines.pop(item_id, None)
+        if line is not None:
+            self._units -= line.quantity
+            self._total_paise -= line.subtotal_paise
+        return line
+
+    def clear(self):
+        self._lines.clear()
+        self._total_paise = 0
+        self._units = 0
+
+    def snapshot(self) -> CartSnapshot:
+        return CartSnapshot(
+            quantities=MappingProxyType(
+                {item_id: line.quantity for item_id, line in self._lines.items()}
+            ),
+            names=MappingProxyType(
+                {item_id: line.item["name"] for item_id, line in self._lines.items()}
+            ),
+            total_paise=self._total_paise,
+        )
+
+    def diff(self, before: CartSnapshot) -> CartDiff:
+        """Changes from an earlier snapshot to the current cart."""
+        added, changed = [], []
+        for item_id, line in self._lines.items():
+            old = before.quantities.get(item_id)
+            if old is None:
+                added.append((line.item["name"], line.quantity))
+            elif old != line.quantity:
+                changed.append((line.item["name"], old, line.quantity))
+        removed = [
+            (before.names[item_id], qty)
+            for item_id, qty in before.quantities.items()
+            if item_id not in self._lines
+        ]
+        return CartDiff(tuple(added), tuple(removed), tuple(changed), self._total_paise)
+
+    def to_order_items(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "item_id": line.item["id"],
+                "name": line.item["name"],
+                "brand": line.item.get("brand"),
+                "quantity": line.quantity,
+                "unit_price": line.item["price"],
+                "subtotal": line.subtotal_paise / 100,
+            }
+            for line in self._lines.values()
+        ]
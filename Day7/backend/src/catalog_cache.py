@@ -0,0 +1,151 @@
+"""
+Process-level cache for the FreshCart catalog.
+
+The parsed catalog is kept in memory and revalidated against the file's
+mtime, inode and size on every access (a single os.stat). When the file
+changes it is re-parsed and the new version is swapped in with a single
+reference assignment, so readers always see either the old or the new
+catalog, never a half-loaded one. A file that fails to parse is not read
+again until it changes; the last good catalog is served meanwhile.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger("food_ordering")
+
+
+def empty_catalog() -> Dict[str, Any]:
+    return {"categories": {}, "recipes": {}}
+
+
+@dataclass(frozen=True)
+class CatalogVersion:
+    """One parsed version of the catalog file."""
+
+    catalog: Dict[str, Any]
+    signature: Tuple[int, int, int]
+    loaded_at: float
+    # Structures derived from this version (indexes), built on first use
+    artifacts: Dict[str, Any] = field(default_factory=dict, compare=False)
+
+
+class CatalogCache:
+    """mtime/inode validated in-memory copy of a catalog JSON file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._current: Optional[CatalogVersion] = None
+        # Signature of a file version that failed to parse, so it is not re-read on every access
+        self._failed: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.last_reload_ms = 0.0
+        self.total_reload_ms = 0.0
+
+    @staticmethod
+    def _signature(stat: os.stat_result) -> Tuple[int, int, int]:
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def get(self) -> Dict[str, Any]:
+        """Return the current catalog, reloading it if the file has changed."""
+        return self.get_version().catalog
+
+    def get_version(self) -> CatalogVersion:
+        """Return the current catalog version, reloading it if the file has changed."""
+        try:
+            signature = self._signature(os.stat(self.path))
+        except FileNotFoundError:
+            logger.error(f"Catalog file not found: {self.path}")
+            return self._last_good()
+
+        current = self._current
+        if current is not None and current.signature == signature:
+            self.hits += 1
+            return current
+        if signature == self._failed:
+            return self._last_good()
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            current = self._current
+            if current is not None and current.signature == signature:
+                self.hits += 1
+                return current
+            if signature == self._failed:
+                return self._last_good()
+            self.misses += 1
+            return self._reload(signature)
+
+    def _last_good(self) -> CatalogVersion:
+        return self._current or CatalogVersion(empty_catalog(), (0, 0, 0), 0.0)
+
+    def derived(self, name: str, build: Callable[[Dict[str, Any]], T]) -> T:
+        """Return a structure built from the current catalog version.
+
+        The builder runs once per version; a reload starts with no artifacts,
+        so derived structures can never go stale.
+        """
+        version = self.get_version()
+        artifact = version.artifacts.get(name)
+        if artifact is None:
+            with self._lock:
+                artifact = version.artifacts.get(name)
+                if artifact is None:
+                    artifact = build(version.catalog)
+                    version.artifacts[name] = artifact
+        return artifact
+
+    def _reload(self, signature: Tuple[int, int, int]) -> CatalogVersion:
+        started = time.perf_counter()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                catalog = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.error(f"Error loading catalog {self.path}: {e}")
+            if isinstance(e, json.JSONDecodeError):
+                self._failed = signature
+            # Keep serving the last good catalog rather than an empty one
+            return self._last_good()
+
+        version = CatalogVersion(
+            catalog=catalog, signature=signature, loaded_at=time.time()
+        )
+        self._current = version
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.reloads += 1
+        self.last_reload_ms = elapsed_ms
+        self.total_reload_ms += elapsed_ms
+        logger.info(f"Catalog loaded from {self.path} in {elapsed_ms:.1f}ms")
+        return version
+
+    def invalidate(self):
+        """Drop the cached catalog so the next access re-reads the file."""
+        with self._lock:
+            self._current = None
+            self._failed = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit rate and reload timings."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "reloads": self.reloads,
+            "last_reload_ms": round(self.last_reload_ms, 3),
+            "avg_reload_ms": round(self.total_reload_ms / self.reloads, 3)
+            if self.reloads
+            else 0.0,
+        }
@@ -0,0 +1,115 @@
+"""
+Precomputed lookup tables for the FreshCart catalog.
+
+A CatalogIndex is built once per catalog version and never mutated, so it can
+be shared freely between sessions in the same worker process.
+"""
+
+import re
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lower-case and collapse whitespace."""
+    return " ".join(text.lower().split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-case alphanumeric tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _freeze(table: Dict[str, List[int]]) -> Mapping[str, Tuple[int, ...]]:
+    return MappingProxyType({key: tuple(positions) for key, positions in table.items()})
+
+
+class CatalogIndex:
+    """Immutable id, name, tag and category indexes over one catalog version.
+
+    Items are addressed by their position in catalog order, so every posting
+    list is already sorted and results keep the order the catalog defines.
+    """
+
+    def __init__(self, catalog: Dict[str, Any]):
+        items: List[Dict[str, Any]] = []
+        by_id: Dict[str, int] = {}
+        by_name: Dict[str, int] = {}
+        by_token: Dict[str, List[int]] = {}
+        by_tag: Dict[str, List[int]] = {}
+        by_category: Dict[str, List[int]] = {}
+        names: List[str] = []
+
+        for category_name, category_items in catalog.get("categories", {}).items():
+            for item in category_items:
+                position = len(items)
+                items.append(item)
+
+                name = normalize(item.get("name", ""))
+                names.append(name)
+                by_id.setdefault(item.get("id"), position)
+                by_name.setdefault(name, position)
+                for token in dict.fromkeys(tokenize(name)):
+                    by_token.setdefault(token, []).append(position)
+                for tag in dict.fromkeys(
+                    normalize(tag) for tag in item.get("tags", [])
+                ):
+                    by_tag.setdefault(tag, []).append(position)
+                category = normalize(item.get("category") or category_name)
+                by_category.setdefault(category, []).append(position)
+
+        self.items: Tuple[Dict[str, Any], ...] = tuple(items)
+        self.names: Tuple[str, ...] = tuple(names)
+        self.by_id: Mapping[str, int] = MappingProxyType(by_id)
+        self.by_name: Mapping[str, int] = MappingProxyType(by_name)
+        self.by_token = _freeze(by_token)
+        self.by_tag = _freeze(by_tag)
+        self.by_category = _freeze(by_category)
+        self.recipes: Mapping[str, Dict[str, Any]] = MappingProxyType(
+            {
+                normalize(key): recipe
+                for key, recipe in catalog.get("recipes", {}).items()
+            }
+        )
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def get_by_id(self, item_id: str) -> Optional[Dict[str, Any]]:
+        position = self.by_id.get(item_id)
+        return self.items[position] if position is not None else None
+
+    def get_by_exact_name(self, name: str) -> Optional[Dict[str, Any]]:
+        position = self.by_name.get(normalize(name))
+        return self.items[position] if position is not None else None
+
+    def _token_candidates(self, query: str) -> Optional[Iterable[int]]:
+        """Positions whose name contains every query token, or None if a token is unknown."""
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        postings = [self.by_token.get(token) for token in tokens]
+        if any(p is None for p in postings):
+            return None
+        postings.sort(key=len)
+        if len(postings) == 1:
+            return postings[0]
+        rest = [set(p) for p in postings[1:]]
+        return [pos for pos in postings[0] if all(pos in s for s in rest)]
+
+    def find_name_containing(self, query: str) -> Optional[Dict[str, Any]]:
+        """First item (in catalog order) whose name contains the query."""
+        query = normalize(query)
+        candidates = self._token_candidates(query)
+        if candidates is not None:
+            for position in candidates:
+                if query in self.names[position]:
+                    return self.items[position]
+            return None
+        # Partial words ("choc") are not in the token index
+        for position, name in enumerate(self.names):
+            if query in name:
+                return self.items[position]
+        return None
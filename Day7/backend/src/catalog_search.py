@@ -0,0 +1,324 @@
+"""
+Ranked item search for the FreshCart catalog.
+
+Name, brand, tag and category text is tokenized into an inverted index with
+a per-field weight, and the vocabulary is stored in a prefix trie so partial
+words ("choc", "veg") expand to full tokens. Results are scored and only the
+top-k are returned, so one tool call usually surfaces the right item first.
+
+Top-k searches read each query word's postings best first (highest weight,
+then shortest name) and stop as soon as no unread item can still make the
+top k, Fagin's threshold algorithm. A common word like "milk" costs about as
+much as a rare one, and the results are the same as scoring every match.
+"""
+
+import heapq
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from catalog_index import normalize, tokenize
+
+# How much a match in each field counts towards an item's score
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "brand": 2.0,
+    "tags": 1.5,
+    "category": 1.0,
+}
+
+# Prefix matches count for less than whole-word matches
+PREFIX_FACTOR = 0.6
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 64
+
+# Extra score when the whole query is exactly the item name
+EXACT_NAME_BONUS = 5.0
+
+_TERMINAL = ""
+
+
+class PrefixTrie:
+    """Character trie over the search vocabulary."""
+
+    def __init__(self):
+        self.root: Dict[str, Any] = {}
+
+    def insert(self, token: str):
+        node = self.root
+        for char in token:
+            node = node.setdefault(char, {})
+        node[_TERMINAL] = token
+
+    def expand(self, prefix: str, limit: int = MAX_PREFIX_EXPANSIONS) -> List[str]:
+        """Tokens starting with prefix, shortest first then alphabetical, at most limit of them."""
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+
+        tokens = []
+        queue = deque([node])
+        while queue and len(tokens) < limit:
+            node = queue.popleft()
+            # Sorted children make the cut-off independent of catalog order
+            for char in sorted(node):
+                if char == _TERMINAL:
+                    tokens.append(node[char])
+                else:
+                    queue.append(node[char])
+        return tokens[:limit]
+
+
+class CatalogSearch:
+    """Field-weighted token search over one catalog version."""
+
+    def __init__(self, catalog: Dict[str, Any]):
+        self.items: List[Dict[str, Any]] = []
+        self.names: List[str] = []
+        self.name_lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.trie = PrefixTrie()
+        by_name: Dict[str, List[int]] = {}
+        category_names: List[str] = []
+
+        for category_name, category_items in catalog.get("categories", {}).items():
+            for item in category_items:
+                name = normalize(item.get("name", ""))
+                by_name.setdefault(name, []).append(len(self.items))
+                self.items.append(item)
+                self.names.append(name)
+                self.name_lengths.append(len(name))
+                category_names.append(category_name)
+
+        # Filling postings shortest name first leaves each weight's positions in impact order
+        for position in sorted(
+            range(len(self.items)), key=self.name_lengths.__getitem__
+        ):
+            item = self.items[position]
+            fields = {
+                "name": self.names[position],
+                "brand": item.get("brand") or "",
+                "tags": " ".join(item.get("tags", [])),
+                "category": item.get("category") or category_names[position],
+            }
+            for field_name, text in fields.items():
+                weight = FIELD_WEIGHTS[field_name]
+                for token in tokenize(text):
+                    postings = self.postings.get(token)
+                    if postings is None:
+                        postings = self.postings[token] = {}
+                        self.trie.insert(token)
+                    if postings.get(position, 0.0) < weight:
+                        postings[position] = weight
+
+        # Impact-ordered postings are split out the first time a token is searched
+        self._impact: Dict[str, List[Tuple[float, int]]] = {}
+        self.impact_order: Callable[[str], Iterable[Tuple[float, int]]] = (
+            self._sorted_postings
+        )
+        self.positions_named: Callable[[str], Iterable[int]] = lambda name: by_name.get(
+            name, ()
+        )
+
+    @classmethod
+    def from_tables(
+        cls,
+        items: Sequence[Dict[str, Any]],
+        names: Sequence[str],
+        name_lengths: Sequence[int],
+        postings: Mapping[str, Dict[int, float]],
+        trie: Any,
+        impact_order: Callable[[str], Iterable[Tuple[float, int]]],
+        positions_named: Callable[[str], Iterable[int]],
+    ) -> "CatalogSearch":
+        """Search over prebuilt tables (e.g. a mapped catalog snapshot) instead of a catalog dict.
+
+        trie only needs an expand(prefix) method with PrefixTrie's semantics.
+        impact_order(token) yields the (weight, position) postings of token by
+        weight descending, then name length, then position; positions_named(name)
+        the positions whose normalized name is name.
+        """
+        search = cls.__new__(cls)
+        search.items, search.names, search.name_lengths = items, names, name_lengths
+        search.postings, search.trie = postings, trie
+        search.impact_order, search.positions_named = impact_order, positions_named
+        return search
+
+    def _sorted_postings(self, token: str) -> List[Tuple[float, int]]:
+        ordered = self._impact.get(token)
+        if ordered is None:
+            postings = self.postings[token]
+            ordered = [
+                (weight, position)
+                for weight in sorted(set(postings.values()), reverse=True)
+                for position, item_weight in postings.items()
+                if item_weight == weight
+            ]
+            self._impact[token] = ordered
+        return ordered
+
+    def _term_tokens(self, term: str) -> List[Tuple[str, float]]:
+        """(token, score factor) for every token a query term matches: itself, then its prefix expansions."""
+        tokens = [(term, 1.0)] if term in self.postings else []
+        if len(term) >= MIN_PREFIX_LENGTH:
+            tokens.extend(
+                (token, PREFIX_FACTOR * len(term) / len(token))
+                for token in self.trie.expand(term)
+                if token != term
+            )
+        return tokens
+
+    def _term_scores(self, term: str) -> Dict[int, float]:
+        """Best score per item for a single query term (exact or prefix)."""
+        scores: Dict[int, float] = {}
+        for token, factor in self._term_tokens(term):
+            for position, weight in self.postings[token].items():
+                score = weight * factor
+                if score > scores.get(position, 0.0):
+                    scores[position] = score
+        return scores
+
+    def search(
+        self, query: str, limit: Optional[int] = 5
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """Top-k (score, item) pairs for the query, best first; limit=None returns every match."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or (limit is not None and limit <= 0):
+            return []
+        query_name = normalize(query)
+        ranked = (
+            self._score_all(terms, query_name)
+            if limit is None
+            else self._top_k(terms, query_name, limit)
+        )
+        return [(round(score, 3), self.items[position]) for position, score in ranked]
+
+    def _score_all(self, terms: List[str], query_name: str) -> List[Tuple[int, float]]:
+        totals: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        for term in terms:
+            for position, score in self._term_scores(term).items():
+                totals[position] = totals.get(position, 0.0) + score
+                matched[position] = matched.get(position, 0) + 1
+
+        # Items covering every query word beat items that only match one of them
+        for position in totals:
+            coverage = matched[position] / len(terms)
+            totals[position] *= coverage * coverage
+            if self.names[position] == query_name:
+                totals[position] += EXACT_NAME_BONUS
+
+        # Ties go to the shorter name, then to catalog order
+        return sorted(
+            totals.items(),
+            key=lambda entry: (entry[1], -self.name_lengths[entry[0]], -entry[0]),
+            reverse=True,
+        )
+
+    def _stream(self, token: str, factor: float) -> Iterator[Tuple[float, int, int]]:
+        lengths = self.name_lengths
+        for weight, position in self.impact_order(token):
+            yield -weight * factor, lengths[position], position
+
+    def _top_k(
+        self, terms: List[str], query_name: str, limit: int
+    ) -> List[Tuple[int, float]]:
+        term_tokens = [self._term_tokens(term) for term in terms]
+        # One stream per term, best (score, name length, position) first
+        streams = [
+            heapq.merge(*(self._stream(token, factor) for token, factor in tokens))
+            if len(tokens) > 1
+            else self._stream(*tokens[0])
+            if tokens
+            else iter(())
+            for tokens in term_tokens
+        ]
+        named = set(self.positions_named(query_name))
+        count = len(terms)
+        # Random access to an item's score for each term; one-word queries only need it for exact names
+        lookups = []
+        if count > 1 or named:
+            lookups = [
+                [(self.postings[token].get, factor) for token, factor in tokens]
+                for tokens in term_tokens
+            ]
+        top: List[
+            Tuple[float, int, int]
+        ] = []  # min-heap of (score, -name length, -position)
+        seen: Set[int] = set()
+
+        def consider(position: int, first_term: int, first_score: float):
+            # Same arithmetic as _score_all, so both return identical scores
+            total, matched = 0.0, 0
+            for term in range(count):
+                if term == first_term:
+                    score = first_score
+                else:
+                    score = 0.0
+                    for get, factor in lookups[term]:
+                        weight = get(position)
+                        if weight is not None and weight * factor > score:
+                            score = weight * factor
+                if score:
+                    total += score
+                    matched += 1
+            if not matched:
+                return
+            if matched < count:
+                coverage = matched / count
+                total *= coverage * coverage
+            if position in named:
+                total += EXACT_NAME_BONUS
+            entry = (total, -self.name_lengths[position], -position)
+            if len(top) < limit:
+                heapq.heappush(top, entry)
+            elif entry > top[0]:
+                heapq.heapreplace(top, entry)
+
+        # The exact-name bonus is not part of the stream bounds, so score those items up front
+        for position in named:
+            seen.add(position)
+            consider(position, -1, 0.0)
+
+        bounds = [0.0] * count
+        cursors: List[Tuple[int, int]] = [(0, 0)] * count
+        live = list(range(count))
+        while live:
+            for term in live:
+                entry = next(streams[term], None)
+                if entry is None:
+                    bounds[term] = 0.0
+                    continue
+                negated, length, position = entry
+                bounds[term], cursors[term] = -negated, (length, position)
+                if position not in seen:
+                    seen.add(position)
+                    # The first time a stream yields an item is its best score for that term
+                    consider(position, term, -negated)
+            live = [term for term in live if bounds[term]]
+            if live and len(top) == limit:
+                # An unread item scores at most the sum of the stream bounds, cannot
+                # match a term whose stream has run out, and on a tie sorts after
+                # every stream's current position
+                bound = sum(bounds)
+                if len(live) < count:
+                    coverage = len(live) / count
+                    bound *= coverage * coverage
+                length, position = max(cursors[term] for term in live)
+                if top[0] >= (bound, -length, -position):
+                    break
+
+        return [(-position, score) for score, _, position in sorted(top, reverse=True)]
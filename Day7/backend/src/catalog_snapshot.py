@@ -0,0 +1,684 @@
+"""
+Compact binary snapshot of the FreshCart catalog and its indexes.
+
+`python src/catalog_snapshot.py build` compiles data/catalog.json into
+data/catalog.snap: every item as a separately decodable JSON record, plus
+the id, name, token and search posting tables as flat sorted arrays (search
+postings in impact order: highest weight, then shortest name, first). Workers
+mmap the file read-only, so its pages live in the OS page cache and are
+shared by every worker process. Opening a snapshot only reads the header;
+items are decoded on first access and lookups binary-search the mapped
+tables, so startup no longer depends on catalog size.
+
+Two structures are not shared. The categories and recipes (a small JSON
+section) are parsed when a snapshot is opened, and the spelling-correction
+BK-tree is built in each worker, from the mapped vocabulary section, the first
+time fuzzy matching is used. Its cost grows with the number of distinct words,
+not with the item count.
+
+The snapshot records the mtime and size of the catalog.json it was built
+from. If it is missing, stale or unreadable, callers fall back to parsing
+catalog.json (see database.py).
+
+Usage:
+    python src/catalog_snapshot.py build
+    python src/catalog_snapshot.py info
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from catalog_index import normalize, tokenize
+from catalog_search import FIELD_WEIGHTS, MAX_PREFIX_EXPANSIONS, CatalogSearch
+from fuzzy_match import FuzzyMatcher, vocabulary_frequency
+
+logger = logging.getLogger("food_ordering")
+
+MAGIC = b"FCSNAP01"
+FORMAT_VERSION = 3
+
+# magic, format version, source mtime_ns, source size, section count
+_HEADER = struct.Struct("<8sIqqI")
+# section name, offset, length
+_SECTION = struct.Struct("<16sQQ")
+_ALIGN = 8
+
+# Decoded items kept per snapshot
+ITEM_CACHE_SIZE = 4096
+# Decoded search posting lists kept per snapshot, for random access while ranking
+POSTING_CACHE_SIZE = 256
+
+
+class SnapshotError(Exception):
+    """The snapshot file is missing, truncated or from another format version."""
+
+
+# ----------------------------------------------------------------------
+# Building
+# ----------------------------------------------------------------------
+
+
+def _offsets_blob(values: Iterable[bytes]) -> Tuple[bytes, bytes]:
+    """Concatenate byte strings; returns (uint64 offsets with a trailing end offset, blob)."""
+    offsets = [0]
+    chunks = []
+    for value in values:
+        chunks.append(value)
+        offsets.append(offsets[-1] + len(value))
+    return struct.pack(f"<{len(offsets)}Q", *offsets), b"".join(chunks)
+
+
+def _uint32s(values: Sequence[int]) -> bytes:
+    return struct.pack(f"<{len(values)}I", *values)
+
+
+def _sorted_positions(keys: List[bytes]) -> List[int]:
+    """Positions sorted by key, then by position."""
+    return sorted(range(len(keys)), key=lambda position: (keys[position], position))
+
+
+def _first_positions(keys: List[bytes]) -> List[int]:
+    """Positions sorted by key, keeping only the first position for duplicate keys."""
+    order = _sorted_positions(keys)
+    unique = []
+    for position in order:
+        if not unique or keys[unique[-1]] != keys[position]:
+            unique.append(position)
+    return unique
+
+
+def _posting_sections(prefix: str, postings: Dict[str, List[int]]) -> Dict[str, bytes]:
+    tokens = sorted(postings, key=lambda token: token.encode("utf-8"))
+    key_offsets, keys = _offsets_blob(token.encode("utf-8") for token in tokens)
+    posting_offsets, posting_blob = _offsets_blob(
+        _uint32s(postings[token]) for token in tokens
+    )
+    return {
+        f"{prefix}_key_off": key_offsets,
+        f"{prefix}_keys": keys,
+        f"{prefix}_post_off": posting_offsets,
+        f"{prefix}_post": posting_blob,
+    }
+
+
+def build_sections(catalog: Dict[str, Any]) -> Dict[str, bytes]:
+    """Encode a catalog dict into named snapshot sections."""
+    items: List[Dict[str, Any]] = []
+    item_categories: List[int] = []
+    category_names = list(catalog.get("categories", {}))
+    for category_index, category_name in enumerate(category_names):
+        for item in catalog["categories"][category_name]:
+            items.append(item)
+            item_categories.append(category_index)
+
+    names = [normalize(item.get("name", "")).encode("utf-8") for item in items]
+    ids = [str(item.get("id")).encode("utf-8") for item in items]
+
+    # Same tables CatalogIndex and CatalogSearch build in memory
+    name_tokens: Dict[str, List[int]] = {}
+    search_tokens: Dict[str, List[int]] = {}
+    search_weights: Dict[str, Dict[int, float]] = {}
+    for position, item in enumerate(items):
+        name = names[position].decode("utf-8")
+        for token in dict.fromkeys(tokenize(name)):
+            name_tokens.setdefault(token, []).append(position)
+        fields = {
+            "name": name,
+            "brand": item.get("brand") or "",
+            "tags": " ".join(item.get("tags", [])),
+            "category": item.get("category")
+            or category_names[item_categories[position]],
+        }
+        for field_name, text in fields.items():
+            weight = FIELD_WEIGHTS[field_name]
+            for token in tokenize(text):
+                weights = search_weights.setdefault(token, {})
+                if token not in search_tokens:
+                    search_tokens[token] = []
+                if position not in weights:
+                    search_tokens[token].append(position)
+                if weights.get(position, 0.0) < weight:
+                    weights[position] = weight
+    # Impact order, as CatalogSearch.impact_order expects
+    for token, positions in search_tokens.items():
+        weights = search_weights[token]
+        positions.sort(
+            key=lambda position: (-weights[position], len(names[position]), position)
+        )
+
+    item_offsets, item_blob = _offsets_blob(
+        json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        for item in items
+    )
+    name_offsets, name_blob = _offsets_blob(names)
+    id_offsets, id_blob = _offsets_blob(ids)
+
+    sections = {
+        "item_off": item_offsets,
+        "items": item_blob,
+        "item_cat": _uint32s(item_categories),
+        "name_off": name_offsets,
+        "names": name_blob,
+        "id_off": id_offsets,
+        "ids": id_blob,
+        "by_id": _uint32s(_first_positions(ids)),
+        # Every position, so duplicate names can all get the exact-name search bonus
+        "by_name": _uint32s(_sorted_positions(names)),
+    }
+    sections.update(_posting_sections("ntok", name_tokens))
+    sections.update(_posting_sections("stok", search_tokens))
+    sections["stok_weight"] = b"".join(
+        struct.pack(
+            f"<{len(positions)}f", *(search_weights[token][p] for p in positions)
+        )
+        for token, positions in sorted(
+            search_tokens.items(), key=lambda entry: entry[0].encode("utf-8")
+        )
+    )
+    sections["meta"] = json.dumps(
+        {
+            "categories": category_names,
+            "recipes": catalog.get("recipes", {}),
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    # Only parsed when fuzzy matching is first used
+    sections["vocab"] = json.dumps(
+        vocabulary_frequency(catalog), ensure_ascii=False
+    ).encode("utf-8")
+    return sections
+
+
+def write_snapshot(
+    catalog: Dict[str, Any], path: Path, source_mtime_ns: int = 0, source_size: int = 0
+) -> int:
+    """Write a snapshot atomically; returns its size in bytes."""
+    sections = build_sections(catalog)
+    table_size = _HEADER.size + _SECTION.size * len(sections)
+    offset = -(-table_size // _ALIGN) * _ALIGN
+
+    entries = []
+    for name, data in sections.items():
+        entries.append((name, offset, len(data)))
+        offset += -(-len(data) // _ALIGN) * _ALIGN
+
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(
+            _HEADER.pack(
+                MAGIC, FORMAT_VERSION, source_mtime_ns, source_size, len(sections)
+            )
+        )
+        for name, section_offset, length in entries:
+            f.write(_SECTION.pack(name.encode("ascii"), section_offset, length))
+        for (_, section_offset, _), data in zip(entries, sections.values()):
+            f.write(b"\0" * (section_offset - f.tell()))
+            f.write(data)
+        size = f.tell()
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return size
+
+
+def build_snapshot(catalog_path: Path, snapshot_path: Path) -> int:
+    """Compile catalog.json into a snapshot; returns the number of items."""
+    stat = os.stat(catalog_path)
+    with open(catalog_path, "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    write_snapshot(catalog, snapshot_path, stat.st_mtime_ns, stat.st_size)
+    return sum(len(items) for items in catalog.get("categories", {}).values())
+
+
+# ----------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------
+
+
+class _StringTable(Sequence[str]):
+    """Strings stored as uint64 offsets into a UTF-8 blob."""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, index: int) -> bytes:
+        return bytes(self._blob[self._offsets[index] : self._offsets[index + 1]])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.raw(index).decode("utf-8")
+
+    def find(self, key: bytes) -> int:
+        """Index of key in a sorted table, or -1."""
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if self.raw(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low if low < len(self) and self.raw(low) == key else -1
+
+    def prefix_range(self, prefix: bytes) -> range:
+        """Indexes of every key starting with prefix, in a sorted table."""
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if self.raw(mid) < prefix:
+                low = mid + 1
+            else:
+                high = mid
+        end = low
+        while end < len(self) and self.raw(end).startswith(prefix):
+            end += 1
+        return range(low, end)
+
+
+class _Lengths(Sequence[int]):
+    """Byte length of each string in a table, without decoding it."""
+
+    def __init__(self, table: _StringTable):
+        self._offsets = table._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        return self._offsets[index + 1] - self._offsets[index]
+
+
+class _Items(Sequence[Dict[str, Any]]):
+    """Catalog items decoded lazily from the snapshot."""
+
+    def __init__(self, table: _StringTable):
+        self._table = table
+        self._decode = lru_cache(maxsize=ITEM_CACHE_SIZE)(
+            lambda index: json.loads(table.raw(index))
+        )
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._decode(index)
+
+
+class _Postings(Mapping[str, Dict[int, float]]):
+    """token -> {position: weight}, decoded from the search posting tables on demand."""
+
+    def __init__(
+        self,
+        keys: _StringTable,
+        offsets: memoryview,
+        positions: memoryview,
+        weights: memoryview,
+    ):
+        self.keys = keys
+        self._offsets = offsets
+        self._positions = positions
+        self._weights = weights
+        self._at = lru_cache(maxsize=POSTING_CACHE_SIZE)(self._decode)
+
+    def _decode(self, index: int) -> Dict[int, float]:
+        start, end = self._offsets[index] // 4, self._offsets[index + 1] // 4
+        return dict(
+            zip(self._positions[start:end].tolist(), self._weights[start:end].tolist())
+        )
+
+    def impact_order(self, token: str) -> Iterable[Tuple[float, int]]:
+        """(weight, position) pairs of token as stored, read lazily from the mapped tables."""
+        index = self.keys.find(token.encode("utf-8"))
+        if index < 0:
+            return ()
+        start, end = self._offsets[index] // 4, self._offsets[index + 1] // 4
+        return zip(self._weights[start:end], self._positions[start:end])
+
+    def get(self, token, default=None):
+        index = self.keys.find(token.encode("utf-8"))
+        return self._at(index) if index >= 0 else default
+
+    def __getitem__(self, token: str) -> Dict[int, float]:
+        postings = self.get(token)
+        if postings is None:
+            raise KeyError(token)
+        return postings
+
+    def __contains__(self, token) -> bool:
+        return self.keys.find(token.encode("utf-8")) >= 0
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class _SortedVocabulary:
+    """Prefix expansion over the sorted token table, standing in for PrefixTrie."""
+
+    def __init__(self, keys: _StringTable):
+        self._keys = keys
+
+    def expand(self, prefix: str, limit: int = MAX_PREFIX_EXPANSIONS) -> List[str]:
+        # Shortest first, then by key order: the same order as PrefixTrie.expand.
+        # Lengths come from the offset table, so only the kept tokens are decoded.
+        offsets = self._keys._offsets
+        shortest = heapq.nsmallest(
+            limit,
+            self._keys.prefix_range(prefix.encode("utf-8")),
+            key=lambda i: (offsets[i + 1] - offsets[i], i),
+        )
+        return [self._keys[i] for i in shortest]
+
+
+class CatalogSnapshot:
+    """Read-only, mmap-backed catalog with the same lookups as CatalogIndex."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # empty file
+                raise SnapshotError(f"{path}: {e}") from e
+        try:
+            self._sections = self._read_header()
+        except SnapshotError:
+            self._mmap.close()
+            raise
+
+        self.items: Sequence[Dict[str, Any]] = _Items(
+            self._strings("item_off", "items")
+        )
+        self.names: Sequence[str] = self._strings("name_off", "names")
+        self._ids = self._strings("id_off", "ids")
+        self._by_id = self._array("by_id", "I")
+        self._by_name = self._array("by_name", "I")
+        self._name_tokens = self._strings("ntok_key_off", "ntok_keys")
+        self._name_token_offsets = self._array("ntok_post_off", "Q")
+        self._name_token_postings = self._array("ntok_post", "I")
+
+        meta = json.loads(bytes(self._section("meta")))
+        self.categories: Tuple[str, ...] = tuple(meta["categories"])
+        self.recipes: Mapping[str, Dict[str, Any]] = MappingProxyType(
+            {normalize(key): recipe for key, recipe in meta["recipes"].items()}
+        )
+        self._raw_recipes: Dict[str, Any] = meta["recipes"]
+        self._lock = threading.Lock()
+        self._search: Optional[CatalogSearch] = None
+        self._fuzzy: Optional[FuzzyMatcher] = None
+
+    def _read_header(self) -> Dict[str, Tuple[int, int]]:
+        if len(self._mmap) < _HEADER.size:
+            raise SnapshotError(f"{self.path}: truncated header")
+        magic, version, mtime_ns, size, count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise SnapshotError(
+                f"{self.path}: not a version {FORMAT_VERSION} catalog snapshot"
+            )
+        self.source_signature = (mtime_ns, size)
+        sections = {}
+        for i in range(count):
+            name, offset, length = _SECTION.unpack_from(
+                self._mmap, _HEADER.size + i * _SECTION.size
+            )
+            name = name.rstrip(b"\0").decode("ascii")
+            if offset + length > len(self._mmap):
+                raise SnapshotError(f"{self.path}: truncated section {name}")
+            sections[name] = (offset, length)
+        return sections
+
+    def _section(self, name: str) -> memoryview:
+        offset, length = self._sections[name]
+        return memoryview(self._mmap)[offset : offset + length]
+
+    def _array(self, name: str, fmt: str) -> memoryview:
+        return self._section(name).cast(fmt)
+
+    def _strings(self, offsets: str, blob: str) -> _StringTable:
+        return _StringTable(self._array(offsets, "Q"), self._section(blob))
+
+    def matches(self, catalog_path: Path) -> bool:
+        """True if the snapshot was built from catalog_path as it is now."""
+        try:
+            stat = os.stat(catalog_path)
+        except FileNotFoundError:
+            # Deployments may ship only the snapshot
+            return True
+        return self.source_signature == (stat.st_mtime_ns, stat.st_size)
+
+    # Same lookups as CatalogIndex
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @staticmethod
+    def _lower_bound(positions: memoryview, table: _StringTable, key: bytes) -> int:
+        low, high = 0, len(positions)
+        while low < high:
+            mid = (low + high) // 2
+            if table.raw(positions[mid]) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def _sorted_lookup(
+        self, positions: memoryview, table: _StringTable, key: bytes
+    ) -> Optional[int]:
+        low = self._lower_bound(positions, table, key)
+        if low < len(positions) and table.raw(positions[low]) == key:
+            return positions[low]
+        return None
+
+    def _positions_named(self, name: str) -> List[int]:
+        """Every position whose normalized name is name, in catalog order."""
+        key = name.encode("utf-8")
+        found = []
+        index = self._lower_bound(self._by_name, self.names, key)
+        while (
+            index < len(self._by_name) and self.names.raw(self._by_name[index]) == key
+        ):
+            found.append(self._by_name[index])
+            index += 1
+        return found
+
+    def get_by_id(self, item_id: str) -> Optional[Dict[str, Any]]:
+        position = self._sorted_lookup(
+            self._by_id, self._ids, str(item_id).encode("utf-8")
+        )
+        return self.items[position] if position is not None else None
+
+    def get_by_exact_name(self, name: str) -> Optional[Dict[str, Any]]:
+        position = self._sorted_lookup(
+            self._by_name, self.names, normalize(name).encode("utf-8")
+        )
+        return self.items[position] if position is not None else None
+
+    def _token_postings(self, token: str) -> Optional[List[int]]:
+        index = self._name_tokens.find(token.encode("utf-8"))
+        if index < 0:
+            return None
+        start, end = (
+            self._name_token_offsets[index] // 4,
+            self._name_token_offsets[index + 1] // 4,
+        )
+        return self._name_token_postings[start:end].tolist()
+
+    def find_name_containing(self, query: str) -> Optional[Dict[str, Any]]:
+        """First item (in catalog order) whose name contains the query."""
+        query = normalize(query)
+        tokens = tokenize(query)
+        postings = [self._token_postings(token) for token in tokens]
+        if tokens and all(p is not None for p in postings):
+            postings.sort(key=len)
+            rest = [set(p) for p in postings[1:]]
+            for position in postings[0]:
+                if all(position in s for s in rest) and query in self.names[position]:
+                    return self.items[position]
+            return None
+        # Partial words ("choc") are not in the token table
+        needle = query.encode("utf-8")
+        for position in range(len(self.names)):
+            if needle in self.names.raw(position):
+                return self.items[position]
+        return None
+
+    # Search and fuzzy matching over the mapped tables
+
+    @property
+    def search(self) -> CatalogSearch:
+        if self._search is None:
+            with self._lock:
+                if self._search is None:
+                    keys = self._strings("stok_key_off", "stok_keys")
+                    postings = _Postings(
+                        keys,
+                        self._array("stok_post_off", "Q"),
+                        self._array("stok_post", "I"),
+                        self._array("stok_weight", "f"),
+                    )
+                    self._search = CatalogSearch.from_tables(
+                        self.items,
+                        self.names,
+                        _Lengths(self.names),
+                        postings,
+                        _SortedVocabulary(keys),
+                        postings.impact_order,
+                        self._positions_named,
+                    )
+        return self._search
+
+    @property
+    def fuzzy(self) -> FuzzyMatcher:
+        if self._fuzzy is None:
+            with self._lock:
+                if self._fuzzy is None:
+                    vocabulary = json.loads(bytes(self._section("vocab")))
+                    self._fuzzy = FuzzyMatcher.from_frequency(vocabulary)
+        return self._fuzzy
+
+    def to_catalog(self) -> Dict[str, Any]:
+        """Decode everything back into the catalog.json structure."""
+        categories: Dict[str, List[Dict[str, Any]]] = {
+            name: [] for name in self.categories
+        }
+        item_categories = self._array("item_cat", "I")
+        for position in range(len(self.items)):
+            categories[self.categories[item_categories[position]]].append(
+                self.items[position]
+            )
+        return {"categories": categories, "recipes": dict(self._raw_recipes)}
+
+
+class SnapshotLoader:
+    """Opens the snapshot once per file version and hands out the shared mapping.
+
+    get() returns None when there is no usable snapshot for the current
+    catalog.json, so the caller can fall back to parsing the JSON.
+    """
+
+    def __init__(self, path: Path, catalog_path: Path):
+        self.path = path
+        self.catalog_path = catalog_path
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[Any, ...]] = None
+        self._snapshot: Optional[CatalogSnapshot] = None
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def get(self) -> Optional[CatalogSnapshot]:
+        signature = (self._stat(self.path), self._stat(self.catalog_path))
+        if signature == self._signature:
+            return self._snapshot
+        with self._lock:
+            if signature != self._signature:
+                self._snapshot = self._open(signature[0] is not None)
+                self._signature = signature
+            return self._snapshot
+
+    def _open(self, exists: bool) -> Optional[CatalogSnapshot]:
+        if not exists:
+            return None
+        try:
+            snapshot = CatalogSnapshot(self.path)
+        except (OSError, SnapshotError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable catalog snapshot {self.path}: {e}")
+            return None
+        if not snapshot.matches(self.catalog_path):
+            logger.warning(
+                f"Catalog snapshot {self.path} is older than {self.catalog_path}; "
+                f"using JSON until it is rebuilt"
+            )
+            return None
+        logger.info(f"Mapped catalog snapshot {self.path} ({len(snapshot)} items)")
+        return snapshot
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import database
+
+    parser = argparse.ArgumentParser(
+        description="Build or inspect the binary catalog snapshot."
+    )
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--catalog", type=Path, default=database.CATALOG_PATH)
+    parser.add_argument("--output", type=Path, default=database.CATALOG_SNAPSHOT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_snapshot(args.catalog, args.output)
+        print(
+            f"✅ Snapshot of {count} items written to {args.output} ({args.output.stat().st_size} bytes)"
+        )
+        return 0
+
+    try:
+        snapshot = CatalogSnapshot(args.output)
+    except (OSError, SnapshotError) as e:
+        print(f"❌ {e}")
+        return 1
+    state = (
+        "up to date"
+        if snapshot.matches(args.catalog)
+        else f"STALE (rebuild from {args.catalog})"
+    )
+    print(
+        f"{args.output}: {len(snapshot)} items, {len(snapshot.recipes)} recipes, {state}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,143 +1,219 @@
 import json
 import logging
+import os
+import tempfile
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 
+from cart import to_paise
+from catalog_cache import CatalogCache
+from catalog_index import CatalogIndex, normalize
+from catalog_snapshot import CatalogSnapshot, SnapshotLoader
+from catalog_search import CatalogSearch
+import fuzzy_match
+from fuzzy_match import FuzzyMatcher
+from order_ids import new_order_id
+from order_journal import OrderJournal
+
 logger = logging.getLogger("food_ordering")
 
 # File paths
 DATA_DIR = Path(__file__).parent.parent / "data"
 CATALOG_PATH = DATA_DIR / "catalog.json"
-ORDERS_PATH = DATA_DIR / "orders.json"
+CATALOG_SNAPSHOT_PATH = DATA_DIR / "catalog.snap"  # built by catalog_snapshot.py
+ORDERS_PATH = DATA_DIR / "orders.json"  # legacy, migrated into the journal
+ORDERS_JOURNAL_PATH = DATA_DIR / "orders.ndjson"
 CURRENT_ORDER_PATH = DATA_DIR / "current_order.json"
 
+# Shared by every lookup in this worker process
+CATALOG_CACHE = CatalogCache(CATALOG_PATH)
+CATALOG_SNAPSHOT = SnapshotLoader(CATALOG_SNAPSHOT_PATH, CATALOG_PATH)
+ORDER_JOURNAL = OrderJournal(ORDERS_JOURNAL_PATH)
+_legacy_migrated = False
+
 def load_catalog() -> Dict[str, Any]:
-    """Load the catalog from JSON file."""
-    try:
-        with open(CATALOG_PATH, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logger.error(f"Catalog file not found: {CATALOG_PATH}")
-        return {"categories": {}, "recipes": {}}
-    except json.JSONDecodeError as e:
-        logger.error(f"Error decoding catalog JSON: {e}")
-        return {"categories": {}, "recipes": {}}
+    """Load the catalog, served from the in-memory cache while the file is unchanged."""
+    return CATALOG_CACHE.get()
+
+def catalog_cache_stats() -> Dict[str, Any]:
+    """Hit rate and reload timings of the catalog cache."""
+    return CATALOG_CACHE.stats()
+
+def get_catalog_snapshot() -> Optional[CatalogSnapshot]:
+    """The mmap'd binary snapshot, if one was built from the current catalog.json."""
+    return CATALOG_SNAPSHOT.get()
+
+def get_catalog_index() -> Union[CatalogIndex, CatalogSnapshot]:
+    """Lookup indexes for the current catalog version, from the snapshot when available."""
+    snapshot = CATALOG_SNAPSHOT.get()
+    if snapshot is not None:
+        return snapshot
+    return CATALOG_CACHE.derived("index", CatalogIndex)
 
 def get_item_by_id(item_id: str) -> Optional[Dict[str, Any]]:
     """Get an item from the catalog by its ID."""
-    catalog = load_catalog()
-    for category_name, items in catalog.get("categories", {}).items():
-        for item in items:
-            if item.get("id") == item_id:
-                return item
-    return None
+    return get_catalog_index().get_by_id(item_id)
 
 def get_item_by_name(item_name: str) -> Optional[Dict[str, Any]]:
     """Get an item from the catalog by its name (case-insensitive search)."""
-    catalog = load_catalog()
-    item_name_lower = item_name.lower()
-    
-    for category_name, items in catalog.get("categories", {}).items():
-        for item in items:
-            if item.get("name", "").lower() == item_name_lower:
-                return item
-            # Also check if the search term is contained in the name
-            if item_name_lower in item.get("name", "").lower():
-                return item
+    index = get_catalog_index()
+    item = index.get_by_exact_name(item_name)
+    if item:
+        return item
+    # Also check if the search term is contained in the name
+    item = index.find_name_containing(item_name)
+    if item:
+        return item
+    # Finally try correcting misheard words ("peanut budder")
+    corrected = get_fuzzy_matcher().correct(item_name)
+    if corrected != normalize(item_name):
+        return index.get_by_exact_name(corrected) or index.find_name_containing(corrected)
     return None
 
-def search_items(query: str) -> List[Dict[str, Any]]:
-    """Search for items in the catalog by name or tags."""
-    catalog = load_catalog()
-    results = []
-    query_lower = query.lower()
-    
-    for category_name, items in catalog.get("categories", {}).items():
-        for item in items:
-            # Search in name
-            if query_lower in item.get("name", "").lower():
-                results.append(item)
-                continue
-            
-            # Search in tags
-            if any(query_lower in tag.lower() for tag in item.get("tags", [])):
-                results.append(item)
-                continue
-            
-            # Search in category
-            if query_lower in item.get("category", "").lower():
-                results.append(item)
-    
-    return results
+def get_catalog_search() -> CatalogSearch:
+    """Ranked search engine for the current catalog version."""
+    snapshot = CATALOG_SNAPSHOT.get()
+    if snapshot is not None:
+        return snapshot.search
+    return CATALOG_CACHE.derived("search", CatalogSearch)
+
+def search_items_ranked(query: str, limit: Optional[int] = 5) -> List[Tuple[float, Dict[str, Any]]]:
+    """Search by name, brand, tags and category; returns the best (score, item) pairs."""
+    return get_catalog_search().search(query, limit)
+
+def get_fuzzy_matcher() -> FuzzyMatcher:
+    """Phonetic and edit-distance word corrector for the current catalog version."""
+    snapshot = CATALOG_SNAPSHOT.get()
+    if snapshot is not None:
+        return snapshot.fuzzy
+    return CATALOG_CACHE.derived("fuzzy", FuzzyMatcher)
+
+def match_items(query: str, limit: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
+    """Ranked search that also tolerates speech-to-text errors in the query."""
+    return fuzzy_match.match_items(get_catalog_search(), get_fuzzy_matcher(), query, limit)
+
+# A top search score at least this many times the runner-up needs no clarification
+CLEAR_WINNER_RATIO = 2.0
+
+def resolve_items(queries: List[str], limit: int = 3) -> List[Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """Resolve spoken item names or item IDs in one pass over the current catalog version.
+
+    Returns one (item, candidates) pair per query: (item, []) when the query
+    resolves unambiguously, (None, candidates) when it needs clarification,
+    and (None, []) when nothing matches.
+    """
+    index = get_catalog_index()
+    search = get_catalog_search()
+    matcher = get_fuzzy_matcher()
+    resolved = []
+    for query in queries:
+        item = index.get_by_id(query.strip()) or index.get_by_exact_name(query)
+        if item:
+            resolved.append((item, []))
+            continue
+        results = fuzzy_match.match_items(search, matcher, query, limit)
+        if not results:
+            resolved.append((None, []))
+        elif len(results) == 1 or results[0][0] >= CLEAR_WINNER_RATIO * results[1][0]:
+            resolved.append((results[0][1], []))
+        else:
+            resolved.append((None, [item for _, item in results]))
+    return resolved
+
+def search_items(query: str, limit: Optional[int] = 10) -> List[Dict[str, Any]]:
+    """Search for items in the catalog by name or tags, best match first.
+
+    Returns the top limit matches; limit=None returns every match, as this
+    function did before results were ranked.
+    """
+    return [item for _, item in search_items_ranked(query, limit)]
 
 def get_recipe_items(recipe_name: str) -> Optional[Dict[str, Any]]:
     """Get the items for a recipe."""
-    catalog = load_catalog()
-    recipes = catalog.get("recipes", {})
-    
-    recipe_name_lower = recipe_name.lower()
-    if recipe_name_lower in recipes:
-        recipe = recipes[recipe_name_lower]
-        items = []
-        for item_id in recipe.get("items", []):
-            item = get_item_by_id(item_id)
-            if item:
-                items.append(item)
-        
-        return {
-            "recipe_name": recipe.get("name"),
-            "items": items
-        }
-    
-    return None
+    index = get_catalog_index()
+    recipe = index.recipes.get(normalize(recipe_name))
+    if recipe is None:
+        return None
+
+    items = [item for item in map(index.get_by_id, recipe.get("items", [])) if item]
+    return {
+        "recipe_name": recipe.get("name"),
+        "items": items
+    }
+
+def _migrate_legacy_orders():
+    """Move orders from the old orders.json array into the journal, once."""
+    global _legacy_migrated
+    if not _legacy_migrated:
+        ORDER_JOURNAL.migrate_from_json(ORDERS_PATH)
+        _legacy_migrated = True
+
+
+def _write_json_atomic(path: Path, data: Any):
+    """Write JSON via a temp file so readers never see a half-written file."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
 
-def save_order(order: Dict[str, Any], order_id: str = None) -> str:
-    """Save an order to the orders file."""
+
+def save_order(order: Dict[str, Any], order_id: Optional[str] = None, idempotency_key: Optional[str] = None) -> str:
+    """Append an order to the order journal.
+
+    With an idempotency_key, an order already saved under the same key is
+    returned instead of being saved again, so retried placements are safe.
+    The order_id and timestamp are set on `order` only when it is saved.
+    """
     DATA_DIR.mkdir(parents=True, exist_ok=True)
+    _migrate_legacy_orders()
     
     # Generate order ID if not provided
     if not order_id:
-        order_id = f"ORDER_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    
-    order["order_id"] = order_id
-    order["timestamp"] = datetime.now().isoformat()
-    
-    # Load existing orders
-    try:
-        with open(ORDERS_PATH, 'r') as f:
-            all_orders = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        all_orders = []
+        order_id = new_order_id()
     
-    # Add new order
-    all_orders.append(order)
+    record = dict(order, order_id=order_id, timestamp=datetime.now().isoformat())
     
-    # Save all orders
-    with open(ORDERS_PATH, 'w') as f:
-        json.dump(all_orders, f, indent=2)
+    if idempotency_key:
+        record["idempotency_key"] = idempotency_key
+        stored, created = ORDER_JOURNAL.append_once(record)
+        if not created:
+            logger.info(f"Order {stored['order_id']} already placed (idempotency key {idempotency_key})")
+            return stored["order_id"]
+    else:
+        ORDER_JOURNAL.append(record)
+    order.update(record)
     
     # Also save as current order for easy access
-    with open(CURRENT_ORDER_PATH, 'w') as f:
-        json.dump(order, f, indent=2)
+    _write_json_atomic(CURRENT_ORDER_PATH, record)
     
     logger.info(f"Order {order_id} saved successfully")
     return order_id
 
+def iter_orders() -> Iterator[Dict[str, Any]]:
+    """Stream orders from the journal, oldest first."""
+    _migrate_legacy_orders()
+    return iter(ORDER_JOURNAL)
+
 def get_all_orders() -> List[Dict[str, Any]]:
-    """Get all orders from the orders file."""
-    try:
-        with open(ORDERS_PATH, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    """Get all orders. Prefer iter_orders() or get_order() for large histories."""
+    return list(iter_orders())
+
+def get_order(order_id: str) -> Optional[Dict[str, Any]]:
+    """Look up one order by ID via the journal's offset index."""
+    _migrate_legacy_orders()
+    return ORDER_JOURNAL.get(order_id)
+
+def find_order_by_idempotency_key(key: str) -> Optional[Dict[str, Any]]:
+    """The order already placed for an idempotency key, if any."""
+    _migrate_legacy_orders()
+    return ORDER_JOURNAL.find_by_idempotency_key(key)
 
 def calculate_cart_total(cart_items: List[Dict[str, Any]]) -> float:
-    """Calculate the total price of items in the cart."""
-    total = 0.0
+    """Calculate the total price of list-of-dict cart items, summed exactly in paise."""
+    total_paise = 0
     for cart_item in cart_items:
         item = cart_item.get("item", {})
         quantity = cart_item.get("quantity", 1)
-        price = item.get("price", 0)
-        total += price * quantity
-    return total
+        total_paise += to_paise(item.get("price", 0)) * quantity
+    return total_paise / 100
@@ -0,0 +1,283 @@
+"""
+Fuzzy, STT-tolerant item matching for the FreshCart catalog.
+
+Speech-to-text mangles item names ("peanut budder", "margarita pizza").
+Each spoken word that is not in the catalog vocabulary is corrected to the
+closest vocabulary word, using a phonetic key index (simplified Metaphone)
+and a BK-tree for bounded edit-distance lookups. The corrected query is then
+run through the normal ranked search.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from catalog_index import tokenize
+from catalog_search import CatalogSearch
+
+_VOWELS = set("AEIOU")
+
+# Phonetic matches count as slightly closer than their raw edit distance
+PHONETIC_BONUS = 0.5
+
+# Matches found only after correcting misheard words rank a little lower
+FUZZY_SCORE_FACTOR = 0.9
+
+
+def phonetic_key(word: str) -> str:
+    """Simplified Metaphone key for a single word.
+
+    Same rules as phonetic_key in the Day 6 verification module; each day's
+    backend ships on its own, so the function is copied rather than imported.
+    Keep the two in step when changing either.
+    """
+    word = "".join(c for c in word.upper() if c.isalpha())
+    if not word:
+        return ""
+    if word[:2] in ("KN", "GN", "PN", "AE", "WR"):
+        word = word[1:]
+    if word[0] == "X":
+        word = "S" + word[1:]
+    if word[:2] == "WH":
+        word = "W" + word[2:]
+
+    key = []
+    n = len(word)
+    for i, c in enumerate(word):
+        prev = word[i - 1] if i > 0 else ""
+        nxt = word[i + 1] if i + 1 < n else ""
+        nxt2 = word[i + 2] if i + 2 < n else ""
+
+        if c == prev and c != "C":
+            continue
+        if c in _VOWELS:
+            if i == 0:
+                key.append(c)
+        elif c == "B":
+            if not (prev == "M" and i == n - 1):
+                key.append("B")
+        elif c == "C":
+            if nxt == "H":
+                key.append("K" if prev == "S" else "X")
+            elif nxt == "I" and nxt2 == "A":
+                key.append("X")
+            elif nxt in ("I", "E", "Y"):
+                if prev != "S":
+                    key.append("S")
+            else:
+                key.append("K")
+        elif c == "D":
+            key.append("J" if nxt == "G" and nxt2 in ("E", "I", "Y") else "T")
+        elif c == "G":
+            if nxt == "H" and (i + 2 >= n or nxt2 not in _VOWELS):
+                continue
+            if nxt == "N" and i + 2 >= n:
+                continue
+            if prev == "D" and nxt in ("E", "I", "Y"):
+                continue
+            key.append("J" if nxt in ("E", "I", "Y") else "K")
+        elif c == "H":
+            if nxt in _VOWELS and prev not in ("C", "G", "P", "S", "T"):
+                key.append("H")
+        elif c == "K":
+            if prev != "C":
+                key.append("K")
+        elif c == "P":
+            key.append("F" if nxt == "H" else "P")
+        elif c == "Q":
+            key.append("K")
+        elif c == "S":
+            if nxt == "H" or (nxt == "I" and nxt2 in ("O", "A")):
+                key.append("X")
+            else:
+                key.append("S")
+        elif c == "T":
+            if nxt == "I" and nxt2 in ("O", "A"):
+                key.append("X")
+            elif nxt == "H":
+                key.append("0")
+            elif not (nxt == "C" and nxt2 == "H"):
+                key.append("T")
+        elif c == "V":
+            key.append("F")
+        elif c in ("W", "Y"):
+            if nxt in _VOWELS:
+                key.append(c)
+        elif c == "X":
+            key.append("KS")
+        elif c == "Z":
+            key.append("S")
+        else:
+            key.append(c)
+    return "".join(key)
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ca != cb),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+def max_edits(word: str) -> int:
+    """Edit budget for a spoken word; very short words must match exactly."""
+    if len(word) <= 3:
+        return 0
+    if len(word) <= 6:
+        return 1
+    return 2
+
+
+class BKTree:
+    """Burkhard-Keller tree for edit-distance neighbourhood queries."""
+
+    def __init__(self):
+        # Each node is (word, {distance: child_node})
+        self.root: Optional[Tuple[str, Dict[int, Any]]] = None
+        self.size = 0
+
+    def add(self, word: str):
+        if self.root is None:
+            self.root = (word, {})
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                self.size += 1
+                return
+            node = child
+
+    def query(self, word: str, max_distance: int) -> List[Tuple[int, str]]:
+        """All words within max_distance of word, closest first."""
+        if self.root is None:
+            return []
+        results = []
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = edit_distance(word, node_word)
+            if distance <= max_distance:
+                results.append((distance, node_word))
+            # Triangle inequality: only children in [d - k, d + k] can match
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(child for d, child in children.items() if low <= d <= high)
+        results.sort()
+        return results
+
+
+def vocabulary_frequency(catalog: Dict[str, Any]) -> Dict[str, int]:
+    """How many items use each name and brand token; numbers are left out."""
+    frequency: Dict[str, int] = {}
+    for items in catalog.get("categories", {}).values():
+        for item in items:
+            text = f"{item.get('name', '')} {item.get('brand') or ''}"
+            for token in tokenize(text):
+                if not token.isdigit():
+                    frequency[token] = frequency.get(token, 0) + 1
+    return frequency
+
+
+class FuzzyMatcher:
+    """Corrects misheard words to the catalog's name and brand vocabulary."""
+
+    def __init__(self, catalog: Dict[str, Any]):
+        self._build(vocabulary_frequency(catalog))
+
+    @classmethod
+    def from_frequency(cls, frequency: Dict[str, int]) -> "FuzzyMatcher":
+        """Matcher over a precomputed vocabulary (see vocabulary_frequency)."""
+        matcher = cls.__new__(cls)
+        matcher._build(frequency)
+        return matcher
+
+    def _build(self, frequency: Dict[str, int]):
+        self.frequency = frequency
+        self.by_phonetic: Dict[str, List[str]] = {}
+        self.tree = BKTree()
+        for token in self.frequency:
+            key = phonetic_key(token)
+            if key:
+                self.by_phonetic.setdefault(key, []).append(token)
+            self.tree.add(token)
+
+    def correct_word(self, word: str) -> Optional[str]:
+        """Closest vocabulary word, or None if nothing is close enough."""
+        if word in self.frequency or word.isdigit():
+            return word
+
+        budget = max_edits(word)
+        candidates: Dict[str, float] = {}
+        for token in self.by_phonetic.get(phonetic_key(word), ()):
+            distance = edit_distance(word, token)
+            # Sound-alikes are accepted with one extra edit of slack
+            if distance <= budget + 1:
+                candidates[token] = distance - PHONETIC_BONUS
+        if budget:
+            for distance, token in self.tree.query(word, budget):
+                candidates[token] = min(candidates.get(token, distance), distance)
+        if not candidates:
+            return None
+        # Closest first; common words win ties
+        return min(
+            candidates,
+            key=lambda token: (candidates[token], -self.frequency[token], token),
+        )
+
+    def correct(self, query: str) -> str:
+        """Query with every misheard word replaced by its closest catalog word."""
+        spoken = tokenize(query)
+        words = []
+        i = 0
+        while i < len(spoken):
+            word = spoken[i]
+            # STT often splits compound words ("pop corn")
+            if i + 1 < len(spoken) and word not in self.frequency:
+                joined = word + spoken[i + 1]
+                if joined in self.frequency:
+                    words.append(joined)
+                    i += 2
+                    continue
+            corrected = self.correct_word(word)
+            words.append(corrected if corrected else word)
+            i += 1
+        return " ".join(words)
+
+
+def match_items(
+    search: CatalogSearch, matcher: FuzzyMatcher, query: str, limit: int = 5
+) -> List[Tuple[float, Dict[str, Any]]]:
+    """Ranked search fused with STT error correction.
+
+    Runs the query as spoken and, if any word is not in the catalog vocabulary,
+    again with those words corrected. Results are merged per item; corrected
+    matches score slightly lower than exact ones.
+    """
+    results = search.search(query, limit)
+    corrected = matcher.correct(query)
+    if corrected == " ".join(tokenize(query)):
+        return results
+
+    best: Dict[str, Tuple[float, Dict[str, Any]]] = {
+        item["id"]: (score, item) for score, item in results
+    }
+    for score, item in search.search(corrected, limit):
+        score = round(score * FUZZY_SCORE_FACTOR, 3)
+        if item["id"] not in best or score > best[item["id"]][0]:
+            best[item["id"]] = (score, item)
+    return sorted(best.values(), key=lambda entry: -entry[0])[:limit]
@@ -0,0 +1,91 @@
+"""
+Order IDs and idempotency keys for FreshCart.
+
+Order IDs are ULID-style: a 48-bit millisecond timestamp followed by 80
+random bits, Crockford base32 encoded. They sort by creation time, and IDs
+generated in the same millisecond by one process are strictly increasing
+(the random part is incremented instead of redrawn), so two orders placed in
+the same second can no longer collide.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Dict, List
+
+ORDER_ID_PREFIX = "ORDER_"
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, 32)
+        chars.append(_CROCKFORD[remainder])
+    return "".join(reversed(chars))
+
+
+class UlidGenerator:
+    """Monotonic ULID source; safe to share between threads."""
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def new(self) -> str:
+        with self._lock:
+            now_ms = int(self._clock() * 1000)
+            if now_ms <= self._last_ms:
+                # Same millisecond (or the clock stepped back): stay monotonic
+                now_ms = self._last_ms
+                random_part = self._last_random + 1
+                if random_part > _RANDOM_MAX:
+                    now_ms += 1
+                    random_part = secrets.randbits(_RANDOM_BITS)
+            else:
+                random_part = secrets.randbits(_RANDOM_BITS)
+            self._last_ms, self._last_random = now_ms, random_part
+        return _encode(now_ms, 10) + _encode(random_part, 16)
+
+    def reset(self):
+        """Forget the last ID so a forked child draws fresh random bits."""
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+
+_GENERATOR = UlidGenerator()
+if hasattr(os, "register_at_fork"):
+    # Worker processes are forked; they must not continue the parent's sequence
+    os.register_at_fork(after_in_child=_GENERATOR.reset)
+
+
+def new_order_id() -> str:
+    """A sortable, process-unique order ID like ORDER_01JAB3...."""
+    return ORDER_ID_PREFIX + _GENERATOR.new()
+
+
+def cart_fingerprint(order_items: List[Dict[str, Any]]) -> str:
+    """Hash of the cart contents, independent of the order items were added in."""
+    lines = sorted(
+        (str(item.get("item_id")), int(item.get("quantity", 1))) for item in order_items
+    )
+    return hashlib.sha256(json.dumps(lines).encode("utf-8")).hexdigest()
+
+
+def idempotency_key(session_id: str, order_items: List[Dict[str, Any]]) -> str:
+    """Key shared by every attempt to place the same cart in the same session.
+
+    A retried place_order call maps to the order that was already saved
+    instead of creating a second one.
+    """
+    digest = hashlib.sha256(f"{session_id}\n{cart_fingerprint(order_items)}".encode())
+    return digest.hexdigest()[:32]
@@ -0,0 +1,293 @@
+"""
+Append-only order journal for FreshCart.
+
+Orders are stored one JSON object per line (NDJSON). Saving an order is a
+single O_APPEND write, so its cost does not grow with order history and
+concurrent sessions (or worker processes) cannot overwrite each other's
+orders. An in-memory offset index maps order_id to its byte offset for
+direct lookups; it is built lazily and extended incrementally as the file
+grows.
+
+Usage:
+    python src/order_journal.py migrate   # convert data/orders.json
+    python src/order_journal.py compact   # drop torn lines and superseded entries
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are still serialized within the process
+    fcntl = None
+
+logger = logging.getLogger("food_ordering")
+
+
+def _encode(order: Dict[str, Any]) -> bytes:
+    return (json.dumps(order, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _append_lines(fd: int, data: bytes) -> int:
+    """Write data at the end of a locked O_APPEND descriptor; returns the offset it starts at.
+
+    A crash mid-write can leave a torn last line, so data starts on a fresh one.
+    """
+    size = os.fstat(fd).st_size
+    prefix = b"\n" if size and os.pread(fd, 1, size - 1) != b"\n" else b""
+    os.write(fd, prefix + data)
+    return size + len(prefix)
+
+
+class OrderJournal:
+    """NDJSON order log with an order_id -> offset index."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._offsets: Dict[str, int] = {}
+        self._by_key: Dict[str, str] = {}  # idempotency_key -> order_id
+        self._indexed_upto = 0
+        self._index_signature: Optional[Tuple[int, int]] = None
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, order: Dict[str, Any]) -> int:
+        """Append an order and return the byte offset it was written at."""
+        offset, _ = self._append(order, check_duplicate=False)
+        return offset
+
+    def append_once(self, order: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Append an order unless one with the same idempotency_key is already stored.
+
+        The check and the write happen under the same file lock, so concurrent
+        retries, even from other worker processes, persist the order once.
+        Returns (stored order, created).
+        """
+        offset, created = self._append(order, check_duplicate=True)
+        return (order if created else self._read_at(offset)), created
+
+    @contextmanager
+    def _locked_file(self) -> Iterator[int]:
+        """An O_APPEND descriptor on the current journal file, exclusively locked.
+
+        compact() replaces the file while holding this lock; a writer that
+        opened the old file before the replace reopens the path once it gets
+        the lock, so its order lands in the new file.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                opened = os.fstat(fd)
+                try:
+                    current = os.stat(self.path)
+                except FileNotFoundError:
+                    current = None
+                if current and (current.st_ino, current.st_dev) == (
+                    opened.st_ino,
+                    opened.st_dev,
+                ):
+                    yield fd
+                    return
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    def _append(self, order: Dict[str, Any], check_duplicate: bool) -> Tuple[int, bool]:
+        line = _encode(order)
+        key = order.get("idempotency_key") if check_duplicate else None
+
+        with self._lock:
+            with self._locked_file() as fd:
+                if key:
+                    # Writers are blocked, so the index now covers the whole file
+                    self._refresh_index()
+                    existing = self._by_key.get(key)
+                    if existing is not None:
+                        return self._offsets[existing], False
+                offset = _append_lines(fd, line)
+
+            if self._index_signature is not None and self._indexed_upto == offset:
+                # Nothing else was appended since the last scan; extend the index in place
+                self._index_order(order, offset)
+                self._indexed_upto = offset + len(line)
+        return offset, True
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _scan(self, start: int) -> Iterator[Tuple[int, Optional[Dict[str, Any]], int]]:
+        """Yield (offset, order, next_offset) for every complete line from start.
+
+        order is None for a corrupt line; an unterminated last line (a write
+        still in progress, or torn by a crash) is not yielded at all.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(start)
+                offset = start
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        return
+                    next_offset = offset + len(raw)
+                    order = None
+                    if raw.strip():
+                        try:
+                            order = json.loads(raw)
+                        except json.JSONDecodeError:
+                            logger.warning(
+                                f"Skipping corrupt order journal line at offset {offset}"
+                            )
+                    yield offset, order, next_offset
+                    offset = next_offset
+        except FileNotFoundError:
+            return
+
+    def _refresh_index(self):
+        """Index any orders appended since the last scan (by this or another process)."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._offsets, self._by_key, self._indexed_upto = {}, {}, 0
+            return
+        signature = (stat.st_ino, stat.st_dev)
+        if signature != self._index_signature or stat.st_size < self._indexed_upto:
+            # File was replaced (compaction) or truncated: rebuild from scratch
+            self._offsets, self._by_key, self._indexed_upto = {}, {}, 0
+            self._index_signature = signature
+        if stat.st_size == self._indexed_upto:
+            return
+        for offset, order, next_offset in self._scan(self._indexed_upto):
+            if order:
+                self._index_order(order, offset)
+            self._indexed_upto = next_offset
+
+    def _index_order(self, order: Dict[str, Any], offset: int):
+        order_id = order.get("order_id")
+        if not order_id:
+            return
+        self._offsets[order_id] = offset
+        key = order.get("idempotency_key")
+        if key:
+            self._by_key.setdefault(key, order_id)
+
+    def _read_at(self, offset: int) -> Dict[str, Any]:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a single order by ID without reading the rest of the journal."""
+        with self._lock:
+            self._refresh_index()
+            offset = self._offsets.get(order_id)
+        return self._read_at(offset) if offset is not None else None
+
+    def find_by_idempotency_key(self, key: str) -> Optional[Dict[str, Any]]:
+        """The order first saved under an idempotency key, if any."""
+        with self._lock:
+            self._refresh_index()
+            order_id = self._by_key.get(key)
+            offset = self._offsets.get(order_id) if order_id else None
+        return self._read_at(offset) if offset is not None else None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Stream every order in the order it was placed."""
+        for _, order, _ in self._scan(0):
+            if order is not None:
+                yield order
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh_index()
+            return len(self._offsets)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def compact(self) -> int:
+        """Rewrite the journal without corrupt lines or superseded duplicates.
+
+        The file lock is held from the scan through the replace, so orders
+        appended by other workers meanwhile wait and then go to the new file.
+        Returns the number of orders kept.
+        """
+        with self._lock, self._locked_file():
+            latest: Dict[str, int] = {}
+            entries: List[Optional[Dict[str, Any]]] = []
+            for _, order, _ in self._scan(0):
+                if order is None:
+                    continue
+                order_id = order.get("order_id")
+                if order_id in latest:
+                    entries[latest[order_id]] = None
+                if order_id:
+                    latest[order_id] = len(entries)
+                entries.append(order)
+
+            kept = [order for order in entries if order is not None]
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(b"".join(_encode(order) for order in kept))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._index_signature = None
+        logger.info(f"Compacted order journal: {len(kept)} orders kept")
+        return len(kept)
+
+    def migrate_from_json(self, legacy_path: Path) -> int:
+        """Import orders from the old orders.json array, if the journal is empty.
+
+        The emptiness check and the import run under one file lock, so
+        workers starting together import the legacy file once.
+        """
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                orders = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        with self._lock, self._locked_file() as fd:
+            if os.fstat(fd).st_size > 0:
+                return 0
+            _append_lines(fd, b"".join(_encode(order) for order in orders))
+        logger.info(f"Migrated {len(orders)} orders from {legacy_path} to {self.path}")
+        return len(orders)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import database
+
+    parser = argparse.ArgumentParser(
+        description="Maintain the FreshCart order journal."
+    )
+    parser.add_argument("command", choices=["migrate", "compact"])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    journal = database.ORDER_JOURNAL
+    if args.command == "migrate":
+        count = journal.migrate_from_json(database.ORDERS_PATH)
+        print(f"✅ Migrated {count} orders to {journal.path}")
+    else:
+        count = journal.compact()
+        print(f"✅ Journal compacted: {count} orders in {journal.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,13 +1,42 @@
 """
 Test script for Food Ordering Agent database functions
+
+With no arguments, runs smoke tests against the bundled catalog. The bench
+mode synthesizes catalogs (default 1k, 100k and 1M items, with recipes),
+times each database operation, writes JSON results that can be compared
+across commits, and exits non-zero when a metric crosses its threshold in
+bench_thresholds.json or regresses against a baseline results file.
+
+Usage:
+    python test_logic.py
+    python test_logic.py bench --output bench_results.json
+    python test_logic.py bench --sizes 1000 --baseline bench_results.json
 """
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
 import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 import database
+from bench_fuzzy import corrupt
+from bench_index import ADJECTIVES, BRANDS, NOUNS, TAGS, synthesize_catalog
+from catalog_cache import CatalogCache
+from catalog_snapshot import SnapshotLoader
+from order_journal import OrderJournal
+
+THRESHOLDS_PATH = Path(__file__).parent / "bench_thresholds.json"
 
 def test_catalog_loading():
     """Test catalog loading"""
@@ -144,16 +173,195 @@ def test_order_saving():
         "status": "placed"
     }
     
-    order_id = database.save_order(test_order)
-    print(f"✓ Order saved with ID: {order_id}")
-    
-    # Verify order was saved
-    all_orders = database.get_all_orders()
-    print(f"✓ Total orders in database: {len(all_orders)}")
+    # Save into a scratch data directory so the real order history is left alone
+    with tempfile.TemporaryDirectory() as tmp, isolated_data_dir(Path(tmp)):
+        order_id = database.save_order(test_order)
+        print(f"✓ Order saved with ID: {order_id}")
+        
+        # Verify order was saved
+        all_orders = database.get_all_orders()
+        assert [order["order_id"] for order in all_orders] == [order_id]
+        print(f"✓ Total orders in database: {len(all_orders)}")
     
     print()
 
-def main():
+# ----------------------------------------------------------------------
+# Benchmarks
+# ----------------------------------------------------------------------
+
+@contextmanager
+def isolated_data_dir(data_dir: Path) -> Iterator[None]:
+    """Point the database module at data_dir for the duration of a test or benchmark."""
+    names = ["DATA_DIR", "CATALOG_PATH", "CATALOG_SNAPSHOT_PATH", "ORDERS_PATH", "ORDERS_JOURNAL_PATH",
+             "CURRENT_ORDER_PATH", "CATALOG_CACHE", "CATALOG_SNAPSHOT", "ORDER_JOURNAL", "_legacy_migrated"]
+    saved = {name: getattr(database, name) for name in names}
+    database.DATA_DIR = data_dir
+    database.CATALOG_PATH = data_dir / "catalog.json"
+    database.CATALOG_SNAPSHOT_PATH = data_dir / "catalog.snap"
+    database.ORDERS_PATH = data_dir / "orders.json"
+    database.ORDERS_JOURNAL_PATH = data_dir / "orders.ndjson"
+    database.CURRENT_ORDER_PATH = data_dir / "current_order.json"
+    database.CATALOG_CACHE = CatalogCache(database.CATALOG_PATH)
+    database.CATALOG_SNAPSHOT = SnapshotLoader(database.CATALOG_SNAPSHOT_PATH, database.CATALOG_PATH)
+    database.ORDER_JOURNAL = OrderJournal(database.ORDERS_JOURNAL_PATH)
+    database._legacy_migrated = False
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(database, name, value)
+
+
+def time_ms(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def per_call_us(fn: Callable[[Any], Any], args: List[Any]) -> Dict[str, float]:
+    """Mean and p95 latency of fn over args, in microseconds."""
+    latencies = []
+    for arg in args:
+        started = time.perf_counter()
+        fn(arg)
+        latencies.append((time.perf_counter() - started) * 1e6)
+    latencies.sort()
+    return {
+        "mean": round(statistics.mean(latencies), 2),
+        "p95": round(latencies[max(0, int(len(latencies) * 0.95) - 1)], 2),
+    }
+
+
+def bench_catalog(size: int, num_queries: int, seed: int = 0) -> Dict[str, float]:
+    """Time every database operation against a synthetic catalog of size items."""
+    catalog = synthesize_catalog(size, num_recipes=max(10, size // 100), seed=seed)
+    rng = random.Random(seed)
+
+    with tempfile.TemporaryDirectory() as tmp, isolated_data_dir(Path(tmp)):
+        with open(database.CATALOG_PATH, "w", encoding="utf-8") as f:
+            json.dump(catalog, f)
+        del catalog
+
+        results: Dict[str, float] = {"items": size}
+        results["load_ms"] = round(time_ms(database.load_catalog), 1)
+        results["index_build_ms"] = round(time_ms(lambda: (
+            database.get_catalog_index(),
+            database.get_catalog_search(),
+            database.get_fuzzy_matcher(),
+        )), 1)
+
+        index = database.get_catalog_index()
+        sample = [rng.choice(index.items) for _ in range(num_queries)]
+        exact = [item["name"] for item in sample]
+        # "Organic Milk 42" -> "organic milk"
+        partial = [item["name"].rsplit(" ", 1)[0].lower() for item in sample]
+        misheard = [corrupt(name, rng) for name in exact]
+        queries = [rng.choice(ADJECTIVES + NOUNS + BRANDS + TAGS) for _ in range(num_queries)]
+        queries += [f"{rng.choice(BRANDS)} {rng.choice(NOUNS)}" for _ in range(num_queries)]
+        recipes = [rng.choice(list(index.recipes)) for _ in range(num_queries)]
+
+        for label, names in (("exact", exact), ("partial", partial), ("misheard", misheard)):
+            timing = per_call_us(database.get_item_by_name, names)
+            results[f"get_item_by_name_{label}_us"] = timing["mean"]
+            results[f"get_item_by_name_{label}_p95_us"] = timing["p95"]
+
+        timing = per_call_us(database.search_items, queries)
+        results["search_items_us"], results["search_items_p95_us"] = timing["mean"], timing["p95"]
+        timing = per_call_us(database.get_recipe_items, recipes)
+        results["get_recipe_items_us"], results["get_recipe_items_p95_us"] = timing["mean"], timing["p95"]
+
+        def place(items):
+            order_items = [{"item_id": item["id"], "quantity": 1, "unit_price": item["price"]} for item in items]
+            database.save_order({"items": order_items, "status": "placed"})
+
+        carts = [rng.sample(sample, min(3, len(sample))) for _ in range(num_queries)]
+        timing = per_call_us(place, carts)
+        results["save_order_us"], results["save_order_p95_us"] = timing["mean"], timing["p95"]
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def check_thresholds(results: Dict[str, Dict[str, float]], thresholds: Dict[str, Dict[str, float]]) -> List[str]:
+    """Metrics above their configured ceiling, as human-readable lines."""
+    failures = []
+    for size, limits in thresholds.items():
+        measured = results.get(size)
+        if not measured:
+            continue
+        for metric, limit in limits.items():
+            value = measured.get(metric)
+            if value is not None and value > limit:
+                failures.append(f"{size} items: {metric} = {value} (threshold {limit})")
+    return failures
+
+
+def check_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    max_slowdown: float,
+    noise_floor: float = 5.0,
+) -> List[str]:
+    """Metrics more than max_slowdown times slower than the baseline run."""
+    failures = []
+    for size, measured in results.items():
+        previous = baseline.get(size, {})
+        for metric, value in measured.items():
+            before = previous.get(metric)
+            if metric == "items" or not before or value < noise_floor:
+                continue
+            if value > before * max_slowdown:
+                failures.append(f"{size} items: {metric} = {value} vs {before} in baseline ({value / before:.1f}x)")
+    return failures
+
+
+def run_benchmarks(args) -> int:
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results: Dict[str, Dict[str, float]] = {}
+    for size in sizes:
+        print(f"Benchmarking {size} items...", file=sys.stderr)
+        results[str(size)] = bench_catalog(size, args.queries)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "queries": args.queries,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+        print(f"✓ Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    failures = []
+    if args.thresholds and Path(args.thresholds).exists():
+        with open(args.thresholds, "r", encoding="utf-8") as f:
+            failures += check_thresholds(results, json.load(f))
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            failures += check_baseline(results, json.load(f)["results"], args.max_slowdown)
+
+    if failures:
+        print("\n✗ PERFORMANCE REGRESSIONS:", file=sys.stderr)
+        for failure in failures:
+            print(f"  - {failure}", file=sys.stderr)
+        return 1
+    print("✓ All benchmarks within thresholds", file=sys.stderr)
+    return 0
+
+
+def run_smoke_tests() -> int:
     print("\n" + "=" * 50)
     print("FOOD ORDERING AGENT - DATABASE TESTS")
     print("=" * 50 + "\n")
@@ -168,11 +376,29 @@ def main():
         print("=" * 50)
         print("ALL TESTS PASSED! ✓")
         print("=" * 50)
+        return 0
         
     except Exception as e:
         print(f"\n✗ TEST FAILED: {e}")
         import traceback
         traceback.print_exc()
+        return 1
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", nargs="?", choices=["smoke", "bench"], default="smoke")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Comma-separated synthetic catalog sizes")
+    parser.add_argument("--queries", type=int, default=300, help="Calls per timed operation")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--thresholds", default=str(THRESHOLDS_PATH), help="JSON file of per-size metric ceilings")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--max-slowdown", type=float, default=1.5,
+                        help="Fail if a metric is this many times slower than the baseline")
+    args = parser.parse_args()
+
+    if args.mode == "bench":
+        return run_benchmarks(args)
+    return run_smoke_tests()
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,88 @@
+import pytest
+
+from cart import Cart, format_rupees, to_paise
+
+MILK = {"id": "g1", "name": "Milk", "price": 28.5}
+BREAD = {"id": "g2", "name": "Bread", "price": 40}
+TEA = {"id": "g3", "name": "Tea", "price": "0.1"}
+
+
+def test_to_paise_is_exact() -> None:
+    assert to_paise(28.5) == 2850
+    assert to_paise("0.1") == 10
+    assert to_paise(0.29) == 29
+    assert format_rupees(123456) == "₹1234.56"
+    assert format_rupees(-5) == "-₹0.05"
+
+
+def test_cart_keeps_running_totals() -> None:
+    cart = Cart()
+    cart.add(MILK, 2)
+    cart.add(BREAD)
+    cart.add(MILK)
+    assert len(cart) == 2
+    assert cart.get("g1").quantity == 3
+    assert cart.total_paise == 3 * 2850 + 4000
+    assert cart.units == 4
+
+    cart.set_quantity("g1", 1)
+    assert cart.total_paise == 2850 + 4000
+    assert cart.set_quantity("missing", 2) is None
+
+    cart.set_quantity("g2", 0)
+    assert "g2" not in cart
+    assert cart.total_paise == 2850
+    assert [line.item["id"] for line in cart] == ["g1"]
+
+    with pytest.raises(ValueError):
+        cart.add(MILK, 0)
+
+
+def test_cart_totals_do_not_drift_on_bulk_orders() -> None:
+    cart = Cart()
+    for _ in range(100_000):
+        cart.add(TEA)
+    assert cart.total_paise == 1_000_000
+    assert cart.total == 10_000.0
+    for _ in range(100_000):
+        cart.set_quantity("g3", cart.get("g3").quantity - 1)
+    assert cart.total_paise == 0
+    assert not cart
+
+
+def test_cart_snapshot_diff() -> None:
+    cart = Cart()
+    cart.add(MILK)
+    cart.add(BREAD)
+    before = cart.snapshot()
+
+    cart.add(TEA, 3)
+    cart.set_quantity("g1", 2)
+    cart.remove("g2")
+    diff = cart.diff(before)
+
+    assert diff.added == (("Tea", 3),)
+    assert diff.changed == (("Milk", 1, 2),)
+    assert diff.removed == (("Bread", 1),)
+    assert (
+        diff.describe()
+        == "Added 3 Tea; updated Milk to 2; removed Bread. Cart total: ₹57.30."
+    )
+    assert not cart.diff(cart.snapshot())
+    # Snapshots are unaffected by later changes
+    assert before.quantities == {"g1": 1, "g2": 1}
+
+
+def test_cart_order_items() -> None:
+    cart = Cart()
+    cart.add(MILK, 3)
+    assert cart.to_order_items() == [
+        {
+            "item_id": "g1",
+            "name": "Milk",
+            "brand": None,
+            "quantity": 3,
+            "unit_price": 28.5,
+            "subtotal": 85.5,
+        }
+    ]
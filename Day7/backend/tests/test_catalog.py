@@ -0,0 +1,326 @@
+import json
+import os
+
+from catalog_cache import CatalogCache
+
+
+def _write_catalog(path, items) -> None:
+    path.write_text(
+        json.dumps({"categories": {"Groceries": items}, "recipes": {}}),
+        encoding="utf-8",
+    )
+
+
+def test_catalog_cache_hits_until_file_changes(tmp_path) -> None:
+    path = tmp_path / "catalog.json"
+    _write_catalog(path, [{"id": "g1", "name": "Milk"}])
+    cache = CatalogCache(path)
+
+    first = cache.get()
+    assert cache.get() is first
+    assert cache.stats()["hits"] == 1
+
+    _write_catalog(path, [{"id": "g1", "name": "Milk"}, {"id": "g2", "name": "Eggs"}])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    reloaded = cache.get()
+    assert reloaded is not first
+    assert len(reloaded["categories"]["Groceries"]) == 2
+    assert cache.stats()["reloads"] == 2
+
+
+def test_catalog_cache_keeps_last_good_version(tmp_path) -> None:
+    path = tmp_path / "catalog.json"
+    _write_catalog(path, [{"id": "g1", "name": "Milk"}])
+    cache = CatalogCache(path)
+    good = cache.get()
+
+    path.write_text("{not json", encoding="utf-8")
+    assert cache.get() is good
+    # The broken file is parsed once, not on every access
+    assert cache.get() is good
+    assert cache.stats()["misses"] == 2
+
+    _write_catalog(path, [{"id": "g2", "name": "Eggs"}])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.get()["categories"]["Groceries"][0]["id"] == "g2"
+
+
+def test_catalog_index_lookups() -> None:
+    from catalog_index import CatalogIndex
+
+    catalog = {
+        "categories": {
+            "Groceries": [
+                {
+                    "id": "g1",
+                    "name": "Milk Chocolate",
+                    "category": "Snacks",
+                    "tags": ["sweet"],
+                },
+                {
+                    "id": "g2",
+                    "name": "Milk",
+                    "category": "Groceries",
+                    "tags": ["dairy", "fresh"],
+                },
+                {
+                    "id": "g3",
+                    "name": "Peanut Butter",
+                    "category": "Groceries",
+                    "tags": ["spread"],
+                },
+            ]
+        },
+        "recipes": {"pb sandwich": {"name": "PB Sandwich", "items": ["g3", "missing"]}},
+    }
+    index = CatalogIndex(catalog)
+
+    assert index.get_by_id("g2")["name"] == "Milk"
+    assert index.get_by_exact_name("  MILK ")["id"] == "g2"
+    assert index.find_name_containing("butter")["id"] == "g3"
+    assert index.find_name_containing("choc")["id"] == "g1"
+    assert "pb sandwich" in index.recipes
+
+
+def test_ranked_search_prefers_exact_and_prefix_matches() -> None:
+    from catalog_search import CatalogSearch
+
+    catalog = {
+        "categories": {
+            "Snacks": [
+                {
+                    "id": "s1",
+                    "name": "Milk Chocolate",
+                    "brand": "Cadbury",
+                    "category": "Snacks",
+                    "tags": ["sweet"],
+                },
+                {
+                    "id": "s2",
+                    "name": "Potato Chips",
+                    "brand": "Lays",
+                    "category": "Snacks",
+                    "tags": ["vegan"],
+                },
+            ],
+            "Groceries": [
+                {
+                    "id": "g1",
+                    "name": "Milk",
+                    "brand": "Amul",
+                    "category": "Groceries",
+                    "tags": ["dairy"],
+                },
+                {
+                    "id": "g2",
+                    "name": "Amul Butter",
+                    "brand": "Amul",
+                    "category": "Groceries",
+                    "tags": ["dairy"],
+                },
+            ],
+        }
+    }
+    search = CatalogSearch(catalog)
+
+    assert [item["id"] for _, item in search.search("milk")] == ["g1", "s1"]
+    assert search.search("choc")[0][1]["id"] == "s1"
+    assert search.search("veg")[0][1]["id"] == "s2"
+    assert search.search("amul butter")[0][1]["id"] == "g2"
+    assert len(search.search("amul", limit=1)) == 1
+    assert search.search("xyz") == []
+
+
+def test_pruned_search_matches_scoring_every_item(tmp_path) -> None:
+    import random
+
+    from catalog_search import CatalogSearch
+    from catalog_snapshot import CatalogSnapshot, write_snapshot
+
+    rng = random.Random(7)
+    words = [
+        "milk",
+        "milkshake",
+        "chocolate",
+        "choco",
+        "bread",
+        "butter",
+        "amul",
+        "organic",
+        "oat",
+    ]
+    catalog = {"categories": {"Dairy": [], "Bakery": []}}
+    for i in range(400):
+        category = rng.choice(["Dairy", "Bakery"])
+        catalog["categories"][category].append(
+            {
+                "id": f"i{i}",
+                # Few distinct names, so scores tie and some names repeat exactly
+                "name": " ".join(rng.sample(words, rng.randint(1, 3))),
+                "brand": rng.choice(["Amul", "Nestle", ""]),
+                "category": category,
+                "tags": rng.sample(
+                    ["dairy", "sweet", "vegan", "organic"], rng.randint(0, 2)
+                ),
+            }
+        )
+    search = CatalogSearch(catalog)
+    snapshot_path = tmp_path / "catalog.snap"
+    write_snapshot(catalog, snapshot_path)
+    snapshot = CatalogSnapshot(snapshot_path)
+
+    queries = [
+        "milk",
+        "mi",
+        "choc",
+        "amul milk",
+        "organic chocolate bread",
+        "milk milkshake",
+        "oat",
+        "dairy",
+        "zzz",
+    ]
+    queries += [item["name"] for item in catalog["categories"]["Dairy"][:20]]
+    for query in queries:
+        everything = search.search(query, limit=None)
+        for limit in (1, 3, 10):
+            assert search.search(query, limit) == everything[:limit], (query, limit)
+            assert snapshot.search.search(query, limit) == everything[:limit], (
+                query,
+                limit,
+            )
+    assert len(search.search("milk", limit=None)) > 100
+
+
+def test_fuzzy_matcher_corrects_misheard_words() -> None:
+    from catalog_search import CatalogSearch
+    from fuzzy_match import BKTree, FuzzyMatcher, match_items
+
+    catalog = {
+        "categories": {
+            "Groceries": [
+                {
+                    "id": "g1",
+                    "name": "Peanut Butter",
+                    "brand": "Sundrop",
+                    "category": "Groceries",
+                    "tags": [],
+                },
+                {
+                    "id": "g2",
+                    "name": "Butter",
+                    "brand": "Amul",
+                    "category": "Groceries",
+                    "tags": [],
+                },
+                {
+                    "id": "g3",
+                    "name": "Popcorn",
+                    "brand": "Act II",
+                    "category": "Snacks",
+                    "tags": [],
+                },
+            ]
+        }
+    }
+    matcher = FuzzyMatcher(catalog)
+    search = CatalogSearch(catalog)
+
+    assert matcher.correct("peanut budder") == "peanut butter"
+    assert matcher.correct("pop corn") == "popcorn"
+    assert matcher.correct_word("xylophone") is None
+    assert match_items(search, matcher, "peanut budder")[0][1]["id"] == "g1"
+
+    tree = BKTree()
+    for word in ["butter", "batter", "better", "bitter", "peanut"]:
+        tree.add(word)
+    assert tree.query("budder", 1) == []
+    assert tree.query("budder", 2) == [(2, "butter")]
+    assert {word for _, word in tree.query("butter", 1)} == {
+        "butter",
+        "batter",
+        "better",
+        "bitter",
+    }
+
+
+def test_resolve_items_in_one_pass() -> None:
+    import database
+
+    resolved = database.resolve_items(
+        ["milks", "eggs", "bread", "grocery_007", "peanut budder", "caviar"]
+    )
+    names = [
+        (item["name"] if item else None, [c["name"] for c in candidates])
+        for item, candidates in resolved
+    ]
+    assert names == [
+        ("Milk", []),
+        ("Eggs", []),
+        (None, ["White Bread", "Whole Wheat Bread"]),
+        ("Pasta", []),
+        ("Peanut Butter", []),
+        (None, []),
+    ]
+
+
+def test_catalog_snapshot_matches_json_indexes(tmp_path) -> None:
+    import database
+    from catalog_index import CatalogIndex
+    from catalog_search import CatalogSearch
+    from catalog_snapshot import CatalogSnapshot, build_snapshot
+    from fuzzy_match import match_items
+
+    snapshot_path = tmp_path / "catalog.snap"
+    assert build_snapshot(database.CATALOG_PATH, snapshot_path) == 23
+    snapshot = CatalogSnapshot(snapshot_path)
+    assert snapshot.matches(database.CATALOG_PATH)
+
+    with open(database.CATALOG_PATH, encoding="utf-8") as f:
+        catalog = json.load(f)
+    index = CatalogIndex(catalog)
+    search = CatalogSearch(catalog)
+    assert len(snapshot) == len(index)
+    assert snapshot.to_catalog() == catalog
+
+    for item in index.items:
+        assert snapshot.get_by_id(item["id"]) == item
+        assert snapshot.get_by_exact_name(
+            item["name"].upper()
+        ) == index.get_by_exact_name(item["name"])
+    assert snapshot.get_by_id("missing") is None
+    for query in ("milk", "bread", "choc", "peanut butter", "dairy milk", "xyz"):
+        assert snapshot.find_name_containing(query) == index.find_name_containing(query)
+    for query in ("milk", "veg", "amul butter", "choc", "italian", "pizza", "xyz"):
+        assert snapshot.search.search(query, 5) == search.search(query, 5)
+    assert (
+        match_items(snapshot.search, snapshot.fuzzy, "peanut budder", 1)[0][1]["id"]
+        == "grocery_005"
+    )
+    assert set(snapshot.recipes) == set(index.recipes)
+
+
+def test_snapshot_loader_falls_back_when_stale_or_corrupt(tmp_path) -> None:
+    from catalog_snapshot import SnapshotLoader, build_snapshot
+
+    catalog_path = tmp_path / "catalog.json"
+    snapshot_path = tmp_path / "catalog.snap"
+    _write_catalog(catalog_path, [{"id": "g1", "name": "Milk"}])
+    loader = SnapshotLoader(snapshot_path, catalog_path)
+    assert loader.get() is None
+
+    build_snapshot(catalog_path, snapshot_path)
+    snapshot = loader.get()
+    assert snapshot is not None and snapshot.get_by_id("g1")["name"] == "Milk"
+    assert loader.get() is snapshot
+
+    _write_catalog(
+        catalog_path, [{"id": "g1", "name": "Milk"}, {"id": "g2", "name": "Eggs"}]
+    )
+    assert loader.get() is None
+
+    snapshot_path.write_bytes(b"FCSNAP01 truncated")
+    assert loader.get() is None
@@ -0,0 +1,224 @@
+import json
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+from order_ids import UlidGenerator, idempotency_key, new_order_id
+from order_journal import OrderJournal
+
+
+def test_order_journal_append_and_lookup(tmp_path) -> None:
+    journal = OrderJournal(tmp_path / "orders.ndjson")
+    for i in range(5):
+        journal.append({"order_id": f"ORDER_{i}", "total": i * 10})
+
+    assert len(journal) == 5
+    assert journal.get("ORDER_3") == {"order_id": "ORDER_3", "total": 30}
+    assert journal.get("ORDER_missing") is None
+
+    journal.append({"order_id": "ORDER_5", "total": 50})
+    assert journal.get("ORDER_5")["total"] == 50
+    assert [order["order_id"] for order in journal] == [f"ORDER_{i}" for i in range(6)]
+
+
+def test_order_journal_survives_torn_and_corrupt_lines(tmp_path) -> None:
+    path = tmp_path / "orders.ndjson"
+    path.write_text(
+        '{"order_id": "ORDER_1"}\nnot json\n{"order_id": "ORDER_2", "tot',
+        encoding="utf-8",
+    )
+    journal = OrderJournal(path)
+    assert [order["order_id"] for order in journal] == ["ORDER_1"]
+
+    journal.append({"order_id": "ORDER_3"})
+    assert journal.get("ORDER_3") == {"order_id": "ORDER_3"}
+    assert [order["order_id"] for order in journal] == ["ORDER_1", "ORDER_3"]
+
+    assert journal.compact() == 2
+    assert path.read_text(encoding="utf-8").count("\n") == 2
+    assert journal.get("ORDER_1") == {"order_id": "ORDER_1"}
+
+
+def test_order_journal_compact_keeps_latest_entry(tmp_path) -> None:
+    journal = OrderJournal(tmp_path / "orders.ndjson")
+    journal.append({"order_id": "ORDER_1", "status": "placed"})
+    journal.append({"order_id": "ORDER_2", "status": "placed"})
+    journal.append({"order_id": "ORDER_1", "status": "delivered"})
+
+    assert journal.get("ORDER_1")["status"] == "delivered"
+    assert journal.compact() == 2
+    assert [order["order_id"] for order in journal] == ["ORDER_2", "ORDER_1"]
+
+
+def test_order_journal_concurrent_appends(tmp_path) -> None:
+    journal = OrderJournal(tmp_path / "orders.ndjson")
+    # A second instance stands in for another worker process
+    other = OrderJournal(journal.path)
+
+    def place(target, prefix):
+        for i in range(200):
+            target.append({"order_id": f"{prefix}_{i}"})
+
+    threads = [
+        threading.Thread(target=place, args=(j, p))
+        for j, p in ((journal, "A"), (other, "B"))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(journal) == 400
+    assert len(other) == 400
+    assert journal.get("B_199") == {"order_id": "B_199"}
+
+
+def _append_from_process(path, worker: int, count: int) -> None:
+    journal = OrderJournal(path)
+    for n in range(count):
+        journal.append({"order_id": f"W{worker}_{n}"})
+
+
+def test_compaction_keeps_orders_appended_meanwhile(tmp_path) -> None:
+    journal = OrderJournal(tmp_path / "orders.ndjson")
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_append_from_process, args=(journal.path, w, 300))
+        for w in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+    while any(worker.is_alive() for worker in workers):
+        journal.compact()
+    for worker in workers:
+        worker.join()
+
+    journal.compact()
+    assert len(journal) == 600
+
+
+def _migrate_from_process(path, legacy) -> None:
+    OrderJournal(path).migrate_from_json(legacy)
+
+
+def test_concurrent_migrations_import_once(tmp_path) -> None:
+    legacy = tmp_path / "orders.json"
+    legacy.write_text(json.dumps([{"order_id": f"ORDER_{n}"} for n in range(50)]))
+    path = tmp_path / "orders.ndjson"
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_migrate_from_process, args=(path, legacy))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sum(1 for _ in OrderJournal(path)) == 50
+
+
+def test_order_journal_migrates_legacy_json(tmp_path) -> None:
+    legacy = tmp_path / "orders.json"
+    legacy.write_text(json.dumps([{"order_id": "ORDER_1"}, {"order_id": "ORDER_2"}]))
+    journal = OrderJournal(tmp_path / "orders.ndjson")
+
+    assert journal.migrate_from_json(legacy) == 2
+    assert journal.migrate_from_json(legacy) == 0
+    assert journal.get("ORDER_2") == {"order_id": "ORDER_2"}
+
+
+def test_order_ids_are_monotonic_and_sortable() -> None:
+    generator = UlidGenerator(clock=lambda: 1_700_000_000.0)
+    ids = [generator.new() for _ in range(1000)]
+    assert len(ids[0]) == 26
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+    later = UlidGenerator(clock=lambda: 1_700_000_000.001).new()
+    assert later > ids[-1]
+
+
+def test_idempotency_key_ignores_item_order() -> None:
+    items = [{"item_id": "g1", "quantity": 2}, {"item_id": "g2", "quantity": 1}]
+    assert idempotency_key("room:job", items) == idempotency_key(
+        "room:job", items[::-1]
+    )
+    assert idempotency_key("room:job", items) != idempotency_key("other:job", items)
+    assert idempotency_key("room:job", items) != idempotency_key("room:job", items[:1])
+
+
+def _use_tmp_orders(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(database, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(database, "ORDERS_PATH", tmp_path / "orders.json")
+    monkeypatch.setattr(database, "CURRENT_ORDER_PATH", tmp_path / "current_order.json")
+    monkeypatch.setattr(
+        database, "ORDER_JOURNAL", OrderJournal(tmp_path / "orders.ndjson")
+    )
+    monkeypatch.setattr(database, "_legacy_migrated", False)
+
+
+def test_save_order_is_idempotent(monkeypatch, tmp_path) -> None:
+    _use_tmp_orders(monkeypatch, tmp_path)
+    items = [{"item_id": "g1", "quantity": 1}]
+    key = idempotency_key("room:job", items)
+
+    first = database.save_order({"items": items}, idempotency_key=key)
+    order = {"items": items}
+    retry = database.save_order(order, idempotency_key=key)
+    assert retry == first
+    # The duplicate was not saved, so the caller's dict is left untouched
+    assert order == {"items": items}
+    assert len(database.get_all_orders()) == 1
+    assert database.find_order_by_idempotency_key(key)["order_id"] == first
+
+
+def test_concurrent_order_placement_has_no_duplicates(monkeypatch, tmp_path) -> None:
+    _use_tmp_orders(monkeypatch, tmp_path)
+    sessions = 1000
+
+    def place(n):
+        # Every session places its cart twice, as a retrying LLM would
+        items = [{"item_id": f"g{n % 7}", "quantity": 1 + n % 3}]
+        return n, database.save_order(
+            {"items": items}, idempotency_key=idempotency_key(f"room_{n}", items)
+        )
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        placed = list(pool.map(place, [n for n in range(sessions) for _ in range(2)]))
+
+    ids_by_session = {}
+    for n, order_id in placed:
+        ids_by_session.setdefault(n, set()).add(order_id)
+    assert all(len(ids) == 1 for ids in ids_by_session.values())
+
+    orders = database.get_all_orders()
+    assert len(orders) == sessions
+    assert len({order["order_id"] for order in orders}) == sessions
+
+
+def _place_from_process(path, worker: int, count: int) -> None:
+    journal = OrderJournal(path)
+    for n in range(count):
+        # Workers overlap on half their keys, as if a retry landed on another process
+        key = f"shared_{n}" if n % 2 else f"w{worker}_{n}"
+        journal.append_once({"order_id": new_order_id(), "idempotency_key": key})
+
+
+def test_concurrent_processes_share_idempotency_index(tmp_path) -> None:
+    path = tmp_path / "orders.ndjson"
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_place_from_process, args=(path, w, 500))
+        for w in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    orders = list(OrderJournal(path))
+    keys = [order["idempotency_key"] for order in orders]
+    assert len(keys) == len(set(keys)) == 4 * 250 + 250
+    assert len({order["order_id"] for order in orders}) == len(orders)
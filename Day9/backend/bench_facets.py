@@ -0,0 +1,208 @@
+"""
+Microbenchmark for the faceted product index.
+
+Compares the original list-comprehension filter_products with FacetIndex
+queries on synthetic catalogs (default up to 100k products with 20 variants
+each), and checks that both return the same products.
+
+Usage:
+    python bench_facets.py
+    python bench_facets.py --sizes 1000,100000 --variants 20 --queries 200
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from catalog_index import FacetIndex
+
+CATEGORIES = ["clothing", "accessories", "home_kitchen", "footwear", "electronics"]
+COLORS = [
+    "black",
+    "white",
+    "blue",
+    "gray",
+    "navy",
+    "red",
+    "brown",
+    "silver",
+    "green",
+    "yellow",
+    "pink",
+    "purple",
+    "orange",
+    "beige",
+    "maroon",
+    "olive",
+]
+SIZES = [
+    "XS",
+    "S",
+    "M",
+    "L",
+    "XL",
+    "XXL",
+    "28",
+    "30",
+    "32",
+    "34",
+    "36",
+    "standard",
+    "adjustable",
+    "350ml",
+    "500ml",
+    "750ml",
+    "1L",
+]
+
+
+def synthesize_products(
+    num_products: int, num_variants: int = 20, seed: int = 0
+) -> List[Dict[str, Any]]:
+    """Build PRODUCTS-shaped dicts with num_variants (size, color) variants each."""
+    rng = random.Random(seed)
+    products = []
+    for i in range(num_products):
+        base_price = rng.randint(199, 4999)
+        combos = rng.sample(
+            [(size, color) for size in SIZES for color in COLORS], num_variants
+        )
+        products.append(
+            {
+                "id": f"product-{i:06d}",
+                "name": f"Product {i}",
+                "description": f"Synthetic product {i}",
+                "category": rng.choice(CATEGORIES),
+                "base_price": base_price,
+                "currency": "INR",
+                "variants": [
+                    {
+                        "size": size,
+                        "color": color,
+                        "price": base_price + rng.choice([0, 50, 100]),
+                        "stock": rng.randint(0, 20),
+                    }
+                    for size, color in combos
+                ],
+            }
+        )
+    return products
+
+
+# Original implementation, kept here as the baseline
+
+
+def linear_filter_products(
+    products: List[Dict[str, Any]],
+    category: Optional[str] = None,
+    max_price: Optional[int] = None,
+    color: Optional[str] = None,
+    size: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    filtered = products.copy()
+    if category:
+        filtered = [p for p in filtered if p["category"].lower() == category.lower()]
+    if max_price:
+        filtered = [p for p in filtered if p["base_price"] <= max_price]
+    if color:
+        filtered = [
+            p
+            for p in filtered
+            if any(v["color"].lower() == color.lower() for v in p["variants"])
+        ]
+    if size:
+        filtered = [
+            p
+            for p in filtered
+            if any(v["size"].lower() == size.lower() for v in p["variants"])
+        ]
+    return filtered
+
+
+def random_filters(rng: random.Random) -> Dict[str, Any]:
+    """A browse request with one to four filters, as the LLM would send."""
+    filters = {
+        "category": rng.choice(CATEGORIES).title(),
+        "max_price": rng.choice([500, 1000, 2000, 3000]),
+        "color": rng.choice(COLORS),
+        "size": rng.choice(SIZES).lower(),
+    }
+    keep = rng.sample(list(filters), rng.randint(1, len(filters)))
+    return {name: filters[name] for name in keep}
+
+
+def time_per_call(
+    fn: Callable[[Dict[str, Any]], Any], queries: List[Dict[str, Any]]
+) -> float:
+    start = time.perf_counter()
+    for filters in queries:
+        fn(filters)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds:8.2f} s "
+
+
+def bench(num_products: int, num_variants: int, num_queries: int):
+    rng = random.Random(num_products)
+    products = synthesize_products(num_products, num_variants)
+    queries = [random_filters(rng) for _ in range(num_queries)]
+
+    start = time.perf_counter()
+    index = FacetIndex(products)
+    build = time.perf_counter() - start
+
+    for filters in queries[:20]:
+        expected = linear_filter_products(products, **filters)
+        assert index.query(**filters) == expected, (
+            f"index disagrees with linear filter for {filters}"
+        )
+
+    rows = [
+        (
+            "filter (linear)",
+            time_per_call(lambda f: linear_filter_products(products, **f), queries),
+        ),
+        ("filter (index)", time_per_call(lambda f: index.query(**f), queries)),
+        (
+            "first 10 (index)",
+            time_per_call(lambda f: index.query(limit=10, **f), queries),
+        ),
+        ("count (index)", time_per_call(lambda f: index.count(**f), queries)),
+    ]
+    print(
+        f"\n{num_products:,} products x {num_variants} variants  (index build {format_time(build).strip()})"
+    )
+    baseline = rows[0][1]
+    for label, seconds in rows:
+        print(f"  {label:<18} {format_time(seconds)}   {baseline / seconds:7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the faceted product index")
+    parser.add_argument(
+        "--sizes", default="1000,10000,100000", help="Comma-separated product counts"
+    )
+    parser.add_argument("--variants", type=int, default=20, help="Variants per product")
+    parser.add_argument(
+        "--queries", type=int, default=100, help="Browse requests per size"
+    )
+    args = parser.parse_args()
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        bench(size, args.variants, args.queries)
+
+
+if __name__ == "__main__":
+    main()
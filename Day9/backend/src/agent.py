@@ -2,7 +2,7 @@ import logging
 from typing import Annotated, List, Dict, Any, Optional
 import json
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 
 from dotenv import load_dotenv
@@ -13,6 +13,7 @@ from livekit.agents import (
     JobProcess,
     MetricsCollectedEvent,
     RoomInputOptions,
+    RunContext,
     WorkerOptions,
     cli,
     metrics,
@@ -22,6 +23,13 @@ from livekit.agents import (
 from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from cart import CartStore, ShopperState, ShoppingCart, customer_id_for
+from inventory import InsufficientStockError, Inventory, variant_key
+from order_store import OrderStore
+from product_catalog import CatalogLoader, ProductCatalog
+from tool_render import DEFAULT_TOKEN_BUDGET, render_table
+from recommendations import RecommendationIndex
+
 logger = logging.getLogger("ecommerce_agent")
 
 load_dotenv(".env")
@@ -30,145 +38,46 @@ load_dotenv(".env")
 # PRODUCT CATALOG
 # ============================================================================
 
-PRODUCTS = [
-    # CLOTHING CATEGORY
-    {
-        "id": "tshirt-001",
-        "name": "Classic Cotton T-Shirt",
-        "description": "Comfortable 100% cotton t-shirt, perfect for everyday wear",
-        "category": "clothing",
-        "base_price": 799,
-        "currency": "INR",
-        "variants": [
-            {"size": "S", "color": "black", "price": 799, "stock": 10},
-            {"size": "M", "color": "black", "price": 799, "stock": 15},
-            {"size": "L", "color": "black", "price": 849, "stock": 8},
-            {"size": "S", "color": "white", "price": 799, "stock": 12},
-            {"size": "M", "color": "white", "price": 799, "stock": 20},
-            {"size": "L", "color": "white", "price": 849, "stock": 5},
-            {"size": "M", "color": "blue", "price": 849, "stock": 10},
-        ]
-    },
-    {
-        "id": "hoodie-001",
-        "name": "Premium Fleece Hoodie",
-        "description": "Warm and cozy fleece hoodie with kangaroo pocket",
-        "category": "clothing",
-        "base_price": 1499,
-        "currency": "INR",
-        "variants": [
-            {"size": "M", "color": "black", "price": 1499, "stock": 8},
-            {"size": "L", "color": "black", "price": 1599, "stock": 6},
-            {"size": "XL", "color": "black", "price": 1699, "stock": 4},
-            {"size": "M", "color": "gray", "price": 1499, "stock": 10},
-            {"size": "L", "color": "gray", "price": 1599, "stock": 7},
-        ]
-    },
-    {
-        "id": "jeans-001",
-        "name": "Slim Fit Denim Jeans",
-        "description": "Stylish slim fit jeans with stretch fabric",
-        "category": "clothing",
-        "base_price": 1899,
-        "currency": "INR",
-        "variants": [
-            {"size": "30", "color": "blue", "price": 1899, "stock": 5},
-            {"size": "32", "color": "blue", "price": 1899, "stock": 8},
-            {"size": "34", "color": "blue", "price": 1899, "stock": 6},
-            {"size": "32", "color": "black", "price": 1999, "stock": 10},
-            {"size": "34", "color": "black", "price": 1999, "stock": 4},
-        ]
-    },
-    
-    # ACCESSORIES CATEGORY
-    {
-        "id": "backpack-001",
-        "name": "Travel Backpack 25L",
-        "description": "Durable water-resistant backpack with laptop compartment",
-        "category": "accessories",
-        "base_price": 1299,
-        "currency": "INR",
-        "variants": [
-            {"size": "standard", "color": "black", "price": 1299, "stock": 12},
-            {"size": "standard", "color": "navy", "price": 1299, "stock": 8},
-            {"size": "standard", "color": "gray", "price": 1349, "stock": 6},
-        ]
-    },
-    {
-        "id": "cap-001",
-        "name": "Baseball Cap",
-        "description": "Classic baseball cap with adjustable strap",
-        "category": "accessories",
-        "base_price": 499,
-        "currency": "INR",
-        "variants": [
-            {"size": "adjustable", "color": "black", "price": 499, "stock": 20},
-            {"size": "adjustable", "color": "white", "price": 499, "stock": 15},
-            {"size": "adjustable", "color": "red", "price": 549, "stock": 10},
-        ]
-    },
-    {
-        "id": "wallet-001",
-        "name": "Leather Wallet",
-        "description": "Genuine leather bifold wallet with RFID protection",
-        "category": "accessories",
-        "base_price": 899,
-        "currency": "INR",
-        "variants": [
-            {"size": "standard", "color": "brown", "price": 899, "stock": 15},
-            {"size": "standard", "color": "black", "price": 899, "stock": 12},
-        ]
-    },
-    
-    # HOME & KITCHEN CATEGORY
-    {
-        "id": "mug-001",
-        "name": "Ceramic Coffee Mug",
-        "description": "Handcrafted ceramic mug, perfect for coffee or tea",
-        "category": "home_kitchen",
-        "base_price": 349,
-        "currency": "INR",
-        "variants": [
-            {"size": "350ml", "color": "white", "price": 349, "stock": 25},
-            {"size": "350ml", "color": "black", "price": 349, "stock": 20},
-            {"size": "350ml", "color": "blue", "price": 399, "stock": 15},
-            {"size": "500ml", "color": "white", "price": 449, "stock": 10},
-        ]
-    },
-    {
-        "id": "bottle-001",
-        "name": "Stainless Steel Water Bottle",
-        "description": "Insulated water bottle keeps drinks cold for 24 hours",
-        "category": "home_kitchen",
-        "base_price": 799,
-        "currency": "INR",
-        "variants": [
-            {"size": "750ml", "color": "silver", "price": 799, "stock": 18},
-            {"size": "750ml", "color": "black", "price": 799, "stock": 14},
-            {"size": "1L", "color": "silver", "price": 899, "stock": 10},
-            {"size": "1L", "color": "blue", "price": 949, "stock": 8},
-        ]
-    },
-    {
-        "id": "lunchbox-001",
-        "name": "Premium Lunch Box Set",
-        "description": "3-compartment stainless steel lunch box with bag",
-        "category": "home_kitchen",
-        "base_price": 1199,
-        "currency": "INR",
-        "variants": [
-            {"size": "standard", "color": "silver", "price": 1199, "stock": 10},
-            {"size": "standard", "color": "black", "price": 1249, "stock": 8},
-        ]
-    },
-]
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+# Products are edited in data/catalog.json and served from a versioned SQLite
+# snapshot built from it. Summaries stay in memory, variants are read when a
+# tool needs them, and edits are picked up within seconds, without a restart.
+CATALOG = CatalogLoader(DATA_DIR / "catalog.db", source_path=DATA_DIR / "catalog.json")
 
 # ============================================================================
 # GLOBAL STATE
 # ============================================================================
 
-SHOPPING_CART: List[Dict[str, Any]] = []
-ORDERS_FILE = Path("orders.json")
+# Carts live in each session's ShopperState; see cart.py
+
+# Append-only order log with by-ID, per-customer and last-order indexes.
+# Orders used to be rewritten into orders.json; that file is imported once.
+ORDER_STORE = OrderStore(DATA_DIR / "orders.ndjson")
+LEGACY_ORDERS_FILE = Path("orders.json")
+ORDER_HISTORY_PAGE_SIZE = 5
+
+# Frequently-bought-together table, built offline by recommendations.py and
+# kept current from the order log as orders come in
+RECOMMENDATIONS_PATH = DATA_DIR / "recommendations.json"
+RECOMMENDATION_COUNT = 3
+
+# Approximate token budget for catalog tool responses, which stay in the
+# LLM context for the rest of the session; see tool_render.py
+TOOL_TOKEN_BUDGET = int(os.getenv("ECOMMERCE_TOOL_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+BROWSE_MAX_ROWS = 20
+# Full-text search answers with the few best matches; see text_search.py
+SEARCH_MAX_RESULTS = 3
+
+# Set to keep customer carts in SQLite, shared by all worker processes and
+# surviving restarts; otherwise carts are remembered per worker process only
+SHARED_CARTS_ENV = "ECOMMERCE_SHARED_CARTS"
+CART_DB_PATH = DATA_DIR / "carts.db"
+
+# Live stock and cart holds, shared by every worker process. The variant
+# "stock" in the catalog only seeds it the first time a variant is seen.
+INVENTORY_DB_PATH = DATA_DIR / "inventory.db"
+HOLD_SECONDS = 15 * 60
 
 # ============================================================================
 # AGENT INSTRUCTIONS
@@ -193,6 +102,7 @@ Price range: ₹349 to ₹1999 INR
 YOUR TOOLS:
 You have access to several tools to help customers:
 - `browse_catalog_tool`: Search products by category, price, color, or size
+- `search_products_tool`: Find products from a description of what the customer needs
 - `get_product_details_tool`: Get full details about a specific product
 - `add_to_cart_tool`: Add items to the shopping cart
 - `view_cart_tool`: Show what's currently in the cart
@@ -200,12 +110,16 @@ You have access to several tools to help customers:
 - `clear_cart_tool`: Empty the entire cart
 - `place_order_tool`: Complete the purchase
 - `get_last_order_tool`: Show the most recent order
+- `get_order_history_tool`: List past orders, optionally from the last N days, a page at a time
+- `recommend_products_tool`: Products other customers bought together with a product or the cart
 
 HOW TO HELP CUSTOMERS:
 
 1. **Browsing & Discovery**:
    - When customers ask to see products, use `browse_catalog_tool` with appropriate filters
    - Example: "Show me t-shirts under 1000" → filter by category="clothing" and max_price=1000
+   - When customers describe a need rather than a product ("something to keep my drinks cold",
+     "a bag for my laptop"), use `search_products_tool` with their words
    - Mention 2-3 relevant products with names and prices
    - Highlight key features
 
@@ -225,6 +139,9 @@ HOW TO HELP CUSTOMERS:
    - Help remove items with `remove_from_cart_tool` if they change their mind
    - Summarize the cart clearly: item names, quantities, and total price
 
+   - After adding an item, you may suggest one product from `recommend_products_tool`
+     ("Customers who bought this also got...") - suggest, don't push
+
 5. **Checkout**:
    - When customers are ready to buy, use `place_order_tool`
    - Share the order ID and total amount
@@ -267,22 +184,15 @@ Remember: Your goal is to help customers find what they need and complete their
 # HELPER FUNCTIONS
 # ============================================================================
 
-def load_orders() -> List[Dict[str, Any]]:
-    """Load existing orders from JSON file."""
-    if ORDERS_FILE.exists():
-        try:
-            with open(ORDERS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return []
-    return []
-
 def save_order(order: Dict[str, Any]):
-    """Save a new order to JSON file."""
-    orders = load_orders()
-    orders.append(order)
-    with open(ORDERS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(orders, f, indent=2, ensure_ascii=False)
+    """Append a new order to the order store."""
+    ORDER_STORE.append(order)
+
+def summarize_order(order: Dict[str, Any]) -> str:
+    """One line per order, for order history listings."""
+    items = ", ".join(f"{item['product_name']} x{item['quantity']}" for item in order['items'])
+    return (f"{order['order_id']} on {order['created_at'][:10]}: {items} - "
+            f"₹{order['total_amount']} ({order['status']})")
 
 def generate_order_id() -> str:
     """Generate a unique order ID."""
@@ -290,44 +200,40 @@ def generate_order_id() -> str:
     return f"ORD-{timestamp}"
 
 def find_product(product_id: str) -> Optional[Dict[str, Any]]:
-    """Find a product by ID."""
-    for product in PRODUCTS:
-        if product["id"] == product_id:
-            return product
-    return None
+    """Find a product summary by ID."""
+    return CATALOG.get().get(product_id)
 
 def filter_products(
     category: Optional[str] = None,
     max_price: Optional[int] = None,
     color: Optional[str] = None,
-    size: Optional[str] = None
+    size: Optional[str] = None,
+    limit: Optional[int] = None
 ) -> List[Dict[str, Any]]:
-    """Filter products based on criteria."""
-    filtered = PRODUCTS.copy()
-    
-    if category:
-        filtered = [p for p in filtered if p["category"].lower() == category.lower()]
-    
-    if max_price:
-        filtered = [p for p in filtered if p["base_price"] <= max_price]
-    
-    if color:
-        filtered = [
-            p for p in filtered 
-            if any(v["color"].lower() == color.lower() for v in p["variants"])
-        ]
-    
-    if size:
-        filtered = [
-            p for p in filtered 
-            if any(v["size"].lower() == size.lower() for v in p["variants"])
-        ]
-    
-    return filtered
+    """Filter products based on criteria, in catalog order."""
+    return CATALOG.get().index.query(limit=limit, **_facet_filters(category, max_price, color, size))
 
-def calculate_cart_total() -> int:
+def count_products(
+    category: Optional[str] = None,
+    max_price: Optional[int] = None,
+    color: Optional[str] = None,
+    size: Optional[str] = None
+) -> int:
+    """Number of products matching the criteria, without building the list."""
+    return CATALOG.get().index.count(**_facet_filters(category, max_price, color, size))
+
+def _facet_filters(category, max_price, color, size) -> Dict[str, Any]:
+    # Empty values mean "no filter", as the LLM often passes "" or 0
+    return {
+        "category": category or None,
+        "max_price": max_price or None,
+        "color": color or None,
+        "size": size or None,
+    }
+
+def calculate_cart_total(cart: ShoppingCart) -> int:
     """Calculate total cart value."""
-    return sum(item["total_price"] for item in SHOPPING_CART)
+    return cart.total()
 
 # ============================================================================
 # PREWARM
@@ -340,6 +246,34 @@ def prewarm(proc: JobProcess):
     # Load VAD model
     proc.userdata["vad"] = silero.VAD.load()
     logger.info("✅ VAD loaded")
+    
+    # Cart store shared by every session in this worker (or every worker, with SQLite)
+    shared = bool(os.getenv(SHARED_CARTS_ENV))
+    proc.userdata["cart_store"] = CartStore(db_path=CART_DB_PATH if shared else None)
+    logger.info(f"✅ Cart store ready ({'SQLite' if shared else 'in-memory'})")
+    
+    inventory = Inventory(db_path=INVENTORY_DB_PATH, hold_seconds=HOLD_SECONDS)
+    
+    def seed_stock(catalog: ProductCatalog):
+        # Variants added by a catalog reload get their starting stock too
+        inventory.seed({
+            variant_key(product_id, v["size"], v["color"]): v["stock"]
+            for product_id, v in catalog.iter_variants()
+        })
+    
+    CATALOG.on_load(seed_stock)
+    proc.userdata["inventory"] = inventory
+    catalog = CATALOG.get()
+    logger.info(f"✅ Catalog {catalog.version} and inventory ready ({len(catalog)} products)")
+    
+    migrated = ORDER_STORE.migrate_from_json(LEGACY_ORDERS_FILE)
+    if migrated:
+        logger.info(f"✅ Imported {migrated} orders from {LEGACY_ORDERS_FILE}")
+    
+    recommendations = RecommendationIndex.load(RECOMMENDATIONS_PATH)
+    new_orders = recommendations.catch_up(ORDER_STORE)
+    proc.userdata["recommendations"] = recommendations
+    logger.info(f"✅ Recommendations ready ({len(recommendations.item_counts)} products, {new_orders} new orders)")
 
 # ============================================================================
 # MAIN AGENT
@@ -349,6 +283,9 @@ async def entrypoint(ctx: JobContext):
     """Main entry point for the E-commerce Agent."""
     
     ctx.log_context_fields = {"room": ctx.room.name}
+    cart_store: CartStore = ctx.proc.userdata["cart_store"]
+    inventory: Inventory = ctx.proc.userdata["inventory"]
+    recommendations: RecommendationIndex = ctx.proc.userdata["recommendations"]
     
     class EcommerceAgent(Agent):
         """Voice Shopping Assistant Agent"""
@@ -367,20 +304,52 @@ async def entrypoint(ctx: JobContext):
             """Browse the product catalog with optional filters."""
             logger.info(f"Browsing catalog: category={category}, max_price={max_price}, color={color}, size={size}")
             
-            filtered_products = filter_products(category, max_price, color, size)
-            
-            if not filtered_products:
+            total = count_products(category, max_price, color, size)
+            if not total:
                 return "No products found matching your criteria. Try adjusting your filters."
             
-            result = f"Found {len(filtered_products)} product(s):\n\n"
-            for product in filtered_products[:10]:  # Limit to 10 results
-                result += f"- {product['name']} ({product['id']})\n"
-                result += f"  Category: {product['category'].replace('_', ' ').title()}\n"
-                result += f"  Price: ₹{product['base_price']} {product['currency']}\n"
-                result += f"  Description: {product['description']}\n"
-                result += f"  Available colors: {', '.join(set(v['color'] for v in product['variants']))}\n\n"
-            
-            return result
+            products = filter_products(category, max_price, color, size, limit=BROWSE_MAX_ROWS)
+            return render_table(
+                f"Found {total} product(s)",
+                ["id", "name", "price", "category", "colors", "about"],
+                [
+                    [p['id'], p['name'], f"₹{p['base_price']}", p['category'], p['colors'], p['description']]
+                    for p in products
+                ],
+                total=total,
+                budget=TOOL_TOKEN_BUDGET,
+                more_hint="add filters (category, price, color, size) to narrow down",
+                tool="browse_catalog_tool",
+            )
+        
+        @function_tool
+        async def search_products_tool(
+            self,
+            query: Annotated[str, "What the customer is looking for, in their words (e.g., 'keep drinks cold')"],
+            category: Annotated[Optional[str], "Only search this category: 'clothing', 'accessories', or 'home_kitchen'"] = None,
+            max_price: Annotated[Optional[int], "Maximum price in INR"] = None
+        ) -> str:
+            """Find products whose name or description matches what the customer describes."""
+            logger.info(f"Searching catalog: query={query!r}, category={category}, max_price={max_price}")
+            
+            catalog = CATALOG.get()
+            only = None
+            if category or max_price:
+                only = [p['id'] for p in catalog.index.query(**_facet_filters(category, max_price, None, None))]
+            matches = catalog.text_index.search(query, limit=SEARCH_MAX_RESULTS, only=only)
+            if not matches:
+                return f"No products match '{query}'. Try browse_catalog_tool with a category instead."
+            
+            return render_table(
+                f"Best {len(matches)} match(es) for '{query}'",
+                ["id", "name", "price", "category", "about"],
+                [
+                    [p['id'], p['name'], f"₹{p['base_price']}", p['category'], p['description']]
+                    for p, _ in matches
+                ],
+                budget=TOOL_TOKEN_BUDGET,
+                tool="search_products_tool",
+            )
         
         @function_tool
         async def get_product_details_tool(
@@ -390,49 +359,73 @@ async def entrypoint(ctx: JobContext):
             """Get detailed information about a specific product including all variants."""
             logger.info(f"Getting details for product: {product_id}")
             
-            product = find_product(product_id)
+            catalog = CATALOG.get()
+            product = catalog.get(product_id)
             if not product:
                 return f"Product '{product_id}' not found."
             
-            result = f"📦 {product['name']} ({product['id']})\n\n"
-            result += f"Description: {product['description']}\n"
-            result += f"Category: {product['category'].replace('_', ' ').title()}\n"
-            result += f"Base Price: ₹{product['base_price']} {product['currency']}\n\n"
-            result += "Available Variants:\n"
-            
-            for variant in product['variants']:
-                result += f"- Size: {variant['size']}, Color: {variant['color']}, "
-                result += f"Price: ₹{variant['price']}, Stock: {variant['stock']}\n"
-            
-            return result
+            # Variant detail is loaded from the catalog snapshot on demand
+            variants = catalog.variants(product_id)
+            keys = [variant_key(product['id'], variant['size'], variant['color']) for variant in variants]
+            stock = inventory.available_many(keys)
+            rows = [
+                [variant['size'], variant['color'], f"₹{variant['price']}", max(stock[key], 0)]
+                for variant, key in zip(variants, keys)
+            ]
+            
+            return render_table(
+                f"{len(variants)} variant(s)",
+                ["size", "color", "price", "stock"],
+                rows,
+                budget=TOOL_TOKEN_BUDGET,
+                more_hint="ask about a specific size or color",
+                preamble=[
+                    f"📦 {product['name']} ({product['id']}), "
+                    f"{product['category'].replace('_', ' ')}, from ₹{product['base_price']} {product['currency']}",
+                    product['description'],
+                ],
+                tool="get_product_details_tool",
+            )
         
         @function_tool
         async def add_to_cart_tool(
             self,
+            context: RunContext[ShopperState],
             product_id: Annotated[str, "The product ID to add"],
-            size: Annotated[str, "The size variant (e.g., 'M', 'L', 'standard')"],
-            color: Annotated[str, "The color variant (e.g., 'black', 'white')"],
+            size: Annotated[str, "The size variant (e.g., 'M', 'L', 'standard'; 'medium' also works)"],
+            color: Annotated[str, "The color variant (e.g., 'black', 'white'; 'grey' also works)"],
             quantity: Annotated[int, "Quantity to add (default: 1)"] = 1
         ) -> str:
             """Add a product to the shopping cart."""
             logger.info(f"Adding to cart: {product_id}, size={size}, color={color}, qty={quantity}")
             
-            product = find_product(product_id)
+            if quantity < 1:
+                return "Quantity must be at least 1."
+            
+            catalog = CATALOG.get()
+            product = catalog.get(product_id)
             if not product:
                 return f"Product '{product_id}' not found."
             
-            # Find matching variant
-            variant = None
-            for v in product['variants']:
-                if v['size'].lower() == size.lower() and v['color'].lower() == color.lower():
-                    variant = v
-                    break
+            # Find matching variant ("medium"/"grey" resolve to "M"/"gray")
+            variant = catalog.resolve_variant(product_id, size, color)
             
             if not variant:
-                return f"Variant not found. {product['name']} is not available in size {size} and color {color}."
-            
-            if variant['stock'] < quantity:
-                return f"Sorry, only {variant['stock']} units available in stock."
+                sizes, colors = catalog.variant_options(product_id)
+                return (f"Variant not found. {product['name']} is not available in size {size} and color {color}. "
+                        f"Sizes: {', '.join(sizes)}. Colors: {', '.join(colors)}.")
+            # Use the catalog's spelling from here on
+            size, color = variant['size'], variant['color']
+            
+            # Hold the units for this session so nobody else can buy them meanwhile
+            try:
+                inventory.reserve(
+                    context.userdata.session_id,
+                    variant_key(product_id, size, color),
+                    quantity,
+                )
+            except InsufficientStockError as e:
+                return f"Sorry, only {e.available} units available in stock."
             
             # Add to cart
             cart_item = {
@@ -444,82 +437,86 @@ async def entrypoint(ctx: JobContext):
                 "total_price": variant['price'] * quantity
             }
             
-            SHOPPING_CART.append(cart_item)
+            cart = context.userdata.cart
+            line = cart.add(cart_item)
+            # Saved line by line, so the cart is still there on the customer's next call
+            if context.userdata.customer_id:
+                cart_store.save_line(context.userdata.customer_id, line)
             
-            cart_total = calculate_cart_total()
-            return (f"✅ Added {quantity}x {product['name']} ({size}, {color}) to your cart.\n"
+            cart_total = calculate_cart_total(cart)
+            in_cart = f" (now {line['quantity']} in cart)" if line is not cart_item else ""
+            return (f"✅ Added {quantity}x {product['name']} ({size}, {color}) to your cart{in_cart}.\n"
                    f"Item price: ₹{cart_item['total_price']}\n"
                    f"Cart total: ₹{cart_total} INR\n"
-                   f"Total items in cart: {len(SHOPPING_CART)}")
+                   f"Total items in cart: {len(cart)}")
         
         @function_tool
-        async def view_cart_tool(self) -> str:
+        async def view_cart_tool(self, context: RunContext[ShopperState]) -> str:
             """View the current shopping cart contents."""
             logger.info("Viewing cart")
             
-            if not SHOPPING_CART:
-                return "Your shopping cart is empty. Browse our products to add items!"
-            
-            result = f"🛒 Your Shopping Cart ({len(SHOPPING_CART)} item(s)):\n\n"
-            
-            for i, item in enumerate(SHOPPING_CART, 1):
-                result += f"{i}. {item['product_name']}\n"
-                result += f"   Size: {item['variant']['size']}, Color: {item['variant']['color']}\n"
-                result += f"   Quantity: {item['quantity']}, Price: ₹{item['total_price']}\n\n"
-            
-            total = calculate_cart_total()
-            result += f"💰 Total: ₹{total} INR"
-            
-            return result
+            return context.userdata.cart.render()
         
         @function_tool
         async def remove_from_cart_tool(
             self,
+            context: RunContext[ShopperState],
             product_id: Annotated[str, "The product ID to remove"]
         ) -> str:
             """Remove a product from the shopping cart."""
             logger.info(f"Removing from cart: {product_id}")
             
-            initial_count = len(SHOPPING_CART)
-            # Filter out items with matching product_id
-            filtered_cart = [item for item in SHOPPING_CART if item['product_id'] != product_id]
-            removed_count = initial_count - len(filtered_cart)
-            
-            # Clear and repopulate the cart
-            SHOPPING_CART.clear()
-            SHOPPING_CART.extend(filtered_cart)
+            cart = context.userdata.cart
+            removed_count = cart.remove_product(product_id)
             
             if removed_count == 0:
                 return f"Product '{product_id}' not found in cart."
+            inventory.release(context.userdata.session_id, product_id=product_id)
+            if context.userdata.customer_id:
+                cart_store.remove_product(context.userdata.customer_id, product_id)
             
-            cart_total = calculate_cart_total()
+            cart_total = calculate_cart_total(cart)
             return (f"✅ Removed {removed_count} item(s) from cart.\n"
                    f"Cart total: ₹{cart_total} INR\n"
-                   f"Items remaining: {len(SHOPPING_CART)}")
+                   f"Items remaining: {len(cart)}")
         
         @function_tool
-        async def clear_cart_tool(self) -> str:
+        async def clear_cart_tool(self, context: RunContext[ShopperState]) -> str:
             """Clear all items from the shopping cart."""
             logger.info("Clearing cart")
             
-            item_count = len(SHOPPING_CART)
-            SHOPPING_CART.clear()
+            item_count = context.userdata.cart.clear()
+            inventory.release(context.userdata.session_id)
+            if context.userdata.customer_id:
+                cart_store.clear(context.userdata.customer_id)
             
             return f"✅ Cart cleared. Removed {item_count} item(s)."
         
         @function_tool
-        async def place_order_tool(self) -> str:
+        async def place_order_tool(self, context: RunContext[ShopperState]) -> str:
             """Place an order with the current cart contents."""
             logger.info("Placing order")
             
-            if not SHOPPING_CART:
+            cart = context.userdata.cart
+            if not cart:
                 return "Your cart is empty. Add some products before placing an order!"
             
+            # Take the units out of stock; fails without changes if any ran out
+            try:
+                inventory.commit(context.userdata.session_id, cart.variant_quantities())
+            except InsufficientStockError as e:
+                product_id, size, color = e.key
+                product = find_product(product_id)
+                name = product['name'] if product else product_id
+                return (f"Sorry, only {e.available} units of {name} ({size}, {color}) are left. "
+                        f"Please update your cart and try again.")
+            
             # Create order object
             order = {
                 "order_id": generate_order_id(),
-                "items": SHOPPING_CART.copy(),
-                "total_amount": calculate_cart_total(),
+                "customer_id": context.userdata.customer_id,
+                "items": cart.to_list(),
+                "total_amount": calculate_cart_total(cart),
                 "currency": "INR",
                 "created_at": datetime.now().isoformat(),
                 "status": "confirmed"
@@ -529,8 +526,9 @@ async def entrypoint(ctx: JobContext):
             save_order(order)
             
             # Clear cart
-            item_count = len(SHOPPING_CART)
-            SHOPPING_CART.clear()
+            item_count = cart.clear()
+            if context.userdata.customer_id:
+                cart_store.clear(context.userdata.customer_id)
             
             result = f"🎉 Order Placed Successfully!\n\n"
             result += f"Order ID: {order['order_id']}\n"
@@ -542,16 +540,16 @@ async def entrypoint(ctx: JobContext):
             return result
         
         @function_tool
-        async def get_last_order_tool(self) -> str:
+        async def get_last_order_tool(self, context: RunContext[ShopperState]) -> str:
             """Get details of the most recent order."""
             logger.info("Getting last order")
             
-            orders = load_orders()
-            if not orders:
+            # Only this customer's orders, never another shopper's
+            customer_id = context.userdata.customer_id
+            last_order = ORDER_STORE.last(customer_id) if customer_id else None
+            if not last_order:
                 return "No orders found. You haven't placed any orders yet."
             
-            last_order = orders[-1]
-            
             result = f"📦 Your Last Order\n\n"
             result += f"Order ID: {last_order['order_id']}\n"
             result += f"Date: {last_order['created_at']}\n"
@@ -566,12 +564,79 @@ async def entrypoint(ctx: JobContext):
             result += f"\n💰 Total: ₹{last_order['total_amount']} INR"
             
             return result
+        
+        @function_tool
+        async def get_order_history_tool(
+            self,
+            context: RunContext[ShopperState],
+            days: Annotated[Optional[int], "Only orders from the last N days (e.g., 30 for 'last month')"] = None,
+            page: Annotated[int, "Page of results, newest first (default: 1)"] = 1
+        ) -> str:
+            """List the customer's past orders, newest first, a few at a time."""
+            logger.info(f"Getting order history: days={days}, page={page}")
+            
+            customer_id = context.userdata.customer_id
+            if not customer_id:
+                return "No orders found. You haven't placed any orders yet."
+            
+            since = (datetime.now() - timedelta(days=days)).isoformat() if days else None
+            orders, total = ORDER_STORE.history(
+                customer_id, page=page, page_size=ORDER_HISTORY_PAGE_SIZE, since=since
+            )
+            period = f" in the last {days} days" if days else ""
+            if not total:
+                return f"No orders found{period}."
+            if not orders:
+                return f"There are only {total} order(s){period}; page {page} is past the end."
+            
+            first = (page - 1) * ORDER_HISTORY_PAGE_SIZE + 1
+            result = f"📜 Orders {first}-{first + len(orders) - 1} of {total}{period}:\n\n"
+            result += "\n".join(f"- {summarize_order(order)}" for order in orders)
+            if first + len(orders) - 1 < total:
+                result += f"\n\nAsk for page {page + 1} to see older orders."
+            
+            return result
+        
+        @function_tool
+        async def recommend_products_tool(
+            self,
+            context: RunContext[ShopperState],
+            product_id: Annotated[Optional[str], "Product to find companions for (default: the current cart)"] = None
+        ) -> str:
+            """Suggest products that customers often bought together with a product or the cart."""
+            logger.info(f"Recommending products for: {product_id or 'cart'}")
+            
+            # Count any orders placed since the last lookup (by any worker)
+            recommendations.catch_up(ORDER_STORE)
+            in_cart = [item['product_id'] for item in context.userdata.cart]
+            basis = [product_id] if product_id else list(dict.fromkeys(in_cart))
+            
+            catalog = CATALOG.get()
+            suggestions = recommendations.recommend(basis, k=RECOMMENDATION_COUNT + 2, exclude=in_cart)
+            heading = "Often bought together"
+            if not suggestions:
+                suggestions = recommendations.popular(k=RECOMMENDATION_COUNT + 2, exclude=basis + in_cart)
+                heading = "Popular with other customers"
+            # Products dropped from the catalog since are skipped
+            products = [catalog.get(pid) for pid, _ in suggestions if catalog.get(pid)][:RECOMMENDATION_COUNT]
+            if not products:
+                return "No recommendations yet. Suggest browsing the catalog instead."
+            
+            return render_table(
+                heading,
+                ["id", "name", "price", "category"],
+                [[p['id'], p['name'], f"₹{p['base_price']}", p['category']] for p in products],
+                budget=TOOL_TOKEN_BUDGET,
+                tool="recommend_products_tool",
+            )
     
     # Create agent instance
     shopping_agent = EcommerceAgent()
     
-    # Set up voice AI pipeline
-    session = AgentSession(
+    # Set up voice AI pipeline; each session gets its own cart
+    shopper = ShopperState(session_id=f"{ctx.room.name}:{ctx.job.id}")
+    session = AgentSession[ShopperState](
+        userdata=shopper,
         stt=deepgram.STT(model="nova-3"),
         llm=google.LLM(model="gemini-2.5-flash"),
         tts=murf.TTS(
@@ -599,6 +664,13 @@ async def entrypoint(ctx: JobContext):
     
     ctx.add_shutdown_callback(log_usage)
     
+    async def release_holds():
+        released = inventory.release(shopper.session_id)
+        if released:
+            logger.info(f"Released {released} held unit(s) for {shopper.session_id}")
+    
+    ctx.add_shutdown_callback(release_holds)
+    
     # Start the session
     await session.start(
         agent=shopping_agent,
@@ -610,6 +682,21 @@ async def entrypoint(ctx: JobContext):
     
     await ctx.connect()
     
+    # Restore a returning customer's saved cart
+    participant = await ctx.wait_for_participant()
+    shopper.customer_id = customer_id_for(participant)
+    if shopper.customer_id and not shopper.cart:
+        shopper.cart = cart_store.load(shopper.customer_id)
+        if shopper.cart:
+            logger.info(f"Restored cart with {len(shopper.cart)} item(s) for {shopper.customer_id}")
+        # Hold stock for the restored items again; anything sold out meanwhile
+        # is caught when the order is placed
+        for key, quantity in shopper.cart.variant_quantities().items():
+            try:
+                inventory.reserve(shopper.session_id, key, quantity)
+            except InsufficientStockError:
+                logger.info(f"Could not hold {quantity}x {key} for restored cart")
+    
     logger.info("🛒 E-commerce Agent is live! Ready to help customers shop...")
     
     # Send initial greeting
@@ -0,0 +1,242 @@
+"""
+Per-session shopping carts for the e-commerce agent.
+
+Every AgentSession owns its own ShoppingCart (via session userdata), so
+concurrent shoppers in the same worker process never see each other's items.
+A CartStore can additionally keep carts by customer ID, so a returning
+customer finds their cart again on the next call. The store keeps one row
+per cart line, so a change to the cart writes only the line that changed.
+It lives in memory by default; given a database path it is kept in SQLite
+and shared by every worker process.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from inventory import VariantKey, variant_key
+
+
+def _copy_line(line: Dict[str, Any]) -> Dict[str, Any]:
+    return dict(line, variant=dict(line["variant"]))
+
+
+class ShoppingCart:
+    """Cart lines for one shopper, one line per (product, size, color).
+
+    Adding a variant that is already in the cart raises that line's quantity
+    instead of adding a second line. The total and the rendered cart text
+    are kept up to date on each change, so reading them does not walk the
+    cart. Lines should only be changed through the cart's methods.
+    """
+
+    def __init__(self, lines: Optional[List[Dict[str, Any]]] = None, copy: bool = True):
+        """Start with lines, copied unless copy=False hands them over to the cart."""
+        self._lines: Dict[VariantKey, Dict[str, Any]] = {}
+        self._by_product: Dict[str, List[VariantKey]] = {}
+        self._total = 0
+        self._rendered: Optional[str] = None
+        # Built through add(), so the total and product index start out consistent
+        for line in lines or []:
+            self.add(_copy_line(line) if copy else line)
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __bool__(self) -> bool:
+        return bool(self._lines)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._lines.values())
+
+    @staticmethod
+    def _key(line: Dict[str, Any]) -> VariantKey:
+        return variant_key(
+            line["product_id"], line["variant"]["size"], line["variant"]["color"]
+        )
+
+    def add(self, line: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a line, merging it into the line for the same variant; returns the cart's line."""
+        key = self._key(line)
+        existing = self._lines.get(key)
+        if existing is None:
+            existing = self._lines[key] = line
+            self._by_product.setdefault(line["product_id"], []).append(key)
+        else:
+            existing["quantity"] += line["quantity"]
+            existing["total_price"] += line["total_price"]
+        self._total += line["total_price"]
+        self._rendered = None
+        return existing
+
+    def remove_product(self, product_id: str) -> int:
+        """Remove every line for a product; returns how many were removed."""
+        keys = self._by_product.pop(product_id, [])
+        for key in keys:
+            self._total -= self._lines.pop(key)["total_price"]
+        if keys:
+            self._rendered = None
+        return len(keys)
+
+    def clear(self) -> int:
+        count = len(self._lines)
+        self._lines = {}
+        self._by_product = {}
+        self._total = 0
+        self._rendered = None
+        return count
+
+    def total(self) -> int:
+        return self._total
+
+    def variant_quantities(self) -> Dict[VariantKey, int]:
+        """Units per variant, as the inventory counts them."""
+        return {key: line["quantity"] for key, line in self._lines.items()}
+
+    def render(self) -> str:
+        """The cart as the shopper hears it; rebuilt only after the cart changes."""
+        if self._rendered is None:
+            if not self._lines:
+                self._rendered = (
+                    "Your shopping cart is empty. Browse our products to add items!"
+                )
+            else:
+                parts = [f"🛒 Your Shopping Cart ({len(self._lines)} item(s)):\n\n"]
+                for i, item in enumerate(self._lines.values(), 1):
+                    parts.append(
+                        f"{i}. {item['product_name']}\n"
+                        f"   Size: {item['variant']['size']}, Color: {item['variant']['color']}\n"
+                        f"   Quantity: {item['quantity']}, Price: ₹{item['total_price']}\n\n"
+                    )
+                parts.append(f"💰 Total: ₹{self._total} INR")
+                self._rendered = "".join(parts)
+        return self._rendered
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """A deep copy of the lines, safe to store in an order or persist."""
+        return json.loads(json.dumps(list(self._lines.values())))
+
+
+@dataclass
+class ShopperState:
+    """AgentSession userdata: everything that belongs to one shopping session."""
+
+    cart: ShoppingCart = field(default_factory=ShoppingCart)
+    customer_id: Optional[str] = None
+    # Identifies this session's stock holds in the inventory
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+def customer_id_for(participant) -> Optional[str]:
+    """Customer ID from participant metadata ({"customer_id": ...}), else the identity."""
+    try:
+        metadata = json.loads(participant.metadata or "{}")
+    except json.JSONDecodeError:
+        metadata = {}
+    if isinstance(metadata, dict) and metadata.get("customer_id"):
+        return str(metadata["customer_id"])
+    return participant.identity or None
+
+
+class CartStore:
+    """Carts kept by customer ID, one entry per line, so a cart survives across calls."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = db_path
+        self._carts: Dict[str, Dict[VariantKey, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        if db_path:
+            self._init_table()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_table(self):
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cart_lines (
+                    customer_id TEXT NOT NULL,
+                    product_id TEXT NOT NULL,
+                    size TEXT NOT NULL,
+                    color TEXT NOT NULL,
+                    line TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (customer_id, product_id, size, color)
+                )
+                """
+            )
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, customer_id: str, line: Dict[str, Any]):
+        product_id, size, color = ShoppingCart._key(line)
+        conn.execute(
+            """
+            INSERT INTO cart_lines (customer_id, product_id, size, color, line, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(customer_id, product_id, size, color) DO UPDATE SET
+                line = excluded.line, updated_at = excluded.updated_at
+            """,
+            (customer_id, product_id, size, color, json.dumps(line), time.time()),
+        )
+
+    def load(self, customer_id: str) -> ShoppingCart:
+        """The customer's saved cart, or an empty one. The cart is a private copy."""
+        if self.db_path:
+            with self._transaction() as conn:
+                rows = conn.execute(
+                    # rowid keeps the order lines were first added in
+                    "SELECT line FROM cart_lines WHERE customer_id = ? ORDER BY rowid",
+                    (customer_id,),
+                ).fetchall()
+            return ShoppingCart([json.loads(row[0]) for row in rows], copy=False)
+        with self._lock:
+            return ShoppingCart(list(self._carts.get(customer_id, {}).values()))
+
+    def save_line(self, customer_id: str, line: Dict[str, Any]):
+        """Save one line of the customer's cart, as the cart now holds it."""
+        if self.db_path:
+            with self._transaction() as conn:
+                self._upsert(conn, customer_id, line)
+            return
+        with self._lock:
+            self._carts.setdefault(customer_id, {})[ShoppingCart._key(line)] = (
+                _copy_line(line)
+            )
+
+    def remove_product(self, customer_id: str, product_id: str):
+        """Forget every saved line for a product."""
+        if self.db_path:
+            with self._transaction() as conn:
+                conn.execute(
+                    "DELETE FROM cart_lines WHERE customer_id = ? AND product_id = ?",
+                    (customer_id, product_id),
+                )
+            return
+        with self._lock:
+            lines = self._carts.get(customer_id, {})
+            for key in [key for key in lines if key[0] == product_id]:
+                del lines[key]
+
+    def clear(self, customer_id: str):
+        if self.db_path:
+            with self._transaction() as conn:
+                conn.execute(
+                    "DELETE FROM cart_lines WHERE customer_id = ?", (customer_id,)
+                )
+            return
+        with self._lock:
+            self._carts.pop(customer_id, None)
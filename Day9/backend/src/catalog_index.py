@@ -0,0 +1,125 @@
+"""
+Faceted product index for catalog browsing.
+
+Products are numbered by price rank, and each category, color and size is a
+bitset (a Python int) over those numbers. A price range is then a contiguous
+run of bits found with bisect on the sorted price array, so a multi-filter
+browse is a few bitwise ANDs instead of rescanning every product and variant.
+Sizes and colors are normalized as in variant_index, so a spoken "grey" or
+"medium" filters like the catalog's "gray" and "M".
+"""
+
+from bisect import bisect_left, bisect_right
+from heapq import nsmallest
+from itertools import zip_longest
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from variant_index import normalize_color, normalize_size
+
+# Set bit positions for every byte value, for walking a bitset a byte at a time
+_BYTE_BITS = [
+    tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)
+]
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Positions of the set bits in mask, lowest first."""
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        if byte:
+            base = offset * 8
+            for bit in _BYTE_BITS[byte]:
+                yield base + bit
+
+
+def _offered(product: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+    """(size, color) pairs to index: a product's variants, or a catalog summary's lists."""
+    if "variants" in product:
+        return ((variant["size"], variant["color"]) for variant in product["variants"])
+    return zip_longest(product["sizes"], product["colors"])
+
+
+def _to_masks(bits: Dict[str, bytearray]) -> Dict[str, int]:
+    return {value: int.from_bytes(data, "little") for value, data in bits.items()}
+
+
+class FacetIndex:
+    """Bitset facets and a sorted price array over a product list."""
+
+    def __init__(self, products: List[Dict[str, Any]]):
+        self.products = list(products)
+        # Bit b is the product with the b-th lowest base price (ties keep catalog order)
+        self._positions = sorted(
+            range(len(self.products)), key=lambda i: self.products[i]["base_price"]
+        )
+        self._prices = [self.products[i]["base_price"] for i in self._positions]
+        self._by_id = {product["id"]: product for product in self.products}
+
+        size_bytes = (len(self.products) + 7) // 8
+        categories: Dict[str, bytearray] = {}
+        colors: Dict[str, bytearray] = {}
+        sizes: Dict[str, bytearray] = {}
+        for bit, position in enumerate(self._positions):
+            product = self.products[position]
+            byte, flag = bit >> 3, 1 << (bit & 7)
+            facets = [(categories, product["category"].lower())]
+            for size, color in _offered(product):
+                if color is not None:
+                    facets.append((colors, normalize_color(color)))
+                if size is not None:
+                    facets.append((sizes, normalize_size(size)))
+            for table, value in facets:
+                data = table.get(value)
+                if data is None:
+                    data = table[value] = bytearray(size_bytes)
+                data[byte] |= flag
+        self._categories = _to_masks(categories)
+        self._colors = _to_masks(colors)
+        self._sizes = _to_masks(sizes)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(product_id)
+
+    def mask(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        color: Optional[str] = None,
+        size: Optional[str] = None,
+    ) -> int:
+        """Bitset of the products matching every given filter."""
+        low = bisect_left(self._prices, min_price) if min_price is not None else 0
+        high = (
+            bisect_right(self._prices, max_price)
+            if max_price is not None
+            else len(self._prices)
+        )
+        if low >= high:
+            return 0
+        mask = (1 << high) - (1 << low)
+        facets = (
+            (self._categories, category and category.lower()),
+            (self._colors, color and normalize_color(color)),
+            (self._sizes, size and normalize_size(size)),
+        )
+        for table, value in facets:
+            if value is not None:
+                mask &= table.get(value, 0)
+                if not mask:
+                    break
+        return mask
+
+    def count(self, **filters: Any) -> int:
+        return bin(self.mask(**filters)).count("1")
+
+    def query(
+        self, limit: Optional[int] = None, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """Matching products in catalog order, at most limit of them."""
+        positions = (self._positions[bit] for bit in iter_bits(self.mask(**filters)))
+        ordered = sorted(positions) if limit is None else nsmallest(limit, positions)
+        return [self.products[i] for i in ordered]
@@ -0,0 +1,385 @@
+"""
+Stock reservations for product variants.
+
+Adding an item to a cart places a time-limited hold on that variant's stock,
+placing the order commits the held units (decrementing stock), and removing
+items, clearing the cart or ending the session releases the hold. Expired
+holds stop counting as soon as they are looked at, so an abandoned cart
+cannot lock stock forever.
+
+In memory, each variant is guarded by one of a fixed set of striped locks,
+so sessions reserving different variants do not wait on each other. With a
+database path the stock and holds live in SQLite instead, and every
+check-and-reserve runs in a write transaction, so worker processes cannot
+oversell between them either. SQLite allows one writer at a time, so
+changes there are serialized rather than striped. Stock reads run as plain
+read transactions that never take the write lock, and each thread reuses
+its own connection.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+VariantKey = Tuple[
+    str, str, str
+]  # (product_id, size, color), size and color lower-cased
+
+DEFAULT_HOLD_SECONDS = 15 * 60
+DEFAULT_STRIPES = 64
+
+
+def variant_key(product_id: str, size: str, color: str) -> VariantKey:
+    return (product_id, size.lower(), color.lower())
+
+
+class InsufficientStockError(Exception):
+    """Raised when a reservation or order needs more units than are available."""
+
+    def __init__(self, key: VariantKey, available: int):
+        super().__init__(f"only {available} unit(s) of {key} available")
+        self.key = key
+        self.available = available
+
+
+class _MemoryTables:
+    """Stock and holds in dicts; callers hold the stripe lock of every key they touch."""
+
+    def __init__(self):
+        self._on_hand: Dict[VariantKey, int] = {}
+        self._holds: Dict[VariantKey, Dict[str, Tuple[int, float]]] = {}
+        # Which keys each session holds; shared across stripes, so it has its own lock
+        self._session_keys: Dict[str, set] = {}
+        self._sessions_lock = threading.Lock()
+
+    def seed(self, key: VariantKey, quantity: int):
+        self._on_hand.setdefault(key, quantity)
+
+    def on_hand(self, key: VariantKey) -> Optional[int]:
+        return self._on_hand.get(key)
+
+    def add_on_hand(self, key: VariantKey, delta: int):
+        self._on_hand[key] = self._on_hand.get(key, 0) + delta
+
+    def available(self, key: VariantKey, now: float) -> int:
+        held = sum(
+            quantity
+            for quantity, expires in self._holds.get(key, {}).values()
+            if expires > now
+        )
+        return self._on_hand.get(key, 0) - held
+
+    def session_holds(self, session_id: str, now: float) -> Dict[VariantKey, int]:
+        holds = {}
+        for key in self.session_keys(session_id):
+            quantity, expires = self._holds.get(key, {}).get(session_id, (0, now))
+            if expires > now:
+                holds[key] = quantity
+        return holds
+
+    def holds_for(self, key: VariantKey, now: float) -> Dict[str, int]:
+        holds = self._holds.get(key, {})
+        for session_id in [s for s, (_, expires) in holds.items() if expires <= now]:
+            self.set_hold(session_id, key, 0, now)
+        return {session_id: quantity for session_id, (quantity, _) in holds.items()}
+
+    def set_hold(
+        self, session_id: str, key: VariantKey, quantity: int, expires_at: float
+    ):
+        holds = self._holds.setdefault(key, {})
+        with self._sessions_lock:
+            keys = self._session_keys.setdefault(session_id, set())
+            if quantity > 0:
+                holds[session_id] = (quantity, expires_at)
+                keys.add(key)
+            else:
+                holds.pop(session_id, None)
+                keys.discard(key)
+                if not keys:
+                    del self._session_keys[session_id]
+
+    def session_keys(self, session_id: str) -> List[VariantKey]:
+        with self._sessions_lock:
+            return list(self._session_keys.get(session_id, ()))
+
+
+class _SqliteTables:
+    """The same operations against an open SQLite transaction."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def seed(self, key: VariantKey, quantity: int):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO stock (product_id, size, color, on_hand) VALUES (?, ?, ?, ?)",
+            (*key, quantity),
+        )
+
+    def on_hand(self, key: VariantKey) -> Optional[int]:
+        row = self.conn.execute(
+            "SELECT on_hand FROM stock WHERE product_id = ? AND size = ? AND color = ?",
+            key,
+        ).fetchone()
+        return row[0] if row else None
+
+    def add_on_hand(self, key: VariantKey, delta: int):
+        self.conn.execute(
+            "UPDATE stock SET on_hand = on_hand + ? WHERE product_id = ? AND size = ? AND color = ?",
+            (delta, *key),
+        )
+
+    def available(self, key: VariantKey, now: float) -> int:
+        row = self.conn.execute(
+            """
+            SELECT
+                COALESCE((SELECT on_hand FROM stock WHERE product_id = ? AND size = ? AND color = ?), 0)
+                - COALESCE((SELECT SUM(quantity) FROM holds
+                            WHERE product_id = ? AND size = ? AND color = ? AND expires_at > ?), 0)
+            """,
+            (*key, *key, now),
+        ).fetchone()
+        return row[0]
+
+    def session_holds(self, session_id: str, now: float) -> Dict[VariantKey, int]:
+        rows = self.conn.execute(
+            "SELECT product_id, size, color, quantity FROM holds WHERE session_id = ? AND expires_at > ?",
+            (session_id, now),
+        )
+        return {
+            (product_id, size, color): quantity
+            for product_id, size, color, quantity in rows.fetchall()
+        }
+
+    def holds_for(self, key: VariantKey, now: float) -> Dict[str, int]:
+        self.conn.execute(
+            "DELETE FROM holds WHERE product_id = ? AND size = ? AND color = ? AND expires_at <= ?",
+            (*key, now),
+        )
+        rows = self.conn.execute(
+            "SELECT session_id, quantity FROM holds WHERE product_id = ? AND size = ? AND color = ?",
+            key,
+        )
+        return dict(rows.fetchall())
+
+    def set_hold(
+        self, session_id: str, key: VariantKey, quantity: int, expires_at: float
+    ):
+        if quantity > 0:
+            self.conn.execute(
+                """
+                INSERT INTO holds (session_id, product_id, size, color, quantity, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(session_id, product_id, size, color) DO UPDATE SET
+                    quantity = excluded.quantity, expires_at = excluded.expires_at
+                """,
+                (session_id, *key, quantity, expires_at),
+            )
+        else:
+            self.conn.execute(
+                "DELETE FROM holds WHERE session_id = ? AND product_id = ? AND size = ? AND color = ?",
+                (session_id, *key),
+            )
+
+    def session_keys(self, session_id: str) -> List[VariantKey]:
+        rows = self.conn.execute(
+            "SELECT product_id, size, color FROM holds WHERE session_id = ?",
+            (session_id,),
+        )
+        return [tuple(row) for row in rows.fetchall()]
+
+
+class Inventory:
+    """Check-and-reserve stock with per-session holds."""
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        hold_seconds: float = DEFAULT_HOLD_SECONDS,
+        stripes: int = DEFAULT_STRIPES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.db_path = db_path
+        self.hold_seconds = hold_seconds
+        self._clock = clock
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._memory = None if db_path else _MemoryTables()
+        self._local = threading.local()
+        if db_path:
+            self._init_tables()
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use.
+
+        Autocommit mode, so every transaction is begun explicitly: BEGIN
+        IMMEDIATE takes the write lock before a check-and-reserve reads.
+        """
+        # A forked worker must not share its parent's connection
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.conn = sqlite3.connect(
+                self.db_path, timeout=30, isolation_level=None
+            )
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def _init_tables(self):
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS stock (
+                        product_id TEXT NOT NULL,
+                        size TEXT NOT NULL,
+                        color TEXT NOT NULL,
+                        on_hand INTEGER NOT NULL,
+                        PRIMARY KEY (product_id, size, color)
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS holds (
+                        session_id TEXT NOT NULL,
+                        product_id TEXT NOT NULL,
+                        size TEXT NOT NULL,
+                        color TEXT NOT NULL,
+                        quantity INTEGER NOT NULL,
+                        expires_at REAL NOT NULL,
+                        PRIMARY KEY (session_id, product_id, size, color)
+                    )
+                    """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS holds_by_variant ON holds (product_id, size, color)"
+                )
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _striped(self, keys: Iterable[VariantKey]) -> Iterator[None]:
+        """Hold the stripe locks for keys, in a fixed order."""
+        stripes = sorted({hash(key) % len(self._stripes) for key in keys})
+        with ExitStack() as stack:
+            for stripe in stripes:
+                stack.enter_context(self._stripes[stripe])
+            yield
+
+    @contextmanager
+    def _locked(self, keys: Iterable[VariantKey]) -> Iterator:
+        """Tables for a check-and-change of keys: their stripe locks, or a SQLite write transaction."""
+        if self._memory is not None:
+            with self._striped(keys):
+                yield self._memory
+            return
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield _SqliteTables(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def _reading(self, keys: Iterable[VariantKey]) -> Iterator:
+        """Tables for a consistent read of keys; in SQLite, a read transaction that never blocks writers."""
+        if self._memory is not None:
+            with self._striped(keys):
+                yield self._memory
+            return
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            yield _SqliteTables(conn)
+        finally:
+            conn.execute("COMMIT")
+
+    def seed(self, stock: Dict[VariantKey, int]):
+        """Set starting stock for variants the store does not know yet."""
+        with self._locked(stock) as tables:
+            for key, quantity in stock.items():
+                tables.seed(key, quantity)
+
+    def available(self, key: VariantKey) -> int:
+        """Units on hand minus units held by any session."""
+        return self.available_many([key])[key]
+
+    def available_many(self, keys: Iterable[VariantKey]) -> Dict[VariantKey, int]:
+        """available() for several variants, read together."""
+        keys = list(keys)
+        now = self._clock()
+        with self._reading(keys) as tables:
+            return {key: tables.available(key, now) for key in keys}
+
+    def held(self, session_id: str) -> Dict[VariantKey, int]:
+        """The session's unexpired holds."""
+        keys = self._memory.session_keys(session_id) if self._memory is not None else []
+        with self._reading(keys) as tables:
+            return tables.session_holds(session_id, self._clock())
+
+    def _session_keys(self, session_id: str) -> List[VariantKey]:
+        if self._memory is not None:
+            return self._memory.session_keys(session_id)
+        with self._reading([]) as tables:
+            return tables.session_keys(session_id)
+
+    def reserve(self, session_id: str, key: VariantKey, quantity: int) -> int:
+        """Hold quantity more units for the session; returns the session's new hold.
+
+        Raises InsufficientStockError if fewer units are available. Reserving again
+        restarts the hold's expiry.
+        """
+        if quantity <= 0:
+            raise ValueError("quantity must be positive")
+        now = self._clock()
+        with self._locked([key]) as tables:
+            holds = tables.holds_for(key, now)
+            available = (tables.on_hand(key) or 0) - sum(holds.values())
+            if available < quantity:
+                raise InsufficientStockError(key, max(available, 0))
+            total = holds.get(session_id, 0) + quantity
+            tables.set_hold(session_id, key, total, now + self.hold_seconds)
+        return total
+
+    def release(self, session_id: str, product_id: Optional[str] = None) -> int:
+        """Drop the session's holds (only one product's, if given); returns units released."""
+        keys = [
+            key
+            for key in self._session_keys(session_id)
+            if product_id is None or key[0] == product_id
+        ]
+        now = self._clock()
+        released = 0
+        with self._locked(keys) as tables:
+            for key in keys:
+                released += tables.holds_for(key, now).get(session_id, 0)
+                tables.set_hold(session_id, key, 0, now)
+        return released
+
+    def commit(self, session_id: str, demand: Dict[VariantKey, int]):
+        """Take the ordered units out of stock and drop the session's holds.
+
+        Units the session still holds are guaranteed; anything not held (an
+        expired hold, or a cart restored from an earlier call) must still be
+        available. All or nothing: raises InsufficientStockError and changes
+        nothing if any variant falls short.
+        """
+        keys = set(demand) | set(self._session_keys(session_id))
+        now = self._clock()
+        with self._locked(keys) as tables:
+            for key, quantity in demand.items():
+                holds = tables.holds_for(key, now)
+                others = sum(holds.values()) - holds.get(session_id, 0)
+                available = (tables.on_hand(key) or 0) - others
+                if available < quantity:
+                    raise InsufficientStockError(key, max(available, 0))
+            for key in keys:
+                tables.set_hold(session_id, key, 0, now)
+            for key, quantity in demand.items():
+                tables.add_on_hand(key, -quantity)
@@ -0,0 +1,259 @@
+"""
+Append-only order store for the e-commerce agent.
+
+Orders are stored one JSON object per line (NDJSON), so saving an order is a
+single O_APPEND write, however long the order history gets. An in-memory
+index, extended incrementally as the file grows (also by other worker
+processes), keeps:
+
+- order_id -> byte offset, for lookups by ID;
+- customer_id -> offsets and created_at times, for paginated history;
+- a tail pointer per customer and for the whole store, for the last order.
+
+Each of these reads exactly one line from disk.
+"""
+
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are still serialized within the process
+    fcntl = None
+
+logger = logging.getLogger("ecommerce_agent")
+
+
+def _encode(order: Dict[str, Any]) -> bytes:
+    return (json.dumps(order, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _append_lines(fd: int, data: bytes) -> int:
+    """Write data at the end of a locked O_APPEND descriptor; returns the offset it starts at.
+
+    A crash mid-write can leave a torn last line, so data starts on a fresh one.
+    """
+    size = os.fstat(fd).st_size
+    prefix = b"\n" if size and os.pread(fd, 1, size - 1) != b"\n" else b""
+    os.write(fd, prefix + data)
+    return size + len(prefix)
+
+
+class OrderStore:
+    """NDJSON order log with by-ID, per-customer and tail indexes."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset_index()
+        self._index_signature: Optional[Tuple[int, int]] = None
+
+    def _reset_index(self):
+        self._offsets: Dict[str, int] = {}
+        self._customer_offsets: Dict[str, List[int]] = {}
+        self._customer_times: Dict[str, List[str]] = {}
+        self._tail: Optional[int] = None
+        self._indexed_upto = 0
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _locked_file(self) -> Iterator[int]:
+        """An O_APPEND descriptor, exclusively locked against other processes."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield fd
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def append(self, order: Dict[str, Any]) -> int:
+        """Append an order and return the byte offset it was written at."""
+        line = _encode(order)
+        with self._lock:
+            with self._locked_file() as fd:
+                offset = _append_lines(fd, line)
+
+            if self._index_signature is not None and self._indexed_upto == offset:
+                # Nothing else was appended since the last scan; extend the index in place
+                self._index_order(order, offset)
+                self._indexed_upto = offset + len(line)
+        return offset
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _scan(self, start: int) -> Iterator[Tuple[int, Optional[Dict[str, Any]], int]]:
+        """Yield (offset, order, next_offset) for every complete line from start.
+
+        order is None for a corrupt line; an unterminated last line (a write
+        still in progress, or torn by a crash) is not yielded at all.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(start)
+                offset = start
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        return
+                    next_offset = offset + len(raw)
+                    order = None
+                    if raw.strip():
+                        try:
+                            order = json.loads(raw)
+                        except json.JSONDecodeError:
+                            logger.warning(
+                                f"Skipping corrupt order log line at offset {offset}"
+                            )
+                    yield offset, order, next_offset
+                    offset = next_offset
+        except FileNotFoundError:
+            return
+
+    def _refresh_index(self):
+        """Index any orders appended since the last scan (by this or another process)."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset_index()
+            return
+        signature = (stat.st_ino, stat.st_dev)
+        if signature != self._index_signature or stat.st_size < self._indexed_upto:
+            # File was replaced or truncated: rebuild from scratch
+            self._reset_index()
+            self._index_signature = signature
+        if stat.st_size == self._indexed_upto:
+            return
+        for offset, order, next_offset in self._scan(self._indexed_upto):
+            if order:
+                self._index_order(order, offset)
+            self._indexed_upto = next_offset
+
+    def _index_order(self, order: Dict[str, Any], offset: int):
+        order_id = order.get("order_id")
+        if not order_id:
+            return
+        self._offsets[order_id] = offset
+        self._tail = offset
+        customer_id = order.get("customer_id")
+        if customer_id:
+            offsets = self._customer_offsets.setdefault(customer_id, [])
+            times = self._customer_times.setdefault(customer_id, [])
+            created_at = order.get("created_at", "")
+            if times and created_at < times[-1]:
+                # Clock stepped back; keep the times sorted for bisect
+                created_at = times[-1]
+            offsets.append(offset)
+            times.append(created_at)
+
+    def _read_at(self, offset: int) -> Dict[str, Any]:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a single order by ID without reading the rest of the log."""
+        with self._lock:
+            self._refresh_index()
+            offset = self._offsets.get(order_id)
+        return self._read_at(offset) if offset is not None else None
+
+    def last(self, customer_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The most recent order, of one customer or of the whole store."""
+        with self._lock:
+            self._refresh_index()
+            if customer_id is None:
+                offset = self._tail
+            else:
+                offsets = self._customer_offsets.get(customer_id)
+                offset = offsets[-1] if offsets else None
+        return self._read_at(offset) if offset is not None else None
+
+    def history(
+        self,
+        customer_id: str,
+        page: int = 1,
+        page_size: int = 5,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of a customer's orders, newest first, and how many match in total.
+
+        since and until are ISO timestamps bounding created_at (until is
+        exclusive); the range is found by bisect, so only the page is read.
+        """
+        with self._lock:
+            self._refresh_index()
+            offsets = self._customer_offsets.get(customer_id, [])
+            times = self._customer_times.get(customer_id, [])
+            low = bisect_left(times, since) if since else 0
+            high = bisect_left(times, until) if until else len(times)
+            total = max(high - low, 0)
+            end = high - (max(page, 1) - 1) * page_size
+            page_offsets = (
+                offsets[max(end - page_size, low) : end][::-1] if end > low else []
+            )
+        return [self._read_at(offset) for offset in page_offsets], total
+
+    def read_from(self, offset: int) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """Orders written at or after a byte offset, each with the offset just past it.
+
+        Lets a consumer follow the log: remember the last next_offset and
+        continue from there.
+        """
+        for _, order, next_offset in self._scan(offset):
+            if order is not None:
+                yield order, next_offset
+
+    def file_id(self) -> Optional[Tuple[int, int]]:
+        """(inode, device) of the log, which changes if the file is replaced."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_dev)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Stream every order in the order it was placed."""
+        for _, order, _ in self._scan(0):
+            if order is not None:
+                yield order
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh_index()
+            return len(self._offsets)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def migrate_from_json(self, legacy_path: Path) -> int:
+        """Import orders from the old orders.json array, if the store is empty.
+
+        Runs under the file lock, so workers starting together import once.
+        """
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                orders = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        with self._lock, self._locked_file() as fd:
+            if os.fstat(fd).st_size > 0:
+                return 0
+            _append_lines(fd, b"".join(_encode(order) for order in orders))
+        logger.info(f"Migrated {len(orders)} orders from {legacy_path} to {self.path}")
+        return len(orders)
@@ -0,0 +1,389 @@
+"""
+Product catalog for the e-commerce agent, loaded from data files.
+
+Products are edited in data/catalog.json and served from a versioned SQLite
+snapshot (data/catalog.db) built from it. Only product summaries (name,
+category, price and the sizes and colors on offer) and the facet and
+full-text indexes over them are kept in memory; a product's variants are
+read from the snapshot when a tool needs them, and the most recently used
+ones are cached.
+
+CatalogLoader notices a new snapshot, or a catalog.json newer than the
+snapshot, builds the new version in a background thread and swaps it in
+without a restart; lookups keep using the current version meanwhile. A
+snapshot is replaced atomically, so a catalog that is still in use keeps
+reading the version it opened until it is retired a minute later.
+
+Usage:
+    python src/product_catalog.py build   # data/catalog.json -> data/catalog.db
+    python src/product_catalog.py info
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from catalog_index import FacetIndex
+from text_search import TextIndex
+from variant_index import VariantIndex
+
+logger = logging.getLogger("ecommerce_agent")
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DEFAULT_SOURCE_PATH = DATA_DIR / "catalog.json"
+DEFAULT_DB_PATH = DATA_DIR / "catalog.db"
+
+SUMMARY_FIELDS = ("id", "name", "description", "category", "base_price", "currency")
+
+
+def _unique(values: Iterator[str]) -> List[str]:
+    return list(dict.fromkeys(values))
+
+
+def build_snapshot(source_path: Path, db_path: Path) -> str:
+    """Convert a catalog.json into a new snapshot at db_path; returns its version."""
+    raw = source_path.read_bytes()
+    products = json.loads(raw)["products"]
+    version = hashlib.sha256(raw).hexdigest()[:12]
+
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_name(f"{db_path.name}.{os.getpid()}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    conn = sqlite3.connect(tmp_path)
+    try:
+        with conn:
+            conn.execute(
+                "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE products (
+                    position INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    name TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    base_price INTEGER NOT NULL,
+                    currency TEXT NOT NULL,
+                    sizes TEXT NOT NULL,
+                    colors TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE variants (
+                    product_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    size TEXT NOT NULL,
+                    color TEXT NOT NULL,
+                    price INTEGER NOT NULL,
+                    stock INTEGER NOT NULL,
+                    PRIMARY KEY (product_id, position)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.executemany(
+                "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        position,
+                        *(product.get(field, "") for field in SUMMARY_FIELDS),
+                        json.dumps(_unique(v["size"] for v in product["variants"])),
+                        json.dumps(_unique(v["color"] for v in product["variants"])),
+                    )
+                    for position, product in enumerate(products)
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO variants VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        product["id"],
+                        position,
+                        v["size"],
+                        v["color"],
+                        v["price"],
+                        v.get("stock", 0),
+                    )
+                    for product in products
+                    for position, v in enumerate(product["variants"])
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [
+                    ("version", version),
+                    ("built_at", str(time.time())),
+                    ("products", str(len(products))),
+                ],
+            )
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    return version
+
+
+class ProductCatalog:
+    """One snapshot version: summaries and facet index in memory, variants on demand."""
+
+    def __init__(self, db_path: Path, variant_cache_size: int = 1024):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(
+            f"file:{db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self._cache_size = variant_cache_size
+        self._variants: OrderedDict[str, Tuple[List[Dict[str, Any]], VariantIndex]] = (
+            OrderedDict()
+        )
+
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        self.version: str = meta["version"]
+        self.products: List[Dict[str, Any]] = []
+        for row in self._conn.execute(
+            "SELECT id, name, description, category, base_price, currency, sizes, colors "
+            "FROM products ORDER BY position"
+        ):
+            summary = dict(zip(SUMMARY_FIELDS, row[:6]))
+            summary["sizes"] = json.loads(row[6])
+            summary["colors"] = json.loads(row[7])
+            self.products.append(summary)
+        self.index = FacetIndex(self.products)
+        self.text_index = TextIndex(self.products)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def close(self):
+        """Close the snapshot connection; variants not already cached can no longer be read."""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """A product summary (no variants)."""
+        return self.index.get(product_id)
+
+    def _load_variants(
+        self, product_id: str
+    ) -> Tuple[List[Dict[str, Any]], VariantIndex]:
+        with self._lock:
+            cached = self._variants.get(product_id)
+            if cached is not None:
+                self._variants.move_to_end(product_id)
+                return cached
+            rows = self._conn.execute(
+                "SELECT size, color, price, stock FROM variants WHERE product_id = ? ORDER BY position",
+                (product_id,),
+            ).fetchall()
+            variants = [
+                {"size": size, "color": color, "price": price, "stock": stock}
+                for size, color, price, stock in rows
+            ]
+            cached = (
+                variants,
+                VariantIndex([{"id": product_id, "variants": variants}]),
+            )
+            self._variants[product_id] = cached
+            if len(self._variants) > self._cache_size:
+                self._variants.popitem(last=False)
+            return cached
+
+    def variants(self, product_id: str) -> List[Dict[str, Any]]:
+        """The product's variants, read from the snapshot on first use."""
+        return self._load_variants(product_id)[0]
+
+    def resolve_variant(
+        self, product_id: str, size: str, color: str
+    ) -> Optional[Dict[str, Any]]:
+        return self._load_variants(product_id)[1].resolve(product_id, size, color)
+
+    def variant_options(self, product_id: str) -> Tuple[List[str], List[str]]:
+        summary = self.get(product_id)
+        return (summary["sizes"], summary["colors"]) if summary else ([], [])
+
+    def iter_variants(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Stream (product_id, variant) for the whole catalog, e.g. to seed stock."""
+        # Streams from this version's connection (the file on disk may be newer)
+        with self._lock:
+            for product_id, size, color, price, stock in self._conn.execute(
+                "SELECT product_id, size, color, price, stock FROM variants"
+            ):
+                yield (
+                    product_id,
+                    {"size": size, "color": color, "price": price, "stock": stock},
+                )
+
+
+class CatalogLoader:
+    """The current ProductCatalog, rebuilt in the background when the snapshot or its source changes."""
+
+    def __init__(
+        self,
+        db_path: Path = DEFAULT_DB_PATH,
+        source_path: Optional[Path] = DEFAULT_SOURCE_PATH,
+        check_interval: float = 5.0,
+        retire_after: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.db_path = db_path
+        self.source_path = source_path
+        self.check_interval = check_interval
+        # Grace period before a replaced version's database connection is closed
+        self.retire_after = retire_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._current: Optional[ProductCatalog] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        # The last catalog.json built, or that failed to build; not built again until it changes
+        self._built_source: Optional[Tuple[int, int]] = None
+        self._checked_at: Optional[float] = None
+        self._reload: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[ProductCatalog], None]] = []
+
+    def on_load(self, callback: Callable[[ProductCatalog], None]):
+        """Call callback with every catalog version loaded from now on.
+
+        Reloads run in a background thread, so callbacks must be thread-safe.
+        """
+        self._listeners.append(callback)
+
+    def get(self) -> ProductCatalog:
+        """The current catalog.
+
+        The first call loads it. After that, a new version is looked for at
+        most every check_interval seconds and built in a background thread
+        while the current one keeps serving, so get() never waits for a
+        rebuild.
+        """
+        now = self._clock()
+        current = self._current
+        if current is not None and now - self._checked_at < self.check_interval:
+            return current
+        with self._lock:
+            if self._current is None:
+                self._checked_at = now
+                self._refresh()
+            elif now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                reloading = self._reload is not None and self._reload.is_alive()
+                if not reloading and self._changed():
+                    self._reload = threading.Thread(
+                        target=self._reload_in_background,
+                        name="catalog-reload",
+                        daemon=True,
+                    )
+                    self._reload.start()
+            return self._current
+
+    def wait_for_reload(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a background reload in progress; False if it is still running after timeout."""
+        reload = self._reload
+        if reload is not None:
+            reload.join(timeout)
+            return not reload.is_alive()
+        return True
+
+    def _source_signature(self) -> Optional[Tuple[int, int]]:
+        """Signature of a catalog.json that is newer than the snapshot, if any."""
+        if self.source_path is None or not self.source_path.exists():
+            return None
+        source = self.source_path.stat()
+        if self.db_path.exists() and self.db_path.stat().st_mtime >= source.st_mtime:
+            return None
+        return (source.st_mtime_ns, source.st_size)
+
+    def _changed(self) -> bool:
+        """Whether there is a new snapshot to load or a new source to build (stat calls only)."""
+        source = self._source_signature()
+        if source is not None and source != self._built_source:
+            return True
+        try:
+            stat = self.db_path.stat()
+        except FileNotFoundError:
+            return False
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns) != self._signature
+
+    def _reload_in_background(self):
+        try:
+            self._refresh()
+        except Exception:
+            logger.exception(
+                f"Keeping catalog version {self._current.version}; reload failed"
+            )
+
+    def _refresh(self):
+        source = self._source_signature()
+        if source is not None and source != self._built_source:
+            self._built_source = source
+            try:
+                version = build_snapshot(self.source_path, self.db_path)
+            except Exception:
+                if self._current is not None or self.db_path.exists():
+                    logger.exception(
+                        f"Could not build a snapshot from {self.source_path}"
+                    )
+                else:
+                    raise
+            else:
+                logger.info(
+                    f"📦 Built catalog snapshot {version} from {self.source_path}"
+                )
+        stat = self.db_path.stat()
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if signature == self._signature:
+            return
+        catalog = ProductCatalog(self.db_path)
+        for callback in self._listeners:
+            callback(catalog)
+        previous = self._current
+        self._current, self._signature = catalog, signature
+        logger.info(
+            f"📦 Catalog version {catalog.version} loaded ({len(catalog)} products)"
+        )
+        if previous is not None:
+            self._retire(previous)
+
+    def _retire(self, catalog: ProductCatalog):
+        """Close a replaced version once sessions that still hold it are likely done with it."""
+        if self.retire_after <= 0:
+            catalog.close()
+            return
+        timer = threading.Timer(self.retire_after, catalog.close)
+        timer.daemon = True
+        timer.start()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Build or inspect the product catalog snapshot."
+    )
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--source", type=Path, default=DEFAULT_SOURCE_PATH)
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB_PATH)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "build":
+        version = build_snapshot(args.source, args.db)
+        print(f"✅ Built catalog snapshot {version} at {args.db}")
+    else:
+        catalog = ProductCatalog(args.db)
+        variants = sum(1 for _ in catalog.iter_variants())
+        print(
+            f"📦 {args.db}: version {catalog.version}, {len(catalog)} products, {variants} variants"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
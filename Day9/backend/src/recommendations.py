@@ -0,0 +1,201 @@
+"""
+Frequently-bought-together recommendations from order history.
+
+A sparse co-occurrence matrix (product -> product -> number of orders that
+contained both) is counted from the order log, together with a top-k
+neighbor table per product, so a recommendation is a dictionary lookup.
+Within a product's row, neighbors are ranked by co-occurrence count, which
+is the same order as the confidence P(other | product).
+
+The index remembers how far into the order log it has read. catch_up()
+counts only the orders appended since then and re-ranks only the products
+those orders contained, so it stays current as orders come in. The offline
+build saves the index to data/recommendations.json, so a worker does not
+replay the whole history at startup.
+
+Usage:
+    python src/recommendations.py build
+"""
+
+import argparse
+import heapq
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from order_store import OrderStore
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DEFAULT_ORDERS_PATH = DATA_DIR / "orders.ndjson"
+DEFAULT_INDEX_PATH = DATA_DIR / "recommendations.json"
+# Keep more neighbors than a reply shows, so some remain after excluding the cart
+DEFAULT_TOP_K = 10
+
+
+def order_products(order: Dict[str, Any]) -> Set[str]:
+    return {
+        item["product_id"] for item in order.get("items", []) if item.get("product_id")
+    }
+
+
+class RecommendationIndex:
+    """Co-occurrence counts and top-k neighbors, kept in step with the order log."""
+
+    def __init__(self, k: int = DEFAULT_TOP_K):
+        self.k = k
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.item_counts: Dict[str, int] = {}
+        self.pair_counts: Dict[str, Dict[str, int]] = {}
+        self.neighbors: Dict[str, List[Tuple[str, int]]] = {}
+        self.offset = 0
+        self.log_id: Optional[Tuple[int, int]] = None
+        self._popular: Optional[List[Tuple[str, int]]] = None
+
+    def _count(self, products: Set[str]):
+        for product in products:
+            self.item_counts[product] = self.item_counts.get(product, 0) + 1
+            row = self.pair_counts.setdefault(product, {})
+            for other in products:
+                if other != product:
+                    row[other] = row.get(other, 0) + 1
+
+    def _rerank(self, products: Iterable[str]):
+        for product in products:
+            row = self.pair_counts.get(product)
+            if row:
+                self.neighbors[product] = heapq.nsmallest(
+                    self.k, row.items(), key=lambda kv: (-kv[1], kv[0])
+                )
+        self._popular = None
+
+    def catch_up(self, store: OrderStore) -> int:
+        """Count orders appended to the store since the last call; returns how many."""
+        with self._lock:
+            log_id = store.file_id()
+            if log_id != self.log_id:
+                # New or replaced log: count it from the start
+                self._reset()
+                self.log_id = log_id
+            touched: Set[str] = set()
+            count = 0
+            for order, next_offset in store.read_from(self.offset):
+                products = order_products(order)
+                self._count(products)
+                touched |= products
+                self.offset = next_offset
+                count += 1
+            if touched:
+                self._rerank(touched)
+        return count
+
+    def recommend(
+        self,
+        products: Iterable[str],
+        k: Optional[int] = None,
+        exclude: Iterable[str] = (),
+    ) -> List[Tuple[str, float]]:
+        """Products most often bought with the given ones, as (product_id, confidence).
+
+        For several products (a cart) the confidences are summed, so items
+        that go with more of the cart rank higher.
+        """
+        k = k or self.k
+        products = list(products)
+        skip = set(products) | set(exclude)
+        scores: Dict[str, float] = {}
+        with self._lock:
+            for product in products:
+                total = self.item_counts.get(product)
+                for other, together in self.neighbors.get(product, []):
+                    if other not in skip:
+                        scores[other] = scores.get(other, 0.0) + together / total
+        return heapq.nsmallest(k, scores.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    def popular(
+        self, k: Optional[int] = None, exclude: Iterable[str] = ()
+    ) -> List[Tuple[str, int]]:
+        """Best sellers by number of orders, for when there is nothing to go on."""
+        k = k or self.k
+        skip = set(exclude)
+        with self._lock:
+            if self._popular is None or len(self._popular) < k + len(skip):
+                self._popular = heapq.nsmallest(
+                    k + len(skip),
+                    self.item_counts.items(),
+                    key=lambda kv: (-kv[1], kv[0]),
+                )
+            return [
+                (product, count)
+                for product, count in self._popular
+                if product not in skip
+            ][:k]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: Path):
+        with self._lock:
+            data = {
+                "k": self.k,
+                "offset": self.offset,
+                "log_id": self.log_id,
+                "item_counts": self.item_counts,
+                "pair_counts": self.pair_counts,
+                "neighbors": self.neighbors,
+            }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "RecommendationIndex":
+        """A saved index, or an empty one if there is none (catch_up then fills it)."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls()
+        index = cls(k=data["k"])
+        index.offset = data["offset"]
+        index.log_id = tuple(data["log_id"]) if data["log_id"] else None
+        index.item_counts = data["item_counts"]
+        index.pair_counts = data["pair_counts"]
+        index.neighbors = {
+            product: [tuple(pair) for pair in pairs]
+            for product, pairs in data["neighbors"].items()
+        }
+        return index
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Build the frequently-bought-together index."
+    )
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--orders", type=Path, default=DEFAULT_ORDERS_PATH)
+    parser.add_argument("--output", type=Path, default=DEFAULT_INDEX_PATH)
+    parser.add_argument(
+        "-k", type=int, default=DEFAULT_TOP_K, help="Neighbors kept per product"
+    )
+    args = parser.parse_args(argv)
+
+    index = RecommendationIndex(k=args.k)
+    count = index.catch_up(OrderStore(args.orders))
+    index.save(args.output)
+    pairs = sum(len(row) for row in index.pair_counts.values()) // 2
+    print(
+        f"✅ Indexed {count} orders: {len(index.item_counts)} products, {pairs} product pairs -> {args.output}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
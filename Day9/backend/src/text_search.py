@@ -0,0 +1,147 @@
+"""
+Full-text product search for natural-language requests.
+
+Shoppers describe what they need ("something to keep my drinks cold") rather
+than a category or a color, so product names, descriptions and categories
+are tokenized into an inverted index (term -> {product: weight}) and ranked
+with BM25. Name words count double, as a match there says more about the
+product than one in the description. A search only touches the postings of
+the words in the query, never the whole catalog.
+
+Words are lower-cased, common filler words are dropped and plural or
+third-person endings are trimmed, so "drinks" finds "drink" and "keeps".
+"""
+
+import math
+import re
+from functools import lru_cache
+from heapq import nlargest
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    [
+        "a",
+        "an",
+        "and",
+        "any",
+        "are",
+        "as",
+        "at",
+        "be",
+        "but",
+        "by",
+        "can",
+        "do",
+        "for",
+        "from",
+        "get",
+        "have",
+        "i",
+        "in",
+        "is",
+        "it",
+        "its",
+        "me",
+        "my",
+        "need",
+        "of",
+        "on",
+        "or",
+        "our",
+        "so",
+        "some",
+        "something",
+        "that",
+        "the",
+        "thing",
+        "things",
+        "this",
+        "to",
+        "want",
+        "with",
+        "you",
+        "your",
+    ]
+)
+
+NAME_WEIGHT = 2
+# BM25 parameters: term frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+
+@lru_cache(maxsize=8192)
+def stem(word: str) -> str:
+    """Trim plural and third-person endings: bottles -> bottle, boxes -> box, keeps -> keep."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("sses", "xes", "zes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(word) for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+class TextIndex:
+    """Inverted index over product name, description and category, ranked with BM25."""
+
+    def __init__(self, products: List[Dict[str, Any]]):
+        self.products = list(products)
+        self._postings: Dict[str, Dict[int, int]] = {}
+        lengths: List[int] = []
+        for position, product in enumerate(self.products):
+            weights: Dict[str, int] = {}
+            for term in tokenize(product.get("name", "")):
+                weights[term] = weights.get(term, 0) + NAME_WEIGHT
+            for term in tokenize(
+                f"{product.get('description', '')} {product.get('category', '').replace('_', ' ')}"
+            ):
+                weights[term] = weights.get(term, 0) + 1
+            for term, weight in weights.items():
+                self._postings.setdefault(term, {})[position] = weight
+            lengths.append(sum(weights.values()))
+
+        average = sum(lengths) / len(lengths) if lengths else 1.0
+        self._norms = [K1 * (1 - B + B * length / average) for length in lengths]
+        count = len(self.products)
+        self._idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def search(
+        self, query: str, limit: int = 3, only: Optional[Collection[str]] = None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Best matches for query as (product, score), best first.
+
+        only restricts the results to those product IDs (e.g. a facet filter).
+        Products that share no word with the query are never returned.
+        """
+        scores: Dict[int, float] = {}
+        for term in dict.fromkeys(tokenize(query)):
+            docs = self._postings.get(term)
+            if not docs:
+                continue
+            idf = self._idf[term]
+            for position, weight in docs.items():
+                scores[position] = scores.get(position, 0.0) + idf * weight * (
+                    K1 + 1
+                ) / (weight + self._norms[position])
+        if only is not None:
+            allowed = set(only)
+            scores = {
+                position: score
+                for position, score in scores.items()
+                if self.products[position]["id"] in allowed
+            }
+        best = nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.products[position], score) for position, score in best]
@@ -0,0 +1,114 @@
+"""
+Compact, token-budgeted tool responses.
+
+Tool output goes into the LLM context and stays there for the rest of the
+session, so listings are rendered as a compact table rather than labelled
+blocks:
+
+- a column with the same value on every row (one category, one price) is
+  stated once in the heading instead of on each row, when rows holds every
+  match;
+- long cells are cut at a word boundary;
+- rows are added only while the response fits the token budget, and a
+  "+N more" line says what was left out and how to get it.
+
+Tokens are estimated at four characters each, which is close enough for
+budgeting without a tokenizer. Each render logs its estimated size against
+the labelled-block format it replaces.
+"""
+
+import logging
+from typing import Any, List, Optional, Sequence
+
+logger = logging.getLogger("ecommerce_agent")
+
+DEFAULT_TOKEN_BUDGET = 250
+CHARS_PER_TOKEN = 4
+MAX_CELL_CHARS = 48
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _cell(value: Any, max_chars: int) -> str:
+    if isinstance(value, (list, tuple)):
+        value = "/".join(str(v) for v in value)
+    text = " ".join(str(value).split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[: max_chars - 1].rsplit(" ", 1)[0] or text[: max_chars - 1]
+    return cut.rstrip(",;.") + "…"
+
+
+def _verbose_tokens(
+    columns: Sequence[str], rows: Sequence[Sequence[Any]], heading: str
+) -> int:
+    """Size of the same rows as labelled blocks ("Name: ...", one field per line)."""
+    chars = len(heading)
+    for row in rows:
+        for column, value in zip(columns, row):
+            if isinstance(value, (list, tuple)):
+                value = ", ".join(str(v) for v in value)
+            chars += len(f"  {column.title()}: {value}\n")
+        chars += 1
+    return -(-chars // CHARS_PER_TOKEN)
+
+
+def render_table(
+    heading: str,
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    total: Optional[int] = None,
+    budget: int = DEFAULT_TOKEN_BUDGET,
+    more_hint: str = "",
+    preamble: Sequence[str] = (),
+    max_cell_chars: int = MAX_CELL_CHARS,
+    tool: str = "tool",
+) -> str:
+    """Render rows as a pipe-separated table that fits in budget tokens.
+
+    total is the number of matches overall, when rows is only the first
+    few. At least one row is always shown, even if it alone exceeds the
+    budget.
+    """
+    total = len(rows) if total is None else total
+    cells = [[_cell(value, max_cell_chars) for value in row] for row in rows]
+
+    # State columns that never vary once, in the heading; only when every
+    # match is here, as rows left out might differ
+    shared: List[str] = []
+    keep = list(range(len(columns)))
+    if 1 < len(cells) == total:
+        for i, column in enumerate(columns):
+            values = {row[i] for row in cells}
+            if len(values) == 1 and len(columns) - len(shared) > 1:
+                shared.append(f"{column}: {cells[0][i]}")
+                keep.remove(i)
+    title = f"{heading} ({'; '.join(shared)})" if shared else heading
+
+    lines = [*preamble, title, " | ".join(columns[i] for i in keep)]
+    used = estimate_tokens("\n".join(lines))
+    hint = f"; {more_hint}" if more_hint else ""
+    shown = 0
+    for row in cells:
+        line = " | ".join(row[i] for i in keep)
+        remaining = total - shown - 1
+        # Leave room for the "+N more" line this row would need after it
+        more = f"\n+{remaining} more{hint}" if remaining else ""
+        if shown and used + estimate_tokens(f"\n{line}{more}") > budget:
+            break
+        lines.append(line)
+        used += estimate_tokens(f"\n{line}")
+        shown += 1
+    if total > shown:
+        lines.append(f"+{total - shown} more{hint}")
+
+    text = "\n".join(lines)
+    compact = estimate_tokens(text)
+    verbose = _verbose_tokens(columns, rows, "\n".join([*preamble, heading]))
+    logger.info(
+        f"🧮 {tool}: ~{compact} tokens for {shown}/{total} rows "
+        f"(labelled format ~{verbose}, saved ~{max(verbose - compact, 0)})"
+    )
+    return text
@@ -0,0 +1,95 @@
+"""
+Variant lookup by (product_id, size, color).
+
+Sizes and colors are normalized the same way on both sides, the catalog
+values when the index is built and whatever the speech-to-text heard at
+lookup time. Case, spacing and filler words ("size M", "black colour") are
+ignored, units are unified ("350 milliliters" and "350ml"), and common
+spoken forms map to the catalog's values ("medium" -> M, "grey" -> gray).
+A variant then resolves with a single dict lookup.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+SIZE_ALIASES = {
+    "extrasmall": "xs",
+    "xsmall": "xs",
+    "small": "s",
+    "medium": "m",
+    "med": "m",
+    "large": "l",
+    "extralarge": "xl",
+    "xlarge": "xl",
+    "xxlarge": "xxl",
+    "doubleextralarge": "xxl",
+    "doublexl": "xxl",
+    "2xl": "xxl",
+    "onesize": "adjustable",
+    "freesize": "adjustable",
+    "onesizefitsall": "adjustable",
+    "regular": "standard",
+    "normal": "standard",
+    "onelitre": "1l",
+    "oneliter": "1l",
+}
+
+COLOR_ALIASES = {
+    "grey": "gray",
+    "navyblue": "navy",
+    "darkblue": "navy",
+    "steel": "silver",
+    "stainlesssteel": "silver",
+}
+
+_SIZE_FILLER = {"size", "sized", "waist", "inch", "inches"}
+_COLOR_FILLER = {"color", "colour", "colored", "coloured"}
+_UNITS = [
+    (re.compile(r"(\d+(?:\.\d+)?)\s*(?:milliliters?|millilitres?|ml)\b"), r"\1ml"),
+    (re.compile(r"(\d+(?:\.\d+)?)\s*(?:liters?|litres?|l)\b"), r"\1l"),
+]
+
+
+def _words(text: str, filler: set) -> str:
+    # Keep decimal points ("0.5 l") but drop other punctuation ("M.")
+    text = re.sub(r"[-_,]|\.(?!\d)", " ", text.lower())
+    return " ".join(word for word in text.split() if word not in filler)
+
+
+# The vocabulary of sizes and colors is small, so normalizing is memoized
+@lru_cache(maxsize=4096)
+def normalize_size(size: str) -> str:
+    text = _words(size, _SIZE_FILLER)
+    for pattern, replacement in _UNITS:
+        text = pattern.sub(replacement, text)
+    text = text.replace(" ", "")
+    return SIZE_ALIASES.get(text, text)
+
+
+@lru_cache(maxsize=4096)
+def normalize_color(color: str) -> str:
+    text = _words(color, _COLOR_FILLER).replace(" ", "")
+    return COLOR_ALIASES.get(text, text)
+
+
+class VariantIndex:
+    """Normalized (product_id, size, color) -> variant dict, built once."""
+
+    def __init__(self, products: List[Dict[str, Any]]):
+        self._variants: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        for product in products:
+            for variant in product["variants"]:
+                key = (
+                    product["id"],
+                    normalize_size(variant["size"]),
+                    normalize_color(variant["color"]),
+                )
+                self._variants.setdefault(key, variant)
+
+    def resolve(
+        self, product_id: str, size: str, color: str
+    ) -> Optional[Dict[str, Any]]:
+        return self._variants.get(
+            (product_id, normalize_size(size), normalize_color(color))
+        )
@@ -0,0 +1,155 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from cart import CartStore, ShopperState, ShoppingCart, customer_id_for
+
+
+def _line(
+    product_id: str,
+    quantity: int = 1,
+    price: int = 100,
+    size: str = "M",
+    color: str = "black",
+) -> dict:
+    return {
+        "product_id": product_id,
+        "product_name": product_id.title(),
+        "variant": {"size": size, "color": color},
+        "quantity": quantity,
+        "unit_price": price,
+        "total_price": price * quantity,
+    }
+
+
+def test_cart_operations() -> None:
+    cart = ShoppingCart()
+    cart.add(_line("tshirt-001", 2))
+    cart.add(_line("mug-001"))
+    cart.add(_line("tshirt-001", color="white"))
+    assert cart.total() == 400
+    assert cart.remove_product("tshirt-001") == 2
+    assert [line["product_id"] for line in cart] == ["mug-001"]
+    assert cart.clear() == 1
+    assert not cart
+
+
+def test_same_variant_merges_into_one_line() -> None:
+    cart = ShoppingCart()
+    first = cart.add(_line("tshirt-001", 2))
+    assert cart.add(_line("tshirt-001", 1, size="m", color="Black")) is first
+    cart.add(_line("tshirt-001", 1, size="L"))
+    assert len(cart) == 2
+    assert first["quantity"] == 3 and first["total_price"] == 300
+    assert cart.total() == 400
+    assert cart.variant_quantities() == {
+        ("tshirt-001", "m", "black"): 3,
+        ("tshirt-001", "l", "black"): 1,
+    }
+
+
+def test_rendered_cart_is_cached_until_changed() -> None:
+    cart = ShoppingCart()
+    assert "empty" in cart.render()
+    cart.add(_line("mug-001", 2, price=349))
+    text = cart.render()
+    assert "1. Mug-001" in text and "Quantity: 2, Price: ₹698" in text
+    assert text.endswith("💰 Total: ₹698 INR")
+    assert cart.render() is text
+
+    cart.add(_line("mug-001"))
+    assert cart.render() is not text
+    assert "Quantity: 3" in cart.render()
+    cart.remove_product("mug-001")
+    assert "empty" in cart.render()
+
+
+def test_sessions_keep_their_own_carts(tmp_path) -> None:
+    store = CartStore(db_path=tmp_path / "carts.db")
+    participants = [
+        SimpleNamespace(identity="guest", metadata='{"customer_id": "alice"}'),
+        SimpleNamespace(identity="bob", metadata="not json"),
+    ]
+
+    def start(room: str, participant) -> ShopperState:
+        # What the entrypoint does once the shopper joins
+        state = ShopperState(session_id=f"{room}:job")
+        state.customer_id = customer_id_for(participant)
+        state.cart = store.load(state.customer_id)
+        return state
+
+    async def shop(state: ShopperState, steps: int):
+        for step in range(steps):
+            # What add_to_cart_tool does with context.userdata
+            line = state.cart.add(_line(f"{state.customer_id}-{step}"))
+            store.save_line(state.customer_id, line)
+            await asyncio.sleep(0)
+
+    sessions = [start(f"room-{n}", p) for n, p in enumerate(participants)]
+
+    async def shop_all():
+        await asyncio.gather(shop(sessions[0], 3), shop(sessions[1], 2))
+
+    asyncio.run(shop_all())
+
+    assert [state.customer_id for state in sessions] == ["alice", "bob"]
+    assert [line["product_id"] for line in sessions[0].cart] == [
+        "alice-0",
+        "alice-1",
+        "alice-2",
+    ]
+    assert [line["product_id"] for line in sessions[1].cart] == ["bob-0", "bob-1"]
+
+    # Alice calls again from another room and gets her own cart back
+    again = start("room-2", participants[0])
+    assert again.session_id != sessions[0].session_id
+    assert again.cart is not sessions[0].cart
+    assert [line["product_id"] for line in again.cart] == [
+        "alice-0",
+        "alice-1",
+        "alice-2",
+    ]
+    assert customer_id_for(SimpleNamespace(identity="", metadata=None)) is None
+
+
+def test_cart_store_keeps_carts_per_customer(tmp_path) -> None:
+    for store in (CartStore(), CartStore(db_path=tmp_path / "carts.db")):
+        cart = store.load("alice")
+        assert not cart
+        store.save_line("alice", cart.add(_line("mug-001")))
+        store.save_line("alice", cart.add(_line("cap-001")))
+        store.save_line("alice", cart.add(_line("mug-001", 2)))
+
+        # A later call gets the saved cart; changing it does not touch the store
+        restored = store.load("alice")
+        assert [(line["product_id"], line["quantity"]) for line in restored] == [
+            ("mug-001", 3),
+            ("cap-001", 1),
+        ]
+        restored.add(_line("cap-001"))
+        assert store.load("alice").total() == 400
+        assert not store.load("bob")
+
+        store.remove_product("alice", "mug-001")
+        assert [line["product_id"] for line in store.load("alice")] == ["cap-001"]
+        store.clear("alice")
+        assert not store.load("alice")
+
+
+def test_shared_cart_store_under_concurrency(tmp_path) -> None:
+    store = CartStore(db_path=tmp_path / "carts.db")
+    # A second instance stands in for another worker process
+    other = CartStore(db_path=tmp_path / "carts.db")
+
+    def shop(n: int):
+        target = store if n % 2 else other
+        cart = target.load(f"customer-{n}")
+        for step in range(5):
+            target.save_line(f"customer-{n}", cart.add(_line(f"product-{n}-{step}")))
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(shop, range(100)))
+
+    for n in range(100):
+        product_ids = [line["product_id"] for line in store.load(f"customer-{n}")]
+        assert product_ids == [f"product-{n}-{step}" for step in range(5)]
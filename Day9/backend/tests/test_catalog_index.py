@@ -0,0 +1,102 @@
+import random
+
+from catalog_index import FacetIndex, iter_bits
+
+PRODUCTS = [
+    {
+        "id": "tshirt-001",
+        "category": "clothing",
+        "base_price": 799,
+        "variants": [{"size": "M", "color": "black"}, {"size": "L", "color": "white"}],
+    },
+    {
+        "id": "mug-001",
+        "category": "home_kitchen",
+        "base_price": 349,
+        "variants": [{"size": "350ml", "color": "White"}],
+    },
+    {
+        "id": "hoodie-001",
+        "category": "clothing",
+        "base_price": 1499,
+        "variants": [{"size": "M", "color": "gray"}],
+    },
+    {
+        "id": "cap-001",
+        "category": "accessories",
+        "base_price": 799,
+        "variants": [{"size": "adjustable", "color": "black"}],
+    },
+]
+
+
+def _ids(products) -> list:
+    return [product["id"] for product in products]
+
+
+def test_iter_bits() -> None:
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b1011)) == [0, 1, 3]
+    assert list(iter_bits(1 << 100 | 1 << 7)) == [7, 100]
+
+
+def test_facet_filters_keep_catalog_order() -> None:
+    index = FacetIndex(PRODUCTS)
+    assert _ids(index.query()) == _ids(PRODUCTS)
+    assert _ids(index.query(category="Clothing")) == ["tshirt-001", "hoodie-001"]
+    assert _ids(index.query(color="WHITE")) == ["tshirt-001", "mug-001"]
+    assert _ids(index.query(category="clothing", size="m", max_price=1000)) == [
+        "tshirt-001"
+    ]
+    assert _ids(index.query(max_price=799)) == ["tshirt-001", "mug-001", "cap-001"]
+    assert _ids(index.query(min_price=799, max_price=799)) == ["tshirt-001", "cap-001"]
+    assert index.query(color="purple") == []
+    assert index.query(max_price=100) == []
+    assert index.count(color="black") == 2
+    assert _ids(index.query(limit=2, color="black")) == ["tshirt-001", "cap-001"]
+    assert index.get("mug-001") is PRODUCTS[1]
+
+
+def _linear_filter(products, category=None, max_price=None, color=None, size=None):
+    return [
+        p
+        for p in products
+        if (category is None or p["category"].lower() == category.lower())
+        and (max_price is None or p["base_price"] <= max_price)
+        and (
+            color is None
+            or any(v["color"].lower() == color.lower() for v in p["variants"])
+        )
+        and (
+            size is None
+            or any(v["size"].lower() == size.lower() for v in p["variants"])
+        )
+    ]
+
+
+def test_facet_index_matches_linear_filter() -> None:
+    rng = random.Random(7)
+    colors, sizes = ["black", "white", "blue", "red"], ["S", "M", "L", "XL"]
+    products = [
+        {
+            "id": f"p{i}",
+            "category": rng.choice(["clothing", "accessories", "home_kitchen"]),
+            "base_price": rng.randint(100, 2000),
+            "variants": [
+                {"size": rng.choice(sizes), "color": rng.choice(colors)}
+                for _ in range(rng.randint(1, 4))
+            ],
+        }
+        for i in range(500)
+    ]
+    index = FacetIndex(products)
+    for _ in range(200):
+        filters = {
+            "category": rng.choice([None, "clothing", "Accessories", "toys"]),
+            "max_price": rng.choice([None, 99, 500, 1500, 2000]),
+            "color": rng.choice([None, *colors]),
+            "size": rng.choice([None, "m", "XL", "xxl"]),
+        }
+        expected = _linear_filter(products, **filters)
+        assert index.query(**filters) == expected
+        assert index.count(**filters) == len(expected)
@@ -0,0 +1,164 @@
+import contextlib
+import multiprocessing
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cart import ShoppingCart
+from inventory import InsufficientStockError, Inventory, variant_key
+
+TEE_M = variant_key("tshirt-001", "M", "Black")
+TEE_L = variant_key("tshirt-001", "L", "black")
+MUG = variant_key("mug-001", "350ml", "white")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_inventory(request, tmp_path):
+    def make(**kwargs):
+        db_path = tmp_path / "inventory.db" if request.param == "sqlite" else None
+        inventory = Inventory(db_path=db_path, **kwargs)
+        inventory.seed({TEE_M: 5, TEE_L: 2, MUG: 10})
+        return inventory
+
+    return make
+
+
+def test_reserve_holds_stock_until_released(make_inventory) -> None:
+    inventory = make_inventory()
+    assert inventory.reserve("alice", TEE_M, 2) == 2
+    assert inventory.reserve("alice", TEE_M, 1) == 3
+    assert inventory.available(TEE_M) == 2
+
+    with pytest.raises(InsufficientStockError) as excinfo:
+        inventory.reserve("bob", TEE_M, 3)
+    assert excinfo.value.available == 2
+
+    inventory.reserve("alice", MUG, 4)
+    assert inventory.release("alice", product_id="tshirt-001") == 3
+    assert inventory.held("alice") == {MUG: 4}
+    assert inventory.available(TEE_M) == 5
+    assert inventory.release("alice") == 4
+    assert inventory.held("alice") == {}
+
+
+def test_seed_keeps_existing_stock(make_inventory) -> None:
+    inventory = make_inventory()
+    inventory.commit("alice", {MUG: 3})
+    inventory.seed({MUG: 10})
+    assert inventory.available(MUG) == 7
+
+
+def test_expired_holds_stop_counting(make_inventory) -> None:
+    now = [1000.0]
+    inventory = make_inventory(hold_seconds=60, clock=lambda: now[0])
+    inventory.reserve("alice", TEE_L, 2)
+    with pytest.raises(InsufficientStockError):
+        inventory.reserve("bob", TEE_L, 1)
+
+    now[0] += 61
+    assert inventory.available(TEE_L) == 2
+    assert inventory.reserve("bob", TEE_L, 1) == 1
+    assert inventory.held("alice") == {}
+
+
+def test_commit_is_all_or_nothing(make_inventory) -> None:
+    inventory = make_inventory()
+    inventory.reserve("alice", TEE_M, 2)
+    inventory.reserve("bob", TEE_L, 2)
+
+    with pytest.raises(InsufficientStockError) as excinfo:
+        inventory.commit("alice", {TEE_M: 2, TEE_L: 1})
+    assert excinfo.value.key == TEE_L
+    assert inventory.held("alice") == {TEE_M: 2}
+    assert inventory.available(TEE_M) == 3
+
+    # Held units plus free stock for the part that was not held
+    inventory.commit("alice", {TEE_M: 2, MUG: 1})
+    assert inventory.held("alice") == {}
+    assert inventory.available(TEE_M) == 3
+    assert inventory.available(MUG) == 9
+
+
+def test_concurrent_reservations_never_oversell(make_inventory) -> None:
+    inventory = make_inventory()
+
+    def grab(n: int) -> bool:
+        try:
+            inventory.reserve(f"session-{n}", MUG, 1)
+            inventory.reserve(f"session-{n}", TEE_M, 1)
+        except InsufficientStockError:
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(grab, range(100)))
+
+    assert sum(results) == 5
+    assert inventory.available(MUG) == 0
+    assert inventory.available(TEE_M) == 0
+
+
+def _reserve_from_process(db_path, worker: int, attempts: int) -> None:
+    inventory = Inventory(db_path=db_path)
+    for n in range(attempts):
+        with contextlib.suppress(InsufficientStockError):
+            inventory.reserve(f"w{worker}-{n}", MUG, 1)
+
+
+def test_processes_share_sqlite_stock(tmp_path) -> None:
+    db_path = tmp_path / "inventory.db"
+    Inventory(db_path=db_path).seed({MUG: 30})
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_reserve_from_process, args=(db_path, w, 20))
+        for w in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert Inventory(db_path=db_path).available(MUG) == 0
+
+
+def test_sqlite_reads_do_not_wait_for_writers(tmp_path) -> None:
+    inventory = Inventory(db_path=tmp_path / "inventory.db")
+    inventory.seed({TEE_M: 5, TEE_L: 2})
+    inventory.reserve("alice", TEE_M, 2)
+
+    # Another worker in the middle of a check-and-reserve
+    writer = sqlite3.connect(tmp_path / "inventory.db", isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.monotonic()
+        assert inventory.available_many([TEE_M, TEE_L, MUG]) == {
+            TEE_M: 3,
+            TEE_L: 2,
+            MUG: 0,
+        }
+        assert inventory.held("alice") == {TEE_M: 2}
+        assert time.monotonic() - started < 1
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+    assert inventory._connection() is inventory._connection()
+
+
+def test_cart_variant_quantities() -> None:
+    cart = ShoppingCart()
+    for size, color, quantity in (
+        ("M", "black", 1),
+        ("m", "Black", 2),
+        ("L", "black", 1),
+    ):
+        cart.add(
+            {
+                "product_id": "tshirt-001",
+                "variant": {"size": size, "color": color},
+                "quantity": quantity,
+                "total_price": 0,
+            }
+        )
+    assert cart.variant_quantities() == {TEE_M: 3, TEE_L: 1}
@@ -0,0 +1,103 @@
+import json
+import multiprocessing
+
+from order_store import OrderStore
+
+
+def _order(n: int, customer_id: str, day: int) -> dict:
+    return {
+        "order_id": f"ORD-{n}",
+        "customer_id": customer_id,
+        "created_at": f"2025-11-{day:02d}T10:00:00",
+        "items": [],
+    }
+
+
+def test_lookup_by_id_and_last_order(tmp_path) -> None:
+    store = OrderStore(tmp_path / "orders.ndjson")
+    assert store.last() is None
+    assert store.last("alice") is None
+
+    for n in range(10):
+        store.append(_order(n, "alice" if n % 2 else "bob", n + 1))
+
+    assert len(store) == 10
+    assert store.get("ORD-3")["customer_id"] == "alice"
+    assert store.get("ORD-missing") is None
+    assert store.last()["order_id"] == "ORD-9"
+    assert store.last("bob")["order_id"] == "ORD-8"
+
+    # A second instance stands in for another worker process
+    other = OrderStore(store.path)
+    other.append(_order(10, "bob", 20))
+    assert store.last("bob")["order_id"] == "ORD-10"
+    assert store.get("ORD-10")["created_at"].startswith("2025-11-20")
+
+
+def test_history_pages_newest_first(tmp_path) -> None:
+    store = OrderStore(tmp_path / "orders.ndjson")
+    for n in range(12):
+        store.append(_order(n, "alice", n + 1))
+    store.append(_order(99, "bob", 5))
+
+    page, total = store.history("alice", page=1, page_size=5)
+    assert total == 12
+    assert [o["order_id"] for o in page] == [
+        "ORD-11",
+        "ORD-10",
+        "ORD-9",
+        "ORD-8",
+        "ORD-7",
+    ]
+    page, _ = store.history("alice", page=3, page_size=5)
+    assert [o["order_id"] for o in page] == ["ORD-1", "ORD-0"]
+    assert store.history("alice", page=4, page_size=5) == ([], 12)
+
+    page, total = store.history(
+        "alice", since="2025-11-05", until="2025-11-09", page_size=2
+    )
+    assert total == 4
+    assert [o["order_id"] for o in page] == ["ORD-7", "ORD-6"]
+    assert store.history("carol") == ([], 0)
+
+
+def test_torn_lines_and_legacy_migration(tmp_path) -> None:
+    legacy = tmp_path / "orders.json"
+    legacy.write_text(json.dumps([_order(1, "alice", 1), _order(2, "bob", 2)]))
+    store = OrderStore(tmp_path / "orders.ndjson")
+
+    assert store.migrate_from_json(legacy) == 2
+    assert store.migrate_from_json(legacy) == 0
+    assert store.last("alice")["order_id"] == "ORD-1"
+
+    with open(store.path, "ab") as f:
+        f.write(b'{"order_id": "ORD-torn"')
+    store.append(_order(3, "alice", 3))
+    assert store.get("ORD-torn") is None
+    assert [o["order_id"] for o in store] == ["ORD-1", "ORD-2", "ORD-3"]
+    assert store.last("alice")["order_id"] == "ORD-3"
+
+
+def _append_from_process(path, worker: int, count: int) -> None:
+    store = OrderStore(path)
+    for n in range(count):
+        store.append(_order(worker * 1000 + n, f"customer-{worker}", 1 + n % 28))
+
+
+def test_concurrent_processes_append_without_loss(tmp_path) -> None:
+    path = tmp_path / "orders.ndjson"
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_append_from_process, args=(path, w, 200))
+        for w in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    store = OrderStore(path)
+    assert len(store) == 800
+    for w in range(4):
+        assert store.history(f"customer-{w}")[1] == 200
+        assert store.last(f"customer-{w}")["order_id"] == f"ORD-{w * 1000 + 199}"
@@ -0,0 +1,143 @@
+import json
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from product_catalog import CatalogLoader, ProductCatalog, build_snapshot
+
+
+def _write_catalog(path, products) -> None:
+    path.write_text(json.dumps({"products": products}), encoding="utf-8")
+
+
+def _product(product_id: str, price: int, variants) -> dict:
+    return {
+        "id": product_id,
+        "name": product_id.title(),
+        "description": f"About {product_id}",
+        "category": "clothing",
+        "base_price": price,
+        "currency": "INR",
+        "variants": [
+            {"size": size, "color": color, "price": price, "stock": stock}
+            for size, color, stock in variants
+        ],
+    }
+
+
+def test_snapshot_keeps_summaries_and_loads_variants_lazily(tmp_path) -> None:
+    source = tmp_path / "catalog.json"
+    _write_catalog(
+        source,
+        [
+            _product(
+                "tshirt", 799, [("M", "black", 5), ("L", "black", 2), ("M", "gray", 1)]
+            ),
+            _product("hoodie", 1499, [("XL", "navy", 3)]),
+        ],
+    )
+    version = build_snapshot(source, tmp_path / "catalog.db")
+    catalog = ProductCatalog(tmp_path / "catalog.db", variant_cache_size=1)
+
+    assert catalog.version == version
+    summary = catalog.get("tshirt")
+    assert "variants" not in summary
+    assert summary["sizes"] == ["M", "L"]
+    assert summary["colors"] == ["black", "gray"]
+
+    assert [v["size"] for v in catalog.variants("tshirt")] == ["M", "L", "M"]
+    assert catalog.resolve_variant("tshirt", "medium", "grey")["stock"] == 1
+    assert (
+        catalog.resolve_variant("hoodie", "extra large", "navy blue")["price"] == 1499
+    )
+    assert catalog.resolve_variant("tshirt", "S", "black") is None
+    assert catalog.variants("missing") == []
+
+    assert [p["id"] for p in catalog.index.query(color="grey")] == ["tshirt"]
+    assert [p["id"] for p in catalog.index.query(size="XL", max_price=2000)] == [
+        "hoodie"
+    ]
+    assert sorted(pid for pid, _ in catalog.iter_variants()) == [
+        "hoodie",
+        "tshirt",
+        "tshirt",
+        "tshirt",
+    ]
+
+
+def _touch(path, seconds: int) -> None:
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + seconds))
+
+
+def test_loader_reloads_new_versions_in_the_background(tmp_path) -> None:
+    source = tmp_path / "catalog.json"
+    _write_catalog(source, [_product("tshirt", 799, [("M", "black", 5)])])
+    loader = CatalogLoader(
+        tmp_path / "catalog.db", source_path=source, check_interval=0
+    )
+    loaded = []
+    loader.on_load(lambda catalog: loaded.append(catalog.version))
+
+    first = loader.get()
+    assert len(first) == 1
+    assert loader.get() is first
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_listener(catalog) -> None:
+        started.set()
+        release.wait(5)
+
+    loader.on_load(slow_listener)
+    _write_catalog(
+        source,
+        [
+            _product("tshirt", 749, [("M", "black", 5)]),
+            _product("cap", 499, [("adjustable", "red", 9)]),
+        ],
+    )
+    _touch(source, 10)
+    # The rebuild runs in the background; lookups keep getting the current version
+    assert loader.get() is first
+    assert started.wait(5)
+    assert loader.get() is first
+    release.set()
+    assert loader.wait_for_reload(5)
+
+    second = loader.get()
+    assert second.version != first.version
+    assert second.get("tshirt")["base_price"] == 749
+    assert loaded == [first.version, second.version]
+    # Sessions still holding the old version keep reading it until it is retired
+    assert first.get("cap") is None
+    assert first.variants("tshirt")[0]["price"] == 799
+
+    # A broken edit keeps the last good version, and is not rebuilt again until it changes
+    source.write_text("{not json", encoding="utf-8")
+    _touch(source, 20)
+    loader.get()
+    assert loader.wait_for_reload(5)
+    assert loader.get() is second
+    assert loader._reload is not None and not loader._changed()
+
+    loader.retire_after = 0
+    _write_catalog(source, [_product("tshirt", 699, [("M", "black", 5)])])
+    _touch(source, 30)
+    loader.get()
+    assert loader.wait_for_reload(5)
+    assert loader.get().get("tshirt")["base_price"] == 699
+    # The replaced version's connection is closed
+    with pytest.raises(sqlite3.ProgrammingError):
+        second.variants("cap")
+
+
+def test_loader_needs_a_catalog_to_start(tmp_path) -> None:
+    loader = CatalogLoader(
+        tmp_path / "catalog.db", source_path=tmp_path / "catalog.json"
+    )
+    with pytest.raises(FileNotFoundError):
+        loader.get()
@@ -0,0 +1,78 @@
+from order_store import OrderStore
+from recommendations import RecommendationIndex
+
+
+def _order(n: int, *product_ids: str) -> dict:
+    return {
+        "order_id": f"ORD-{n}",
+        "items": [{"product_id": pid, "quantity": 1} for pid in product_ids],
+    }
+
+
+def _fill(store: OrderStore) -> None:
+    baskets = [
+        ("tshirt", "jeans"),
+        ("tshirt", "jeans", "cap"),
+        ("tshirt", "cap"),
+        ("tshirt", "jeans"),
+        ("mug", "bottle"),
+        ("mug", "bottle", "lunchbox"),
+        ("tshirt", "tshirt"),  # duplicate lines count once
+    ]
+    for n, basket in enumerate(baskets):
+        store.append(_order(n, *basket))
+
+
+def test_top_neighbors_by_co_occurrence(tmp_path) -> None:
+    store = OrderStore(tmp_path / "orders.ndjson")
+    _fill(store)
+    index = RecommendationIndex(k=2)
+    assert index.catch_up(store) == 7
+
+    assert index.item_counts["tshirt"] == 5
+    assert index.pair_counts["tshirt"] == {"jeans": 3, "cap": 2}
+    assert index.neighbors["mug"] == [("bottle", 2), ("lunchbox", 1)]
+    assert index.recommend(["tshirt"]) == [("jeans", 3 / 5), ("cap", 2 / 5)]
+    assert index.recommend(["tshirt"], exclude=["jeans"]) == [("cap", 2 / 5)]
+    # A cart sums its items' confidences
+    assert [pid for pid, _ in index.recommend(["jeans", "cap"])] == ["tshirt"]
+    assert index.recommend(["unknown"]) == []
+    assert index.popular(k=2) == [("tshirt", 5), ("jeans", 3)]
+    assert index.popular(k=1, exclude=["tshirt"]) == [("jeans", 3)]
+
+
+def test_catch_up_counts_only_new_orders(tmp_path) -> None:
+    store = OrderStore(tmp_path / "orders.ndjson")
+    _fill(store)
+    index = RecommendationIndex()
+    index.catch_up(store)
+    assert index.catch_up(store) == 0
+
+    for n in range(3):
+        store.append(_order(100 + n, "tshirt", "hoodie"))
+    assert index.catch_up(store) == 3
+    assert index.recommend(["tshirt"])[0] == ("hoodie", 3 / 8)
+    assert index.neighbors["hoodie"] == [("tshirt", 3)]
+
+
+def test_saved_index_resumes_from_its_offset(tmp_path) -> None:
+    store = OrderStore(tmp_path / "orders.ndjson")
+    _fill(store)
+    built = RecommendationIndex()
+    built.catch_up(store)
+    built.save(tmp_path / "recommendations.json")
+
+    store.append(_order(200, "cap", "jeans"))
+    loaded = RecommendationIndex.load(tmp_path / "recommendations.json")
+    assert loaded.catch_up(store) == 1
+    assert loaded.pair_counts["cap"] == {"jeans": 2, "tshirt": 2}
+    assert loaded.item_counts["tshirt"] == 5
+
+    # A replaced log (new inode) is counted from scratch
+    replacement = tmp_path / "replacement.ndjson"
+    OrderStore(replacement).append(_order(300, "mug", "cap"))
+    replacement.replace(store.path)
+    assert loaded.catch_up(store) == 1
+    assert loaded.item_counts == {"mug": 1, "cap": 1}
+
+    assert RecommendationIndex.load(tmp_path / "missing.json").item_counts == {}
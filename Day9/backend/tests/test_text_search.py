@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+
+from text_search import TextIndex, stem, tokenize
+
+CATALOG_PATH = Path(__file__).parent.parent / "data" / "catalog.json"
+
+
+def _index() -> TextIndex:
+    return TextIndex(json.loads(CATALOG_PATH.read_text(encoding="utf-8"))["products"])
+
+
+def test_tokenize_drops_filler_and_plurals() -> None:
+    assert tokenize("Something to keep my drinks cold!") == ["keep", "drink", "cold"]
+    assert [stem(w) for w in ("bottles", "boxes", "accessories", "glass", "keeps")] == [
+        "bottle",
+        "box",
+        "accessory",
+        "glass",
+        "keep",
+    ]
+
+
+def test_natural_language_queries_find_the_product() -> None:
+    index = _index()
+
+    def top(query: str, **kwargs) -> list:
+        return [product["id"] for product, _ in index.search(query, **kwargs)]
+
+    assert top("something to keep my drinks cold") == ["bottle-001"]
+    assert top("a bag for my laptop")[0] == "backpack-001"
+    assert top("a mug for tea") == ["mug-001"]
+    assert top("JEANS") == ["jeans-001"]
+    assert len(top("kitchen", limit=2)) == 2
+    assert top("a bag for my laptop", only=["lunchbox-001"]) == ["lunchbox-001"]
+    assert top("the thing") == []
+    assert top("spaceship") == []
+
+
+def test_name_matches_rank_above_description_matches() -> None:
+    index = TextIndex(
+        [
+            {
+                "id": "a",
+                "name": "Canvas Tote",
+                "description": "Carry your leather wallet",
+                "category": "accessories",
+            },
+            {
+                "id": "b",
+                "name": "Leather Wallet",
+                "description": "Slim bifold",
+                "category": "accessories",
+            },
+        ]
+    )
+    assert [product["id"] for product, _ in index.search("leather wallet")] == [
+        "b",
+        "a",
+    ]
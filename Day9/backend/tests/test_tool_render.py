@@ -0,0 +1,73 @@
+from tool_render import estimate_tokens, render_table
+
+COLUMNS = ["id", "name", "price", "category"]
+
+
+def _rows(n: int) -> list:
+    return [
+        [f"p{i}", f"Product number {i}", f"₹{100 + i}", "clothing"] for i in range(n)
+    ]
+
+
+def test_shared_columns_move_to_the_heading() -> None:
+    text = render_table("Found 3 product(s)", COLUMNS, _rows(3))
+    lines = text.splitlines()
+    assert lines[0] == "Found 3 product(s) (category: clothing)"
+    assert lines[1] == "id | name | price"
+    assert lines[2] == "p0 | Product number 0 | ₹100"
+    assert "more" not in text
+
+
+def test_rows_are_cut_to_the_budget_with_a_more_hint() -> None:
+    text = render_table(
+        "Found 500 product(s)",
+        COLUMNS,
+        _rows(50),
+        total=500,
+        budget=60,
+        more_hint="add filters",
+    )
+    assert estimate_tokens(text) <= 60
+    lines = text.splitlines()
+    shown = len(lines) - 3
+    assert 0 < shown < 50
+    assert lines[-1] == f"+{500 - shown} more; add filters"
+
+
+def test_budget_counts_the_whole_more_line() -> None:
+    hint = "narrow it down with a category, a price range, a color or a size"
+    for budget in range(45, 120, 7):
+        text = render_table(
+            "Found 500 product(s)",
+            COLUMNS,
+            _rows(50),
+            total=500,
+            budget=budget,
+            more_hint=hint,
+        )
+        assert estimate_tokens(text) <= budget
+        assert text.endswith(hint)
+
+
+def test_columns_are_only_hoisted_when_every_match_is_shown() -> None:
+    # The first rows agree on category, but the other 497 matches may not
+    text = render_table("Found 500 product(s)", COLUMNS, _rows(3), total=500)
+    lines = text.splitlines()
+    assert lines[0] == "Found 500 product(s)"
+    assert lines[1] == "id | name | price | category"
+    assert lines[2].endswith("| clothing")
+
+
+def test_long_cells_are_truncated_and_lists_joined() -> None:
+    description = "Durable water-resistant backpack with a padded laptop compartment and bottle pockets"
+    text = render_table(
+        "Found 1 product(s)",
+        ["id", "colors", "about"],
+        [["backpack-001", ["black", "navy"], description]],
+        max_cell_chars=30,
+        budget=5,
+    )
+    row = text.splitlines()[2]
+    assert row.startswith("backpack-001 | black/navy | Durable water-resistant")
+    assert row.endswith("…")
+    assert len(row.split(" | ")[2]) <= 30
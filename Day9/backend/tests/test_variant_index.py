@@ -0,0 +1,60 @@
+from catalog_index import FacetIndex
+from variant_index import VariantIndex, normalize_color, normalize_size
+
+PRODUCTS = [
+    {
+        "id": "tshirt-001",
+        "category": "clothing",
+        "base_price": 799,
+        "variants": [
+            {"size": "M", "color": "black", "price": 799},
+            {"size": "XL", "color": "gray", "price": 899},
+        ],
+    },
+    {
+        "id": "bottle-001",
+        "category": "home_kitchen",
+        "base_price": 799,
+        "variants": [
+            {"size": "750ml", "color": "silver", "price": 799},
+            {"size": "1L", "color": "blue", "price": 949},
+        ],
+    },
+    {
+        "id": "jeans-001",
+        "category": "clothing",
+        "base_price": 1899,
+        "variants": [{"size": "32", "color": "blue", "price": 1899}],
+    },
+]
+
+
+def test_spoken_sizes_and_colors_normalize() -> None:
+    for spoken in ("M", "m", "medium", "Medium.", "size M", "med"):
+        assert normalize_size(spoken) == "m"
+    for spoken in ("XL", "x-large", "extra large", "X L"):
+        assert normalize_size(spoken) == "xl"
+    for spoken in ("1L", "1 liter", "one litre", "1 l"):
+        assert normalize_size(spoken) == "1l"
+    assert normalize_size("750 milliliters") == normalize_size("750ml") == "750ml"
+    assert normalize_size("0.5 litres") == "0.5l"
+    assert normalize_size("32 waist") == "32"
+    assert normalize_color("Grey") == normalize_color("gray colour") == "gray"
+    assert normalize_color("navy blue") == "navy"
+
+
+def test_variant_index_resolves_in_one_lookup() -> None:
+    index = VariantIndex(PRODUCTS)
+    assert index.resolve("tshirt-001", "medium", "Black")["price"] == 799
+    assert index.resolve("tshirt-001", "extra large", "grey")["price"] == 899
+    assert index.resolve("bottle-001", "one liter", "blue")["price"] == 949
+    assert index.resolve("bottle-001", "750 ml", "steel")["price"] == 799
+    assert index.resolve("jeans-001", "size 32", "blue")["size"] == "32"
+    assert index.resolve("tshirt-001", "small", "black") is None
+    assert index.resolve("missing", "M", "black") is None
+
+
+def test_browse_filters_accept_spoken_forms() -> None:
+    index = FacetIndex(PRODUCTS)
+    assert [p["id"] for p in index.query(color="grey")] == ["tshirt-001"]
+    assert [p["id"] for p in index.query(size="1 litre")] == ["bottle-001"]